@@ -1,7 +1,6 @@
 """Model loader for Intent and Capacity models with real scoring"""
 
 import pickle
-import joblib
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -11,6 +10,7 @@ import logging
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.capacity_model import CapacityModel
 from agents.config import (
     DECISION_MATRIX, MOCK_ML_SCORES, MOCK_COMPANY_DATA,
     MOCK_EXTERNAL_DATA, GREEN_FLAG_SCORES, RED_FLAG_SCORES, LGD
@@ -41,7 +41,7 @@ class ModelLoader:
             
             # Load Capacity model (Cox PH)
             capacity_path = self.project_root / "models" / "capacity_cox.pkl"
-            self.capacity_model = joblib.load(capacity_path)
+            self.capacity_model = CapacityModel.load(capacity_path)
             logger.info("✓ Loaded capacity_cox.pkl")
             
         except Exception as e:
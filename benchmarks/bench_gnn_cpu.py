@@ -0,0 +1,128 @@
+"""
+CPU benchmark for HeteroGNN training and inference.
+
+Builds a synthetic company/device/payment-method/IP graph with GraphBuilder and
+reports epochs/sec (training) and nodes/sec (full-graph inference) for each
+CPU profile (thread count, bf16 autocast, torch.compile).
+
+Usage:
+    python benchmarks/bench_gnn_cpu.py --companies 5000 --threads 1 4 --bf16 --compile
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.graph_builder import GraphBuilder
+from src.intent_model import HeteroGNN
+from src.gnn_trainer import GNNTrainer
+from src.torch_runtime import configure_torch_cpu, available_cores, autocast
+
+def make_graph(n_companies, n_features, bookings_per_company, seed=42):
+    """Random heterogeneous graph with the same schema as the training graph."""
+    rng = np.random.default_rng(seed)
+    company_ids = np.array([f'IN-TRV-{i:07d}' for i in range(n_companies)])
+
+    features_df = pd.DataFrame(
+        rng.normal(size=(n_companies, n_features)).astype(np.float32),
+        columns=[f'f{i}' for i in range(n_features)]
+    )
+    features_df.insert(0, 'company_id', company_ids)
+
+    n_bookings = n_companies * bookings_per_company
+    df3 = pd.DataFrame({
+        'company_id': rng.choice(company_ids, n_bookings),
+        'device_fingerprint': rng.integers(0, max(1, n_companies // 2), n_bookings),
+        'payment_method_id': rng.integers(0, max(1, n_companies // 3), n_bookings),
+        'ip_address': rng.integers(0, n_companies, n_bookings),
+    })
+
+    data = GraphBuilder(df3, features_df).build()
+    data['company'].y = torch.from_numpy((rng.random(n_companies) < 0.1).astype(np.float32))
+    return data
+
+def bench_profile(data, threads, bf16, use_compile, epochs, inference_runs, hidden_dims):
+    configure_torch_cpu({'num_threads': threads})
+    torch.manual_seed(0)
+
+    num_nodes_dict = {nt: data[nt].num_nodes for nt in data.node_types}
+    model = HeteroGNN(data.metadata(), hidden_dims=hidden_dims, out_channels=1, num_nodes_dict=num_nodes_dict)
+
+    n_companies = data['company'].num_nodes
+    perm = torch.randperm(n_companies)
+    train_mask, val_mask = perm[:int(0.7 * n_companies)], perm[int(0.7 * n_companies):int(0.85 * n_companies)]
+
+    # One evaluation at the end, no early stopping: we only want step timings
+    trainer = GNNTrainer(model, {'epochs': epochs, 'eval_every': epochs, 'early_stopping_patience': epochs + 1},
+                         runtime={'compile': use_compile, 'bf16': bf16})
+    trainer.fit(data, train_mask, val_mask)
+    # Skip the first step (lazy init / compilation warm-up)
+    train_times = [r['train_s'] for r in trainer.history[1:]] or [trainer.history[0]['train_s']]
+
+    total_nodes = sum(num_nodes_dict.values())
+    infer_times = []
+    with torch.inference_mode(), autocast(bf16):
+        trainer.forward_model(data.x_dict, data.edge_index_dict)
+        for _ in range(inference_runs):
+            start = time.perf_counter()
+            trainer.forward_model(data.x_dict, data.edge_index_dict)
+            infer_times.append(time.perf_counter() - start)
+
+    return {
+        'threads': torch.get_num_threads(),
+        'bf16': bf16,
+        'compile': use_compile,
+        'epochs_per_sec': float(1.0 / np.median(train_times)),
+        'train_step_ms': float(np.median(train_times) * 1000),
+        'inference_ms': float(np.median(infer_times) * 1000),
+        'nodes_per_sec': float(total_nodes / np.median(infer_times)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--features', type=int, default=100)
+    parser.add_argument('--bookings-per-company', type=int, default=10)
+    parser.add_argument('--hidden-dims', type=int, nargs='+', default=[64, 32])
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--inference-runs', type=int, default=10)
+    parser.add_argument('--threads', type=int, nargs='+', default=[available_cores()])
+    parser.add_argument('--bf16', action='store_true', help='Also benchmark bfloat16 autocast')
+    parser.add_argument('--compile', action='store_true', help='Also benchmark torch.compile')
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    data = make_graph(args.companies, args.features, args.bookings_per_company)
+    graph = {nt: data[nt].num_nodes for nt in data.node_types}
+    graph['edges'] = sum(data[et].edge_index.size(1) for et in data.edge_types)
+
+    variants = [(False, False)]
+    if args.bf16:
+        variants.append((True, False))
+    if args.compile:
+        variants.append((False, True))
+
+    results = []
+    for threads in args.threads:
+        for bf16, use_compile in variants:
+            result = bench_profile(data, threads, bf16, use_compile, args.epochs, args.inference_runs, args.hidden_dims)
+            results.append(result)
+            print(f"threads={result['threads']:<3} bf16={bf16!s:<5} compile={use_compile!s:<5} "
+                  f"{result['epochs_per_sec']:8.2f} epochs/s  {result['nodes_per_sec']:12,.0f} nodes/s")
+
+    report = {'graph': graph, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
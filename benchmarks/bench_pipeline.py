@@ -0,0 +1,256 @@
+"""
+Benchmark the training pipeline components on synthetic data at production scale.
+
+For each scale, generates seeded DS1/DS2/DS3 (src/synthetic_data.py), writes them
+as CSV, and times load_datasets, engineer_features, GraphBuilder.build, ensemble
+train/predict and the Cox fit with the pipeline profiler (wall, CPU, peak RSS).
+MetaAgent.process_booking_request is timed once on the mock booking request: it
+serves from the saved models in models/ and calls the LLM agents, so it needs the
+agents' dependencies and GOOGLE_API_KEY, and is reported as skipped without them.
+
+Results are written as JSON with sorted keys, one entry per component and scale,
+so runs can be diffed against each other.
+
+Usage:
+    python benchmarks/bench_pipeline.py --companies 1000 10000 100000 --output reports/bench_pipeline.json
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from argparse import Namespace
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+logger = logging.getLogger('aerox_logger')
+
+COMPONENTS = ['generate', 'write_csv', 'load_datasets', 'engineer_features', 'graph_build',
+              'ensemble_train', 'ensemble_predict', 'cox_fit', 'meta_agent']
+
+def summarize(records):
+    """Median wall/CPU time over the repeats, worst peak RSS."""
+    wall = [r['wall_s'] for r in records]
+    return {
+        'status': 'ok',
+        'repeats': len(records),
+        'rows': records[-1]['rows'],
+        'wall_s': round(float(np.median(wall)), 4),
+        'wall_s_min': round(min(wall), 4),
+        'cpu_s': round(float(np.median([r['cpu_s'] for r in records])), 4),
+        'peak_rss_mb': round(max(r['peak_rss_mb'] for r in records), 1),
+    }
+
+def run_steps(steps, profiler, components, repeats, base):
+    """
+    Run (name, needs, fn) steps in order; fn returns the rows it processed.
+
+    Steps not in `components` run once as setup and are not reported. A step whose
+    prerequisite failed or was skipped is reported as skipped.
+    """
+    results, done = [], set()
+    for name, needs, fn in steps:
+        entry = {'benchmark': name, **base}
+        if needs and needs not in done:
+            if name in components:
+                results.append({**entry, 'status': 'skipped', 'reason': f"{needs} did not run"})
+            continue
+        records = []
+        try:
+            for _ in range(repeats if name in components else 1):
+                with profiler.section(name) as record:
+                    record['rows'] = fn()
+                records.append(record)
+        except Exception as e:
+            logger.error(f"{name} failed: {e}", exc_info=True)
+            if name in components:
+                results.append({**entry, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+            continue
+        done.add(name)
+        if name in components:
+            results.append({**entry, **summarize(records)})
+    return results
+
+def bench_scale(companies, args, config, data_dir):
+    import train_pipeline
+    from src.synthetic_data import generate_datasets, write_datasets
+    from src.data_loader import load_datasets, validate_data_quality
+    from src.feature_engineering import engineer_features
+    from src.survival_data import prepare_survival_data
+    from src.intent_model import EnsembleIntentModel
+    from src.capacity_model import CapacityModel
+    from src.profiling import PipelineProfiler
+
+    transactions = companies * args.transactions_per_company
+    # split/scaling are setup here: keep their sections out of the results
+    train_pipeline.profiler = PipelineProfiler()
+    intent_cfg = {**config['intent_model'], 'tune_hyperparams': False, 'binned_cache_dir': None}
+    cap_cfg = config['capacity_model']
+    state = {}
+
+    def generate():
+        state['generated'] = generate_datasets(companies, transactions, seed=args.seed)
+        return companies + 2 * transactions
+
+    def write_csv():
+        state['data_cfg'] = write_datasets(*state['generated'], data_dir)
+        return companies + 2 * transactions
+
+    def load():
+        state.pop('generated', None)  # free the in-memory copy before reading the CSVs back
+        state['df1'], state['df2'], state['df3'] = load_datasets({'data': state['data_cfg']})
+        return companies + 2 * transactions
+
+    def validate():
+        state['df1'] = validate_data_quality(state['df1'], state['df2'], state['df3'])
+        return companies
+
+    def features():
+        state['features_df'] = engineer_features(state['df1'], state['df2'], state['df3'], config)
+        return len(state['features_df'])
+
+    def split_and_scale():
+        flags = Namespace(warm_start=False)
+        state.update(train_pipeline.stage_split(state, config, flags))
+        state.update(train_pipeline.stage_scaling(state, config, flags))
+        return len(state['X'])
+
+    def graph():
+        from src.graph_builder import GraphBuilder
+        GraphBuilder(state['df3'], train_pipeline.scaled_frame(state)).build()
+        return transactions
+
+    def ensemble_train():
+        X_train, X_val, _ = train_pipeline.split_views(state)
+        labels = state['labels']
+        state['intent_model'] = EnsembleIntentModel(intent_cfg)
+        state['intent_model'].train(X_train, labels.iloc[state['train_idx']].values.astype(int),
+                                    X_val, labels.iloc[state['val_idx']].values.astype(int))
+        return len(X_train)
+
+    def ensemble_predict():
+        state['intent_scores'] = state['intent_model'].predict(state['X'])
+        return len(state['X'])
+
+    def survival_data():
+        frame = train_pipeline.scaled_frame(state)
+        if 'intent_scores' in state:
+            frame['intent_score'] = state['intent_scores']
+        survival_df = prepare_survival_data(state['df1'], state['df2'], frame)
+        state['cox_train'] = survival_df[survival_df['company_id'].isin(state['train_ids'])].drop(columns=['company_id'])
+        return len(state['cox_train'])
+
+    def cox_fit():
+        CapacityModel(penalizer=cap_cfg['penalizer'], l1_ratio=cap_cfg.get('l1_ratio', 0.0),
+                      solver=cap_cfg.get('solver', 'lifelines'), pruning=cap_cfg.get('pruning')).fit(state['cox_train'])
+        return len(state['cox_train'])
+
+    steps = [
+        ('generate', None, generate),
+        ('write_csv', 'generate', write_csv),
+        ('load_datasets', 'write_csv', load),
+        ('validate', 'load_datasets', validate),
+        ('engineer_features', 'validate', features),
+        ('split_and_scale', 'engineer_features', split_and_scale),
+        ('graph_build', 'split_and_scale', graph),
+        ('ensemble_train', 'split_and_scale', ensemble_train),
+        ('ensemble_predict', 'ensemble_train', ensemble_predict),
+        ('survival_data', 'split_and_scale', survival_data),
+        ('cox_fit', 'survival_data', cox_fit),
+    ]
+    base = {'companies': companies, 'transactions': transactions}
+    return run_steps(steps, PipelineProfiler(), args.components, args.repeats, base)
+
+def bench_meta_agent(args):
+    from src.profiling import PipelineProfiler
+
+    state = {}
+
+    def setup():
+        if not os.getenv('GOOGLE_API_KEY'):
+            raise RuntimeError("GOOGLE_API_KEY is not set")
+        from agents.meta_agent import MetaAgent
+        from agents.config import MOCK_BOOKING_REQUEST
+        state['agent'], state['request'] = MetaAgent(), MOCK_BOOKING_REQUEST
+
+    def process():
+        state['agent'].process_booking_request(copy.deepcopy(state['request']))
+        return 1
+
+    base = {'companies': None, 'transactions': None}
+    try:
+        setup()
+    except Exception as e:
+        # Missing optional dependencies or credentials: not a benchmark failure
+        return [{'benchmark': 'meta_agent', **base, 'status': 'skipped', 'reason': f"{type(e).__name__}: {e}"}]
+    return run_steps([('meta_agent', None, process)], PipelineProfiler(), args.components, args.repeats, base)
+
+def environment():
+    import pandas as pd
+    import sklearn
+    import lightgbm
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'lightgbm': lightgbm.__version__,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--transactions-per-company', type=int, default=8)
+    parser.add_argument('--components', nargs='+', choices=COMPONENTS, default=COMPONENTS)
+    parser.add_argument('--repeats', type=int, default=1, help="Timed runs per component (median reported)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--config', type=str, default=str(ROOT / 'configs' / 'config.yaml'))
+    parser.add_argument('--data-dir', type=str, default=None,
+                        help="Keep the generated CSVs under <data-dir>/<companies>/ (default: temporary directory)")
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    from src.utils import setup_logger, load_config, set_seed
+    setup_logger()
+    config = load_config(args.config)
+    set_seed(args.seed)
+
+    results = []
+    for companies in args.companies:
+        logger.info(f"Benchmarking {companies} companies")
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(args.data_dir) / str(companies) if args.data_dir else Path(tmp)
+            results.extend(bench_scale(companies, args, config, data_dir))
+    if 'meta_agent' in args.components:
+        results.extend(bench_meta_agent(args))
+
+    for r in results:
+        scale = f"{r['companies']:>9}" if r['companies'] is not None else f"{'-':>9}"
+        if r['status'] == 'ok':
+            print(f"{r['benchmark']:<18} {scale} companies: {r['wall_s']:9.3f}s wall  {r['cpu_s']:9.3f}s CPU  "
+                  f"peak RSS {r['peak_rss_mb']:8.0f} MB")
+        else:
+            print(f"{r['benchmark']:<18} {scale} companies: {r['status']} ({r.get('reason') or r.get('error')})")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            'environment': environment(),
+            'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True, default=str)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark class rebalancing modes for the intent models.
+
+Each mode trains in a fresh process so peak memory is measured in isolation.
+Reports training time, peak RSS growth during training, ROC-AUC, and recall /
+precision on a held-out test set at the F2-optimal validation threshold.
+
+Usage:
+    python benchmarks/bench_rebalancing.py --rows 200000 --model ensemble
+"""
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.metrics import roc_auc_score, recall_score, precision_score
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+MODES = ['smote', 'sample_weight', 'undersample', 'focal']
+
+def current_rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024 ** 2
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def make_data(rows, features, positive_rate, seed=42):
+    X, y = make_classification(
+        n_samples=rows, n_features=features, n_informative=features // 2,
+        weights=[1 - positive_rate], flip_y=0.01, random_state=seed
+    )
+    X = X.astype(np.float32)
+    n_train, n_val = int(rows * 0.7), int(rows * 0.15)
+    return (X[:n_train], y[:n_train]), (X[n_train:n_train + n_val], y[n_train:n_train + n_val]), (X[n_train + n_val:], y[n_train + n_val:])
+
+def run_mode(mode, model_type, data_args, queue):
+    from src.intent_model import LightGBMIntentModel, EnsembleIntentModel
+    from src.evaluate import find_optimal_threshold
+
+    (X_train, y_train), (X_val, y_val), (X_test, y_test) = make_data(*data_args)
+    config = {'rebalance': mode, 'tune_hyperparams': False, 'random_seed': 42}
+    model = EnsembleIntentModel(config) if model_type == 'ensemble' else LightGBMIntentModel(config)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    model.train(X_train, y_train, X_val, y_val)
+    train_time = time.perf_counter() - start
+    peak_growth = peak_rss_mb() - rss_before
+
+    threshold = find_optimal_threshold(y_val, model.predict(X_val), mode='f2')
+    test_probs = model.predict(X_test)
+    test_pred = (test_probs >= threshold).astype(int)
+
+    queue.put({
+        'mode': mode,
+        'train_s': train_time,
+        'peak_rss_growth_mb': peak_growth,
+        'roc_auc': float(roc_auc_score(y_test, test_probs)),
+        'recall': float(recall_score(y_test, test_pred, zero_division=0)),
+        'precision': float(precision_score(y_test, test_pred, zero_division=0)),
+        'threshold': threshold,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--features', type=int, default=100)
+    parser.add_argument('--positive-rate', type=float, default=0.05)
+    parser.add_argument('--model', choices=['lightgbm', 'ensemble'], default='lightgbm')
+    parser.add_argument('--modes', nargs='+', default=MODES)
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    ctx = mp.get_context('spawn')
+    data_args = (args.rows, args.features, args.positive_rate)
+    results = []
+    for mode in args.modes:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_mode, args=(mode, args.model, data_args, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        results.append(result)
+        print(f"{mode:<14} {result['train_s']:8.1f}s  peak +{result['peak_rss_growth_mb']:8.1f}MB  "
+              f"AUC {result['roc_auc']:.4f}  recall {result['recall']:.4f}  precision {result['precision']:.4f}")
+
+    report = {'rows': args.rows, 'features': args.features, 'positive_rate': args.positive_rate,
+              'model': args.model, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
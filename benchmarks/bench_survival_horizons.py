@@ -0,0 +1,81 @@
+"""
+Benchmark CapacityModel.predict_horizons against lifelines' predict_survival_function.
+
+Fits a Cox model on synthetic survival data, then scores batches of 1, 1k and 1M
+companies at the horizon grid. Reports latency of both paths (median over repeats
+for small batches) and the largest absolute difference in survival probability.
+
+Usage:
+    python benchmarks/bench_survival_horizons.py --features 40 --solver lifelines
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+HORIZONS = [7, 14, 30, 90]
+
+def make_data(rows, features, seed=42):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    beta = rng.normal(scale=0.3, size=features) * (rng.random(features) < 0.5)
+    T = rng.exponential(scale=60 * np.exp(-X @ beta))
+    C = rng.exponential(scale=90, size=rows)
+    df = pd.DataFrame(X, columns=[f'x{i}' for i in range(features)])
+    df['T'] = np.ceil(np.minimum(T, C))
+    df['E'] = (T <= C).astype(int)
+    return df
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, float(np.median(times))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=5000)
+    parser.add_argument('--features', type=int, default=40)
+    parser.add_argument('--solver', choices=['lifelines', 'coxnet'], default='lifelines')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 1000, 1000000])
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    from src.capacity_model import CapacityModel
+
+    train = make_data(args.train_rows, args.features)
+    model = CapacityModel(penalizer=0.1, solver=args.solver)
+    model.cph.fit(train, duration_col='T', event_col='E')
+
+    results = []
+    for rows in args.batches:
+        X = make_data(rows, args.features, seed=rows).drop(columns=['T', 'E'])
+        repeats = 50 if rows <= 1000 else 3
+        model._scoring = None
+        model.predict_horizons(X.iloc[:1], HORIZONS)  # build the cache outside the timing
+        fast, fast_s = timed(lambda: model.predict_horizons(X, HORIZONS), repeats)
+        reference, ref_s = timed(lambda: model.cph.predict_survival_function(X, times=HORIZONS).T.to_numpy(), repeats)
+        results.append({
+            'rows': rows,
+            'predict_horizons_ms': fast_s * 1000,
+            'lifelines_ms': ref_s * 1000,
+            'speedup': ref_s / fast_s,
+            'max_abs_diff': float(np.max(np.abs(fast - reference))),
+        })
+        print(f"{rows:>9} rows: predict_horizons {fast_s * 1000:10.3f}ms  lifelines {ref_s * 1000:10.3f}ms  "
+              f"({ref_s / fast_s:6.1f}x)  max |diff| {results[-1]['max_abs_diff']:.2e}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
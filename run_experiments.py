@@ -0,0 +1,206 @@
+"""
+Run train_pipeline.py over a grid of config overrides and compare the results.
+
+The data, features, split and scaling stages run once with the base config and are
+checkpointed; every grid point then runs the intent, capacity and report stages in
+its own process, pinned to its own cores, with its models and evaluation.json under
+<output-dir>/<job>/. All reports are collected into one comparison table.
+
+Usage:
+    python run_experiments.py \
+        --set intent_model.type=lightgbm,ensemble \
+        --set intent_model.rebalance=smote,sample_weight \
+        --set intent_model.threshold_mode=f2,f05 \
+        --jobs 4
+"""
+import argparse
+import copy
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.utils import setup_logger, load_config, set_seed
+from src.torch_runtime import available_cores
+from src.profiling import PipelineProfiler
+import train_pipeline
+
+logger = logging.getLogger('aerox_logger')
+
+SHARED_STAGES = ['data', 'features', 'split', 'scaling']
+# Config sections the shared stages read: a grid over them would need its own features/split
+SHARED_KEYS = [key for stage in SHARED_STAGES for key in train_pipeline.STAGE_CONFIG_KEYS[stage] if not key.startswith('--')]
+REPORT_METRICS = {
+    'intent_model': ['roc_auc', 'pr_auc', 'recall', 'precision', 'f2_score', 'threshold_used'],
+    'capacity_model': ['c_index'],
+}
+
+def parse_grid(assignments, grid_file=None, config=None):
+    """
+    {dotted key: [values]} from `key=v1,v2` strings (values parsed as YAML) and an optional YAML file.
+
+    With the base `config`, also rejects overrides the config would ignore.
+    """
+    grid = {}
+    if grid_file:
+        with open(grid_file) as f:
+            grid.update({key: list(values) for key, values in yaml.safe_load(f).items()})
+    for assignment in assignments:
+        key, _, values = assignment.partition('=')
+        if not values:
+            raise ValueError(f"Expected key=value[,value...], got '{assignment}'")
+        grid[key.strip()] = [yaml.safe_load(v) for v in values.split(',')]
+    for key in grid:
+        if any(key == shared or key.startswith(shared + '.') for shared in SHARED_KEYS):
+            raise ValueError(f"'{key}' affects the shared data/feature stages and cannot be varied")
+    rebalance_set = 'intent_model.rebalance' in grid or (config or {}).get('intent_model', {}).get('rebalance') is not None
+    if 'intent_model.use_smote' in grid and rebalance_set:
+        # get_rebalance_mode only reads the legacy flag when `rebalance` is unset
+        raise ValueError("'intent_model.use_smote' has no effect while intent_model.rebalance is set: vary intent_model.rebalance instead")
+    return grid
+
+def set_dotted(config, key, value):
+    node = config
+    *parents, leaf = key.split('.')
+    for part in parents:
+        node = node.setdefault(part, {})
+    node[leaf] = value
+
+def job_name(index, overrides):
+    """Unique, filesystem-safe job (and directory) name: grid index plus the sanitised overrides."""
+    label = '__'.join(f"{key}={value}" for key, value in overrides.items()) or 'base'
+    return f"{index:03d}_" + re.sub(r'[^A-Za-z0-9._=,-]+', '-', label)[:100]
+
+def cpu_budget_config(config, cpus):
+    """Cap every process/thread count in the config at `cpus`."""
+    config = copy.deepcopy(config)
+    n_jobs = config['intent_model'].get('n_jobs', -1)
+    set_dotted(config, 'intent_model.n_jobs', cpus if n_jobs == -1 else min(n_jobs, cpus))
+    set_dotted(config, 'intent_model.tuning.n_jobs', min(config['intent_model'].get('tuning', {}).get('n_jobs', 1) or 1, cpus))
+    set_dotted(config, 'capacity_model.penalizer_search.n_jobs', cpus)
+    set_dotted(config, 'evaluation.bootstrap.n_jobs', cpus)
+    set_dotted(config, 'torch_runtime.num_threads', cpus)
+    return config
+
+def pin_worker(core_slots):
+    """Pool initializer: take a free set of cores for this worker process."""
+    cores = core_slots.get()
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+def run_job(name, config, overrides, shared_dir, job_dir):
+    """One grid point: intent, capacity and report stages in this (pinned) worker process."""
+    start = time.perf_counter()
+    job_dir = Path(job_dir).resolve()
+    for sub in ['models', 'reports']:
+        (job_dir / sub).mkdir(parents=True, exist_ok=True)
+    # Stages write models/ and reports/ relative to the working directory
+    os.chdir(job_dir)
+    setup_logger(log_file=str(job_dir / 'aerox_training.log'))
+    logger.info(f"Experiment {name}: {overrides} on {available_cores()} cores")
+
+    from threadpoolctl import threadpool_limits
+    with threadpool_limits(limits=available_cores()):
+        try:
+            set_seed(config['data']['random_seed'])
+            train_pipeline.profiler = PipelineProfiler(profile_dir=config.get('pipeline', {}).get('profile_dir') and str(job_dir / 'profiles'))
+            args = Namespace(warm_start=False)
+            state = train_pipeline.load_checkpoints(SHARED_STAGES, shared_dir, config, args)
+            for stage_name, stage in train_pipeline.STAGES[len(SHARED_STAGES):]:
+                state.update(stage(state, config, args))
+            with open(job_dir / 'reports' / 'evaluation.json') as f:
+                report, error = json.load(f), None
+        except Exception as e:
+            logger.error(f"Experiment {name} failed: {e}", exc_info=True)
+            report, error = None, f"{type(e).__name__}: {e}"
+    return {'job': name, 'overrides': overrides, 'report': report, 'error': error, 'seconds': time.perf_counter() - start}
+
+def comparison_table(results):
+    rows = []
+    for result in results:
+        row = {'job': result['job'], **result['overrides'], 'seconds': round(result['seconds'], 1)}
+        for section, metrics in REPORT_METRICS.items():
+            values = (result['report'] or {}).get(section, {})
+            row.update({f"{section.split('_')[0]}_{metric}": values.get(metric) for metric in metrics})
+        row['error'] = result['error']
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--set', dest='assignments', action='append', default=[], metavar='KEY=V1,V2',
+                        help="Dotted config key and the values to try (repeatable; the grid is their product)")
+    parser.add_argument('--grid-file', type=str, default=None, help="YAML mapping of dotted keys to lists of values")
+    parser.add_argument('--config', type=str, default='configs/config.yaml')
+    parser.add_argument('--jobs', type=int, default=1, help="Experiments run concurrently")
+    parser.add_argument('--cpus-per-job', type=int, default=None, help="Cores per experiment (default: cores / jobs)")
+    parser.add_argument('--output-dir', type=str, default='reports/experiments')
+    args = parser.parse_args()
+
+    setup_logger()
+    base_config = load_config(args.config)
+    grid = parse_grid(args.assignments, args.grid_file, base_config)
+    keys = list(grid)
+    grid_points = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    output_dir = Path(args.output_dir).resolve()
+
+    # Shared stages once, checkpointed for every job
+    shared_dir = output_dir / 'shared'
+    shared_args = Namespace(warm_start=False)
+    set_seed(base_config['data']['random_seed'])
+    state = {}
+    for name, stage in train_pipeline.STAGES[:len(SHARED_STAGES)]:
+        outputs = stage(state, base_config, shared_args)
+        state.update(outputs)
+        train_pipeline.save_checkpoint(name, outputs, shared_dir, base_config, shared_args)
+    del state
+
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(available_cores()))
+    jobs = max(1, min(args.jobs, len(grid_points)))
+    cpus = args.cpus_per_job or max(1, len(cores) // jobs)
+    logger.info(f"Running {len(grid_points)} experiments, {jobs} at a time with {cpus} cores each")
+
+    # One core set per worker process, disjoint when there are enough cores
+    context = get_context('spawn')
+    core_slots = context.Queue()
+    for slot in range(jobs):
+        core_slots.put(cores[slot * cpus:(slot + 1) * cpus] or cores)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=pin_worker, initargs=(core_slots,)) as pool:
+        futures = []
+        for index, overrides in enumerate(grid_points):
+            config = copy.deepcopy(base_config)
+            for key, value in overrides.items():
+                set_dotted(config, key, value)
+            config = cpu_budget_config(config, cpus)
+            name = job_name(index, overrides)
+            futures.append(pool.submit(run_job, name, config, overrides, str(shared_dir), str(output_dir / name)))
+        for future in as_completed(futures):
+            result = future.result()
+            status = 'failed: ' + result['error'] if result['error'] else 'done'
+            logger.info(f"Experiment {result['job']} {status} in {result['seconds']:.1f}s")
+            results.append(result)
+
+    results.sort(key=lambda r: int(r['job'].split('_', 1)[0]))  # names start with the grid index
+    table = comparison_table(results)
+    table.to_csv(output_dir / 'comparison.csv', index=False)
+    with open(output_dir / 'results.json', 'w') as f:
+        json.dump(results, f, indent=4, default=str)
+    print(table.to_string(index=False))
+    logger.info(f"Comparison saved to {output_dir / 'comparison.csv'}")
+
+if __name__ == '__main__':
+    main()
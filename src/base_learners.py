@@ -0,0 +1,168 @@
+import time
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.tuning import compute_scale_pos_weight
+from src.rebalancing import rebalance, negative_subsample_bags, BaggedBooster
+from src.focal_loss import FocalLoss, SigmoidBooster
+
+# Base learner fitting for EnsembleIntentModel. Kept free of torch imports so
+# stacking folds can run in lightweight worker processes.
+
+logger = logging.getLogger(__name__)
+
+def fit_base_learners(X_train, y_train, X_val, y_val, settings, binned=None, persist=False):
+    """
+    Fit the LightGBM and XGBoost base learners on one training set.
+
+    With `binned` (a BinnedDataCache) the boosters train on its binned datasets. With
+    `persist` (the full refit) and a training set the rebalancing leaves as is, the
+    LightGBM bins go through the cache's files: a worker process, or a later retrain on
+    the same split, loads the tuning set's bins instead of re-binning.
+
+    Returns:
+        (models, timings): boosters by name, and fit seconds per learner plus 'wall'.
+    """
+    if binned is not None:
+        binned.nthread = settings['num_threads']
+    if settings['rebalance'] == 'undersample':
+        bags, sampling_rate = negative_subsample_bags(
+            y_train, settings['undersample_bags'], settings['undersample_ratio'], settings['random_seed']
+        )
+        bagged = [_fit_boosters(X_train[idx], y_train[idx], None, X_val, y_val, settings, binned) for idx in bags]
+        # Every bag has the same class counts, so the same scale_pos_weight (see _booster_params)
+        pos_weight = compute_scale_pos_weight(y_train[bags[0]]) * settings['recall_weight']
+        models = {name: BaggedBooster([m[name] for m, _ in bagged], sampling_rate, pos_weight) for name in ('lgb', 'xgb')}
+        timings = {key: sum(t[key] for _, t in bagged) for key in ('lgb', 'xgb', 'wall')}
+        return models, timings
+    
+    X_fit, y_fit, sample_weight = rebalance(X_train, y_train, settings['rebalance'], settings['random_seed'])
+    persist = persist and X_fit is X_train and sample_weight is None
+    return _fit_boosters(X_fit, y_fit, sample_weight, X_val, y_val, settings, binned, persist)
+
+def split_threads(num_threads):
+    """Partition cores between LightGBM and XGBoost when they train side by side."""
+    lgb_threads = max(1, (num_threads + 1) // 2)
+    return lgb_threads, max(1, num_threads - lgb_threads)
+
+def _booster_params(y_train, sample_weight, settings):
+    # Calculate class weights, increasing positive weight to boost recall
+    scale_pos_weight = compute_scale_pos_weight(y_train, sample_weight) * settings['recall_weight']
+    
+    lgb_params = {**settings['lgb_params'], 'scale_pos_weight': scale_pos_weight}
+    xgb_params = {**settings['xgb_params'], 'scale_pos_weight': scale_pos_weight}
+    objective = None
+    if settings['rebalance'] == 'focal':
+        # Custom objectives ignore scale_pos_weight, so the class weight moves into the loss
+        objective = FocalLoss(settings['focal_gamma'], pos_weight=scale_pos_weight)
+        lgb_params['objective'] = objective
+        del lgb_params['scale_pos_weight'], xgb_params['scale_pos_weight']
+    return lgb_params, xgb_params, objective
+
+def _fit_boosters(X_train, y_train, sample_weight, X_val, y_val, settings, binned=None, persist=False):
+    lgb_params, xgb_params, objective = _booster_params(y_train, sample_weight, settings)
+    data = (X_train, y_train, sample_weight, X_val, y_val)
+
+    start = time.perf_counter()
+    if settings['parallel_learners'] and settings['num_threads'] > 1:
+        # Both boosters release the GIL, so threads give true concurrency
+        lgb_params['num_threads'], xgb_params['nthread'] = split_threads(settings['num_threads'])
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            lgb_future = pool.submit(_fit_lgb, *data, lgb_params, settings['lgb_rounds'], binned=binned, persist=persist)
+            xgb_future = pool.submit(_fit_xgb, *data, xgb_params, settings['xgb_rounds'], objective, binned=binned)
+            lgb_model, lgb_time = lgb_future.result()
+            xgb_model, xgb_time = xgb_future.result()
+    else:
+        lgb_model, lgb_time = _fit_lgb(*data, lgb_params, settings['lgb_rounds'], binned=binned, persist=persist)
+        xgb_model, xgb_time = _fit_xgb(*data, xgb_params, settings['xgb_rounds'], objective, binned=binned)
+    timings = {'lgb': lgb_time, 'xgb': xgb_time, 'wall': time.perf_counter() - start}
+
+    if objective is not None:
+        lgb_model = SigmoidBooster(lgb_model)
+    return {'lgb': lgb_model, 'xgb': xgb_model}, timings
+
+def continue_base_learners(models, X_train, y_train, X_val, y_val, settings, num_rounds, binned=None):
+    """
+    Warm start: continue boosting existing LightGBM/XGBoost base learners for up to
+    `num_rounds` more rounds on new rows (no resampling; class weights as in a full fit).
+    XGBoost trains on `binned` matrices when given.
+
+    Returns:
+        (models, timings) like fit_base_learners.
+    """
+    lgb_params, xgb_params, objective = _booster_params(y_train, None, settings)
+    lgb_init = models['lgb'].booster if isinstance(models['lgb'], SigmoidBooster) else models['lgb']
+
+    start = time.perf_counter()
+    # LightGBM scores the init model on the raw rows, which binned datasets have freed
+    lgb_model, lgb_time = _fit_lgb(X_train, y_train, None, X_val, y_val, lgb_params, num_rounds, init_model=lgb_init)
+    xgb_model, xgb_time = _fit_xgb(X_train, y_train, None, X_val, y_val, xgb_params, num_rounds, objective,
+                                   init_model=models['xgb'], binned=binned)
+    timings = {'lgb': lgb_time, 'xgb': xgb_time, 'wall': time.perf_counter() - start}
+
+    if objective is not None:
+        lgb_model = SigmoidBooster(lgb_model)
+    return {'lgb': lgb_model, 'xgb': xgb_model}, timings
+
+def _fit_lgb(X_train, y_train, sample_weight, X_val, y_val, params, num_rounds, init_model=None, binned=None, persist=False):
+    start = time.perf_counter()
+    if binned is not None:
+        train_data = binned.lgb_dataset(X_train, y_train, sample_weight, persist=persist)
+        val_data = binned.lgb_dataset(X_val, y_val, reference=train_data)
+    else:
+        train_data = lgb.Dataset(X_train, label=y_train, weight=sample_weight)
+        val_data = lgb.Dataset(X_val, label=y_val, reference=train_data)
+    model = lgb.train(
+        params,
+        train_data,
+        num_boost_round=num_rounds,
+        init_model=init_model,
+        valid_sets=[val_data],
+        callbacks=[
+            lgb.early_stopping(stopping_rounds=30, verbose=False),
+            lgb.log_evaluation(period=0)
+        ]
+    )
+    return model, time.perf_counter() - start
+
+def _fit_xgb(X_train, y_train, sample_weight, X_val, y_val, params, num_rounds, objective=None, init_model=None, binned=None):
+    start = time.perf_counter()
+    if binned is not None:
+        # QuantileDMatrix training must use the matrices' max_bin
+        params = {**params, 'max_bin': binned.max_bin}
+        dtrain = binned.xgb_matrix(X_train, y_train, sample_weight)
+        dval = binned.xgb_matrix(X_val, y_val, ref=dtrain)
+    else:
+        dtrain = xgb.DMatrix(X_train, label=y_train, weight=sample_weight, nthread=params.get('nthread'))
+        dval = xgb.DMatrix(X_val, label=y_val, nthread=params.get('nthread'))
+    model = xgb.train(
+        params,
+        dtrain,
+        num_boost_round=num_rounds,
+        evals=[(dval, 'val')],
+        obj=objective,
+        xgb_model=init_model,
+        early_stopping_rounds=30,
+        verbose_eval=False
+    )
+    return model, time.perf_counter() - start
+
+def fit_fold(X_train, y_train, train_idx, holdout_idx, X_val, y_val, settings, binned=None):
+    """Fit base learners on one stacking fold; return out-of-fold predictions and fit timings."""
+    models, timings = fit_base_learners(X_train[train_idx], y_train[train_idx], X_val, y_val, settings, binned)
+    return base_predictions(models, X_train[holdout_idx]), timings
+
+def base_predictions(models, X):
+    """Stack base model predictions column-wise (LightGBM, XGBoost)."""
+    preds = []
+    
+    # LightGBM
+    preds.append(models['lgb'].predict(X))
+    
+    # XGBoost
+    dmatrix = xgb.DMatrix(X)
+    preds.append(models['xgb'].predict(dmatrix))
+    
+    return np.column_stack(preds)
@@ -0,0 +1,109 @@
+import os
+import hashlib
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BinnedDataCache:
+    """
+    Histogram-binned training data, built once per split and reused.
+
+    LightGBM datasets are constructed (binned) once and held in memory. Datasets
+    requested with `persist=True` (the tuning training set, which every trial, every
+    tuning worker process and a rerun on the same data reuse) are also saved to
+    `cache_dir` with `save_binary`, so those load the bins instead of re-binning.
+    At most `max_files` binary files are kept; the least recently used are removed.
+    XGBoost data is held as QuantileDMatrix (bins only, no raw copy); these cannot be
+    serialized, so they are cached in memory only.
+
+    Entries are keyed by a digest of the data (and of the reference dataset for
+    validation sets), so a changed split never picks up stale bins. Validation data
+    must be binned against its training set: pass that as `reference`.
+    """
+
+    def __init__(self, cache_dir=None, max_bin=255, nthread=None, max_files=4):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self.max_bin = max_bin
+        self.nthread = nthread
+        self._entries = {}
+        self._digests = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # Native handles do not pickle; worker processes reload from cache_dir
+        state = self.__dict__.copy()
+        state['_entries'], state['_digests'] = {}, {}
+        return state
+
+    @property
+    def lgb_params(self):
+        """Dataset params that must match between binning and training."""
+        # feature_pre_filter depends on min_child_samples, which tuning varies
+        return {'max_bin': self.max_bin, 'feature_pre_filter': False, 'verbose': -1}
+
+    def lgb_dataset(self, X, y, weight=None, reference=None, persist=False):
+        """Constructed lgb.Dataset; with `persist`, loaded from / saved to `cache_dir`."""
+        digest = self._digest('lgb', X, y, weight, reference)
+        if digest in self._entries:
+            return self._entries[digest]
+
+        path = os.path.join(self.cache_dir, f'lgb-{digest}.bin') if self.cache_dir and persist else None
+        if path and os.path.exists(path):
+            dataset = lgb.Dataset(path, reference=reference, params=self.lgb_params).construct()
+            os.utime(path)
+            logger.info(f"Loaded binned LightGBM dataset {path}")
+        else:
+            dataset = lgb.Dataset(X, label=y, weight=weight, reference=reference, params=self.lgb_params).construct()
+            if path:
+                # Write under a private name and rename, so a concurrent reader never sees a partial file
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                dataset.save_binary(tmp_path)
+                os.replace(tmp_path, path)
+                logger.info(f"Saved binned LightGBM dataset {path}")
+                self._evict()
+
+        return self._store(digest, dataset)
+
+    def xgb_matrix(self, X, y, weight=None, ref=None):
+        """QuantileDMatrix for XGBoost; validation sets share the cuts of `ref`."""
+        digest = self._digest('xgb', X, y, weight, ref)
+        if digest not in self._entries:
+            matrix = xgb.QuantileDMatrix(X, label=y, weight=weight, ref=ref, max_bin=self.max_bin, nthread=self.nthread)
+            self._store(digest, matrix)
+        return self._entries[digest]
+
+    def data_digest(self, X, y):
+        """Digest of a training set (as used for the cache keys), e.g. to tag results computed on it."""
+        return self._digest('data', X, y, None, None)
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.startswith('lgb-') and f.endswith('.bin')]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[self.max_files:]:
+            try:
+                os.remove(path)
+                logger.info(f"Removed old binned LightGBM dataset {path}")
+            except OSError:
+                pass
+
+    def _store(self, digest, entry):
+        self._entries[digest] = entry
+        self._digests[id(entry)] = digest
+        return entry
+
+    def _digest(self, kind, X, y, weight, reference):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f'{kind}:{self.max_bin}:{np.shape(X)}'.encode())
+        for array in (X, y, weight):
+            if array is not None:
+                array = np.ascontiguousarray(array)
+                h.update(str(array.dtype).encode())
+                h.update(memoryview(array).cast('B'))
+        if reference is not None:
+            h.update(self._digests[id(reference)].encode())
+        return h.hexdigest()
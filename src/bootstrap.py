@@ -0,0 +1,127 @@
+import numpy as np
+import logging
+from joblib import Parallel, delayed
+from scipy.stats import rankdata
+from src.survival_metrics import concordance_index
+
+logger = logging.getLogger(__name__)
+
+# Percentile bootstrap CIs. Resamples are drawn as one (n_resamples, n) index matrix and
+# the classification metrics are computed for a whole block of rows at once; blocks are
+# spread over a process pool.
+
+def bootstrap_indices(n, n_resamples, seed=42, strata=None):
+    """
+    (n_resamples, n) matrix of row indices drawn with replacement.
+
+    With `strata` (e.g. class labels) each stratum is resampled separately, keeping its
+    size fixed, so every resample has both classes.
+    """
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        return rng.integers(0, n, size=(n_resamples, n))
+    strata = np.asarray(strata)
+    idx = np.empty((n_resamples, n), dtype=np.int64)
+    start = 0
+    for value in np.unique(strata):
+        members = np.flatnonzero(strata == value)
+        idx[:, start:start + len(members)] = members[rng.integers(0, len(members), size=(n_resamples, len(members)))]
+        start += len(members)
+    return idx
+
+def roc_auc_rows(y, scores):
+    """ROC-AUC of each row of a (B, n) label/score matrix (Mann-Whitney, ties averaged)."""
+    y = y.astype(bool)
+    n_pos = y.sum(axis=1)
+    n_neg = y.shape[1] - n_pos
+    ranks = rankdata(scores, axis=1)
+    pos_rank_sum = np.where(y, ranks, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (pos_rank_sum - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+def average_precision_rows(y, scores):
+    """Average precision of each row (step-wise PR area, as sklearn's average_precision_score)."""
+    order = np.argsort(-scores, axis=1, kind='stable')
+    s = np.take_along_axis(scores, order, axis=1)
+    tp = np.cumsum(np.take_along_axis(y, order, axis=1), axis=1)
+    predicted = np.arange(1, y.shape[1] + 1)
+    n_pos = tp[:, -1]
+
+    # Operating points sit at the last row of each group of tied scores
+    is_point = np.ones_like(s, dtype=bool)
+    is_point[:, :-1] = s[:, :-1] != s[:, 1:]
+    tp_at_point = np.where(is_point, tp, 0)
+    prev_tp = np.zeros_like(tp)
+    prev_tp[:, 1:] = np.maximum.accumulate(tp_at_point, axis=1)[:, :-1]
+
+    gain = np.where(is_point, (tp - prev_tp) * tp / predicted, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return gain / n_pos
+
+def recall_rows(y, scores, threshold):
+    """Recall of `score >= threshold` for each row."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((scores >= threshold) & (y == 1)).sum(axis=1) / (y == 1).sum(axis=1)
+
+def _intent_block(y_true, y_scores, idx, threshold):
+    y, s = y_true[idx], y_scores[idx]
+    return {
+        'roc_auc': roc_auc_rows(y, s),
+        'pr_auc': average_precision_rows(y, s),
+        'recall': recall_rows(y, s, threshold),
+    }
+
+def _c_index_block(T, E, scores, idx):
+    values = np.empty(len(idx))
+    for i, rows in enumerate(idx):
+        try:
+            values[i] = concordance_index(T[rows], scores[rows], E[rows])
+        except ZeroDivisionError:
+            values[i] = np.nan
+    return {'c_index': values}
+
+def bootstrap_intent_ci(y_true, y_scores, threshold=0.5, n_resamples=1000, confidence=0.95, n_jobs=1, seed=42, block_size=250):
+    """
+    Bootstrap CIs for ROC-AUC, PR-AUC and recall at `threshold` (class-stratified resampling).
+    """
+    y_true = np.asarray(y_true).ravel().astype(np.int8)
+    y_scores = np.asarray(y_scores, dtype=np.float64).ravel()
+    idx = bootstrap_indices(len(y_true), n_resamples, seed, strata=y_true)
+    point = _intent_block(y_true, y_scores, np.arange(len(y_true))[None, :], threshold)
+    samples = _run_blocks(_intent_block, (y_true, y_scores), idx, (threshold,), n_jobs, block_size)
+    return _summarise(point, samples, confidence)
+
+def bootstrap_c_index_ci(event_times, risk_scores, event_observed, n_resamples=1000, confidence=0.95, n_jobs=1, seed=42, block_size=250):
+    """
+    Bootstrap CI for Harrell's C-index of hazard-type `risk_scores` (higher = earlier event).
+    """
+    T = np.asarray(event_times, dtype=np.float64).ravel()
+    E = np.asarray(event_observed).ravel().astype(bool)
+    scores = -np.asarray(risk_scores, dtype=np.float64).ravel()
+    idx = bootstrap_indices(len(T), n_resamples, seed)
+    point = _c_index_block(T, E, scores, np.arange(len(T))[None, :])
+    samples = _run_blocks(_c_index_block, (T, E, scores), idx, (), n_jobs, block_size)
+    return _summarise(point, samples, confidence)
+
+def _run_blocks(fn, data, idx, extra, n_jobs, block_size):
+    blocks = [idx[i:i + block_size] for i in range(0, len(idx), block_size)]
+    if n_jobs == 1 or len(blocks) == 1:
+        results = [fn(*data, block, *extra) for block in blocks]
+    else:
+        results = Parallel(n_jobs=n_jobs)(delayed(fn)(*data, block, *extra) for block in blocks)
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+def _summarise(point, samples, confidence):
+    alpha = (1 - confidence) / 2
+    summary = {}
+    for name, values in samples.items():
+        valid = values[~np.isnan(values)]
+        lower, upper = np.quantile(valid, [alpha, 1 - alpha]) if len(valid) else (np.nan, np.nan)
+        summary[name] = {
+            'estimate': float(point[name][0]),
+            'ci_lower': float(lower),
+            'ci_upper': float(upper),
+            'std': float(valid.std(ddof=1)) if len(valid) > 1 else float('nan'),
+            'n_resamples': int(len(valid)),
+        }
+    return summary
@@ -1,111 +1,233 @@
+import time
+import warnings
 import pandas as pd
 import numpy as np
 import logging
-from lifelines import CoxPHFitter
+from joblib import Parallel, delayed
+from lifelines import CoxPHFitter, CoxTimeVaryingFitter
+from lifelines.exceptions import ConvergenceError
 from sklearn.model_selection import KFold
-from sklearn.feature_selection import VarianceThreshold
 import joblib
+from src.survival_metrics import model_concordance
+from src.coxnet import CoxNetFitter
+from src.feature_pruning import CollinearityPruner
 
 logger = logging.getLogger(__name__)
 
-class CapacityModel:
-    def __init__(self, penalizer=0.1, l1_ratio=0.0):
-        # Increased penalizer slightly and set l1_ratio to 0 (L2 penalty is better for collinearity)
-        # Using a stronger penalizer to handle multicollinearity
-        self.cph = CoxPHFitter(penalizer=1.0, l1_ratio=0.0) 
-        self.cols_to_drop = []
-        
-    def fit(self, train_df, duration_col='T', event_col='E'):
-        logger.info(f"Fitting Cox PH Model (penalizer={self.cph.penalizer})...")
-        
-        # 1. Drop low variance columns
-        selector = VarianceThreshold(threshold=0.01) # Drop near-constant
-        # Select only numeric columns for variance check
-        numeric_df = train_df.select_dtypes(include=[np.number])
-        selector.fit(numeric_df)
-        kept_indices = selector.get_support(indices=True)
-        kept_cols = numeric_df.columns[kept_indices]
-        dropped_low_var = list(set(numeric_df.columns) - set(kept_cols))
-        
-        if dropped_low_var:
-            logger.warning(f"Dropping low variance columns: {dropped_low_var}")
-            train_df = train_df.drop(columns=dropped_low_var)
+COX_SOLVERS = ('lifelines', 'coxnet')
 
-        # 2. Check for correlation with duration and high pairwise correlation
-        # Correlation with duration (target leakage check)
-        corrs = train_df.corrwith(train_df[duration_col]).abs()
-        high_corr_col_target = corrs[corrs > 0.95].index.tolist()
-        if high_corr_col_target:
-             # Don't drop the duration column itself!
-            high_corr_col_target = [c for c in high_corr_col_target if c != duration_col]
-            if high_corr_col_target:
-                logger.warning(f"Dropping columns highly correlated with duration: {high_corr_col_target}")
-                train_df = train_df.drop(columns=high_corr_col_target)
+def make_cox_fitter(solver='lifelines', penalizer=0.1, l1_ratio=0.0):
+    """
+    Cox fitter for a solver:
+        lifelines: CoxPHFitter (Newton-Raphson, Efron ties, standard errors and p-values)
+        coxnet: CoxNetFitter (coordinate descent, scales to many companies/covariates)
+    """
+    if solver == 'lifelines':
+        return CoxPHFitter(penalizer=penalizer, l1_ratio=l1_ratio)
+    if solver == 'coxnet':
+        return CoxNetFitter(penalizer=penalizer, l1_ratio=l1_ratio)
+    raise ValueError(f"Unknown Cox solver '{solver}', expected one of {COX_SOLVERS}")
 
-        # Correlation between features
-        corr_matrix = train_df.drop(columns=[duration_col, event_col]).corr().abs()
-        upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-        to_drop_pairs = [column for column in upper.columns if any(upper[column] > 0.95)]
+class CapacityModel:
+    def __init__(self, penalizer=0.1, l1_ratio=0.0, solver='lifelines', pruning=None):
+        # L2 (l1_ratio=0) is the safer default with collinear features
+        self.cph = make_cox_fitter(solver, penalizer, l1_ratio)
+        self.solver = solver
+        self.pruner = CollinearityPruner(**(pruning or {}))
         
-        if to_drop_pairs:
-             logger.warning(f"Dropping columns due to high collinearity: {to_drop_pairs}")
-             train_df = train_df.drop(columns=to_drop_pairs)
-
-        self.cols_to_drop = dropped_low_var + high_corr_col_target + to_drop_pairs
+    @property
+    def cols_to_drop(self):
+        return self.pruner.cols_to_drop
+        
+    def fit(self, train_df, duration_col='T', event_col='E'):
+        logger.info(f"Fitting Cox PH Model ({self.solver}, penalizer={self.cph.penalizer}, l1_ratio={self.cph.l1_ratio})...")
+        train_df = self.select_columns(train_df, duration_col, event_col)
         
         try:
             self.cph.fit(train_df, duration_col=duration_col, event_col=event_col, show_progress=True)
+            # Both solvers centre covariates on the training means
+            self.train_mean_ = train_df.drop(columns=[duration_col, event_col]).mean()
+            self._scoring = None
             logger.info("Cox Model fitted successfully.")
         except Exception as e:
             logger.error(f"Failed to fit Cox Model: {e}")
             raise
 
+    def select_columns(self, train_df, duration_col='T', event_col='E'):
+        """Fit the pruner (near-constant, target-leaking and collinear columns) and apply it."""
+        return self.pruner.fit_transform(train_df, duration_col, event_col)
+
     def predict_survival(self, X, times=[30]):
         """Predict survival probability at specific times."""
         # Drop the columns we learned to drop during fit
-        if hasattr(self, 'cols_to_drop') and self.cols_to_drop:
-             X_clean = X.drop(columns=[c for c in self.cols_to_drop if c in X.columns])
-        else:
-             X_clean = X
-             
+        X_clean = self.pruner.transform(X)
         surv_funcs = self.cph.predict_survival_function(X_clean, times=times)
         # Transpose so rows are companies, cols are time points
         return surv_funcs.T
 
+    def predict_horizons(self, X, times=(7, 14, 30, 90)):
+        """
+        Survival probabilities at `times` for every row, as an (n_rows, n_times) array.
+        
+        Same values as predict_survival (lifelines: baseline cumulative hazard
+        interpolated linearly, times partial hazard), computed in NumPy from the cached
+        coefficients and baseline. X is a DataFrame (fitted columns picked by name) or
+        an array with columns in `feature_names` order.
+        """
+        scoring = self._scoring_arrays()
+        if isinstance(X, pd.DataFrame):
+            X = X[scoring['columns']].to_numpy(dtype=np.float64)
+        else:
+            X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        hazard = np.exp(X @ scoring['coef'] - scoring['offset'])
+        baseline = np.interp(np.asarray(times, dtype=np.float64), scoring['times'], scoring['cumhaz'])
+        return np.exp(-np.outer(hazard, baseline))
+
+    @property
+    def feature_names(self):
+        return self._scoring_arrays()['columns']
+
+    def _scoring_arrays(self):
+        """Coefficients, centring and baseline cumulative hazard as NumPy arrays, built once per fit."""
+        if getattr(self, '_scoring', None) is None:
+            coef = self.cph.params_
+            baseline = self.cph.baseline_cumulative_hazard_
+            if getattr(self, 'train_mean_', None) is not None:
+                offset = float(self.train_mean_[coef.index].to_numpy(dtype=np.float64) @ coef.to_numpy(dtype=np.float64))
+            else:
+                # Legacy files without the training means: the centred log partial hazard at x = 0
+                zero = pd.DataFrame(np.zeros((1, len(coef))), columns=coef.index)
+                offset = -float(np.asarray(self.cph.predict_log_partial_hazard(zero)).ravel()[0])
+            self._scoring = {
+                'columns': list(coef.index),
+                'coef': coef.to_numpy(dtype=np.float64),
+                'offset': offset,
+                'times': baseline.index.to_numpy(dtype=np.float64),
+                'cumhaz': np.asarray(baseline, dtype=np.float64).ravel(),
+            }
+        return self._scoring
+
     def save(self, path):
-        joblib.dump(self.cph, path)
+        # The whole model, so the pruned column set travels with the fitter
+        joblib.dump(self, path)
         logger.info(f"Cox Model saved to {path}")
 
-def tune_penalizer(train_df, duration_col='T', event_col='E', values=[0.01, 0.1, 1.0], folds=3):
+    @classmethod
+    def load(cls, path):
+        """Load a saved CapacityModel; older files held only the fitted CoxPHFitter."""
+        obj = joblib.load(path)
+        if isinstance(obj, cls):
+            return obj
+        logger.warning(f"{path} holds a bare {type(obj).__name__} (legacy format): no pruning decisions, "
+                       f"inputs must already have the fitted columns")
+        model = cls.__new__(cls)
+        model.cph = obj
+        model.solver = 'lifelines' if isinstance(obj, CoxPHFitter) else 'coxnet'
+        model.pruner = CollinearityPruner()
+        return model
+
+def tune_penalizer(train_df, duration_col='T', event_col='E', values=[0.01, 0.1, 1.0], folds=3, l1_ratio=0.0, n_jobs=1, seed=42, solver='lifelines'):
     """
     Find best penalizer using Cross-Validation on C-index.
+    
+    Each fold walks the regularization path from the largest penalizer down, starting
+    every fit from the previous penalizer's coefficients; the folds run in parallel.
+    Warm starts pay off with the coxnet solver (coordinate descent converges in a few
+    sweeps from a nearby point) and, less so, with lifelines and an L2 penalty. With an
+    L1 penalty lifelines re-anneals its smoothed |beta| on every fit, so a warm start
+    saves little there. Fits that fail to converge are left out of the mean, and
+    penalizers that converged on every fold are preferred.
+    
+    Returns:
+        (best penalizer, dict with per-penalizer mean / per-fold C-index and timings)
     """
-    logger.info("Tuning Cox penalizer...")
-    kf = KFold(n_splits=folds, shuffle=True, random_state=42)
+    logger.info(f"Tuning Cox penalizer over {len(values)} values x {folds} folds ({solver}, n_jobs={n_jobs})...")
+    start = time.perf_counter()
+    path = sorted(values, reverse=True)
+    kf = KFold(n_splits=folds, shuffle=True, random_state=seed)
+    splits = [(train_df.iloc[train_idx], train_df.iloc[val_idx]) for train_idx, val_idx in kf.split(train_df)]
     
-    best_score = -1
-    best_pen = values[0]
+    if n_jobs == 1:
+        results = [_fit_path(tr, va, path, l1_ratio, duration_col, event_col, solver) for tr, va in splits]
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_path)(tr, va, path, l1_ratio, duration_col, event_col, solver) for tr, va in splits
+        )
     
-    for pen in values:
-        scores = []
-        for train_idx, val_idx in kf.split(train_df):
-            train_fold = train_df.iloc[train_idx]
-            val_fold = train_df.iloc[val_idx]
-            
-            model = CoxPHFitter(penalizer=pen, l1_ratio=1.0)
-            try:
-                model.fit(train_fold, duration_col=duration_col, event_col=event_col)
-                sc = model.score(val_fold, scoring_method="concordance_index")
-                scores.append(sc)
-            except:
-                scores.append(0) # Failed fit
-                
-        avg_score = np.mean(scores)
-        logger.info(f"Penalizer {pen}: C-index = {avg_score:.4f}")
-        
-        if avg_score > best_score:
-            best_score = avg_score
-            best_pen = pen
-            
-    logger.info(f"Best penalizer: {best_pen} (C-index {best_score:.4f})")
-    return best_pen
+    fold_scores = np.array([scores for scores, _ in results])  # (folds, penalizers)
+    fit_seconds = np.array([seconds for _, seconds in results])
+    failed = np.isnan(fold_scores)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all folds failed -> NaN
+        mean_scores = np.nanmean(fold_scores, axis=0)
+    
+    for pen, avg_score, n_failed in zip(path, mean_scores, failed.sum(axis=0)):
+        logger.info(f"Penalizer {pen}: C-index = {avg_score:.4f}" + (f" ({n_failed} failed folds)" if n_failed else ""))
+    
+    # A penalizer that fails on some fold is numerically unstable: only pick it if none is clean
+    eligible = ~failed.any(axis=0) if (~failed.any(axis=0)).any() else ~np.isnan(mean_scores)
+    if not eligible.any():
+        raise RuntimeError("Cox penalizer search failed: no penalizer converged on any fold")
+    best = int(np.argmax(np.where(eligible, mean_scores, -np.inf)))
+    best_pen = path[best]
+    seconds = time.perf_counter() - start
+    logger.info(f"Best penalizer: {best_pen} (C-index {mean_scores[best]:.4f}) in {seconds:.2f}s")
+    
+    report = {
+        "penalizers": [float(p) for p in path],
+        "mean_c_index": [float(x) for x in mean_scores],
+        "fold_c_index": fold_scores.tolist(),
+        "failed_fits": int(failed.sum()),
+        "best_penalizer": float(best_pen),
+        "fit_seconds": fit_seconds.sum(axis=0).tolist(),
+        "seconds": seconds,
+    }
+    return best_pen, report
+
+def _fit_path(train_fold, val_fold, penalizers, l1_ratio, duration_col, event_col, solver='lifelines'):
+    """Fit one fold along the penalizer path (warm-started); C-index (NaN on failure) and seconds per fit."""
+    scores, seconds = [], []
+    initial_point = None
+    # Both solvers optimise coefficients on covariates scaled by the training fold's std
+    scale = train_fold.drop(columns=[duration_col, event_col]).std(0).replace(0, 1.0).to_numpy(dtype=np.float64)
+    for pen in penalizers:
+        fit_start = time.perf_counter()
+        model = make_cox_fitter(solver, pen, l1_ratio)
+        try:
+            model.fit(train_fold, duration_col=duration_col, event_col=event_col, initial_point=initial_point)
+            scores.append(model_concordance(model, val_fold, duration_col, event_col))
+            initial_point = model.params_.values * scale
+        except (ConvergenceError, np.linalg.LinAlgError, ValueError, ZeroDivisionError) as e:
+            logger.warning(f"Cox fit failed for penalizer {pen}: {e}")
+            scores.append(np.nan)
+        seconds.append(time.perf_counter() - fit_start)
+    return scores, seconds
+
+def fit_time_varying_cox(episodes, penalizer=0.1, id_col='company_id', start_col='start', stop_col='stop', event_col='E'):
+    """
+    Fit a Cox model with time-varying covariates on long-format episodes
+    (survival_data.prepare_time_varying_survival_data).
+    
+    Returns:
+        (fitted CoxTimeVaryingFitter, dict with sizes, log-likelihood, coefficients and timing)
+    """
+    logger.info(f"Fitting time-varying Cox model on {len(episodes)} episodes (penalizer={penalizer})...")
+    start = time.perf_counter()
+    ctv = CoxTimeVaryingFitter(penalizer=penalizer)
+    ctv.fit(episodes, id_col=id_col, start_col=start_col, stop_col=stop_col, event_col=event_col)
+    seconds = time.perf_counter() - start
+    logger.info(f"Time-varying Cox model fitted in {seconds:.2f}s")
+    
+    report = {
+        "n_companies": int(episodes[id_col].nunique()),
+        "n_episodes": int(len(episodes)),
+        "n_events": int(episodes[event_col].sum()),
+        "penalizer": float(penalizer),
+        "log_likelihood": float(ctv.log_likelihood_),
+        "coefficients": {
+            name: {"coef": float(row['coef']), "p_value": float(row['p'])}
+            for name, row in ctv.summary.iterrows()
+        },
+        "seconds": seconds,
+    }
+    return ctv, report
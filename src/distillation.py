@@ -0,0 +1,142 @@
+import time
+import numpy as np
+import lightgbm as lgb
+import logging
+from sklearn.metrics import roc_auc_score, recall_score, precision_score
+from src.evaluate import find_optimal_threshold
+
+logger = logging.getLogger(__name__)
+
+def soft_targets(teacher, X_all, train_idx=None, teacher_scores=None):
+    """
+    Ensemble soft scores for every company, the distillation targets.
+
+    Training rows take the meta-learner's score on their out-of-fold base predictions
+    instead, so the student does not copy scores the base learners fit in-sample.
+    """
+    targets = np.array(teacher.predict(X_all) if teacher_scores is None else teacher_scores, dtype=np.float64)
+    oof = getattr(teacher, 'oof_predictions_', None)
+    # After a warm start the stored OOF rows no longer line up with the training split
+    if train_idx is not None and oof is not None and len(oof) == len(train_idx):
+        targets[train_idx] = teacher.meta_model.predict_proba(oof)[:, 1]
+    return targets
+
+
+class DistilledIntentModel:
+    """
+    Single compact LightGBM scorer trained on the ensemble's soft scores
+    (cross-entropy objective, so targets may be any probability).
+
+    kind:
+        lightgbm: shallow trees (num_leaves / max_depth), bounded tree count
+        gam: depth-1 stumps, i.e. an additive model with one shape function per feature
+    Optional `monotone_constraints` ({feature name: 1 or -1}) apply to both kinds.
+    """
+
+    def __init__(self, config, feature_names=None):
+        self.config = config
+        self.kind = config.get('kind', 'lightgbm')
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.model = None
+
+    def fit(self, X, targets):
+        params = {
+            'objective': 'cross_entropy',
+            'learning_rate': self.config.get('learning_rate', 0.05),
+            'min_child_samples': self.config.get('min_child_samples', 20),
+            'verbose': -1,
+            'random_state': self.config.get('random_seed', 42),
+        }
+        if self.kind == 'gam':
+            params.update({'num_leaves': 2, 'max_depth': 1})
+        elif self.kind == 'lightgbm':
+            params.update({'num_leaves': self.config.get('num_leaves', 15), 'max_depth': self.config.get('max_depth', 4)})
+        else:
+            raise ValueError(f"Unknown distillation kind '{self.kind}', expected 'lightgbm' or 'gam'")
+
+        constraints = self.config.get('monotone_constraints') or {}
+        if constraints:
+            if self.feature_names is None:
+                raise ValueError("monotone_constraints need feature_names")
+            unknown = set(constraints) - set(self.feature_names)
+            if unknown:
+                raise ValueError(f"monotone_constraints on unknown features: {sorted(unknown)}")
+            params['monotone_constraints'] = [int(constraints.get(name, 0)) for name in self.feature_names]
+
+        self.model = lgb.train(params, lgb.Dataset(X, label=targets), num_boost_round=self.config.get('max_trees', 200))
+        logger.info(f"Distilled {self.kind} scorer: {self.model.num_trees()} trees")
+        return self
+
+    def predict(self, X):
+        """Predict probabilities for the positive class."""
+        if self.model is None:
+            raise ValueError("Model not trained yet. Call fit() first.")
+        return self.model.predict(X)
+
+    def get_feature_importance(self, feature_names=None):
+        """Get feature importance (gain) from the compact model."""
+        importance = self.model.feature_importance(importance_type='gain')
+        if feature_names is not None:
+            return dict(zip(feature_names, importance))
+        return importance
+
+
+def distillation_report(teacher, student, X_val, y_val, X_test, y_test, threshold_mode='f2', latency_rows=200):
+    """
+    Fidelity gap and latency gain of the distilled scorer vs. the ensemble.
+
+    Each model gets its own threshold from the validation set (same mode); AUC,
+    recall and precision are on the test set. Latency is measured per row both in
+    a batch over X_test and for single-row calls (the serving path).
+    """
+    report = {}
+    scores = {}
+    for name, model in (('ensemble', teacher), ('distilled', student)):
+        threshold = find_optimal_threshold(y_val, model.predict(X_val), mode=threshold_mode)
+        scores[name] = model.predict(X_test)
+        pred = (scores[name] >= threshold).astype(int)
+        report[name] = {
+            'roc_auc': float(roc_auc_score(y_test, scores[name])),
+            'recall': float(recall_score(y_test, pred, zero_division=0)),
+            'precision': float(precision_score(y_test, pred, zero_division=0)),
+            'threshold': threshold,
+            'batch_us_per_row': _batch_latency_us(model, X_test),
+            'single_row_ms': _single_row_latency_ms(model, X_test, latency_rows),
+        }
+
+    teacher_m, student_m = report['ensemble'], report['distilled']
+    report['fidelity_gap'] = {
+        'roc_auc': teacher_m['roc_auc'] - student_m['roc_auc'],
+        'recall': teacher_m['recall'] - student_m['recall'],
+        'precision': teacher_m['precision'] - student_m['precision'],
+        'score_mae': float(np.mean(np.abs(scores['ensemble'] - scores['distilled']))),
+    }
+    report['speedup'] = {
+        'batch': teacher_m['batch_us_per_row'] / student_m['batch_us_per_row'],
+        'single_row': teacher_m['single_row_ms'] / student_m['single_row_ms'],
+    }
+
+    logger.info(f"Distillation: AUC {student_m['roc_auc']:.4f} vs {teacher_m['roc_auc']:.4f}, "
+                f"recall {student_m['recall']:.4f} vs {teacher_m['recall']:.4f}; "
+                f"single-row {student_m['single_row_ms']:.3f}ms vs {teacher_m['single_row_ms']:.3f}ms "
+                f"({report['speedup']['single_row']:.1f}x)")
+    return report
+
+def _batch_latency_us(model, X, repeats=5):
+    model.predict(X)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) / max(len(X), 1) * 1e6)
+
+def _single_row_latency_ms(model, X, n_rows):
+    rows = [X[i:i + 1] for i in range(min(n_rows, len(X)))]
+    model.predict(rows[0])  # warm-up
+    times = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
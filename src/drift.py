@@ -0,0 +1,33 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Population Stability Index: sum((a - e) * ln(a / e)) over bins of the reference
+# distribution. Rule of thumb: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 drift.
+
+def build_drift_profile(X, n_bins=10):
+    """
+    Reference distribution of each feature column: inner quantile edges and the
+    fraction of rows per bin. Small enough to pickle with a model.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    edges = [np.unique(np.nanquantile(X[:, j], quantiles)) for j in range(X.shape[1])]
+    fractions = [_bin_fractions(X[:, j], e) for j, e in enumerate(edges)]
+    return {'edges': edges, 'fractions': fractions}
+
+def population_stability_index(profile, X, eps=1e-4):
+    """PSI of every feature column of X against a drift profile."""
+    X = np.asarray(X, dtype=np.float64)
+    psi = np.empty(X.shape[1])
+    for j, (edges, expected) in enumerate(zip(profile['edges'], profile['fractions'])):
+        actual = _bin_fractions(X[:, j], edges)
+        e, a = np.clip(expected, eps, None), np.clip(actual, eps, None)
+        psi[j] = np.sum((a - e) * np.log(a / e))
+    return psi
+
+def _bin_fractions(values, edges):
+    # Missing values get their own bin (index len(edges) + 1)
+    bins = np.where(np.isnan(values), len(edges) + 1, np.searchsorted(edges, values, side='right'))
+    return np.bincount(bins, minlength=len(edges) + 2) / max(len(values), 1)
@@ -1,3 +1,5 @@
+import copy
+import time
 import pandas as pd
 import numpy as np
 import logging
@@ -7,14 +9,18 @@ from sklearn.metrics import (
     brier_score_loss, accuracy_score, balanced_accuracy_score,
     fbeta_score, matthews_corrcoef, cohen_kappa_score
 )
-from lifelines.utils import concordance_index
+from lifelines.statistics import TimeTransformers
+from scipy.stats import chi2
+from src.survival_metrics import concordance_index, model_concordance
 import json
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 logger = logging.getLogger(__name__)
 
-def find_optimal_threshold(y_true, y_scores, mode='f05'):
+DEFAULT_THRESHOLDS = np.arange(0.1, 0.95, 0.01)
+
+def find_optimal_threshold(y_true, y_scores, mode='f05', thresholds=None):
     """
     Find optimal threshold based on specified mode.
     
@@ -22,71 +28,93 @@ def find_optimal_threshold(y_true, y_scores, mode='f05'):
         y_true: True labels
         y_scores: Predicted probabilities
         mode: 'f05' (precision-focused), 'f2' (recall-focused), or 'f1' (balanced)
+        thresholds: Candidate grid: None (0.10-0.94 in 0.01 steps), 'unique'
+            (every distinct score) or an array of thresholds
     
     Returns:
         float: Optimal threshold
     """
     if mode == 'f2' or mode == 'recall':
-        return find_recall_optimal_threshold(y_true, y_scores)
+        return find_recall_optimal_threshold(y_true, y_scores, thresholds)
     elif mode == 'f1':
-        return find_balanced_threshold(y_true, y_scores)
+        return find_balanced_threshold(y_true, y_scores, thresholds)
     else:
-        return find_precision_optimal_threshold(y_true, y_scores)
+        return find_precision_optimal_threshold(y_true, y_scores, thresholds)
+
+def threshold_metrics(y_true, y_scores, thresholds=None):
+    """
+    Precision, recall and F1 of `score >= t` for every candidate threshold in one pass.
+    
+    Scores are sorted once; the number of (positive) scores at or above each threshold
+    comes from a binary search, so the cost is O((n + k) log n) for k thresholds.
+    Matches sklearn's metrics with zero_division=0.
+    
+    Returns:
+        dict of arrays: thresholds, tp, fp, precision, recall, f1
+    """
+    y_true = np.asarray(y_true).ravel()
+    y_scores = np.asarray(y_scores, dtype=np.float64).ravel()
+    if thresholds is None:
+        thresholds = DEFAULT_THRESHOLDS
+    elif isinstance(thresholds, str) and thresholds == 'unique':
+        thresholds = np.unique(y_scores)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    
+    positive = y_true == 1
+    n_pos = int(positive.sum())
+    all_sorted = np.sort(y_scores)
+    pos_sorted = np.sort(y_scores[positive])
+    
+    predicted = len(all_sorted) - np.searchsorted(all_sorted, thresholds, side='left')
+    tp = n_pos - np.searchsorted(pos_sorted, thresholds, side='left')
+    fp = predicted - tp
+    fn = n_pos - tp
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(n_pos > 0, tp / max(n_pos, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    
+    return {'thresholds': thresholds, 'tp': tp, 'fp': fp, 'precision': precision, 'recall': recall, 'f1': f1}
+
+def _best_threshold(thresholds, scores, default=0.5):
+    """First threshold with the highest score, or `default` if no score beats 0."""
+    if len(scores) == 0:
+        return default, 0.0
+    best_idx = int(np.argmax(scores))
+    if not scores[best_idx] > 0:
+        return default, 0.0
+    return float(thresholds[best_idx]), float(scores[best_idx])
 
-def find_recall_optimal_threshold(y_true, y_scores):
+def find_recall_optimal_threshold(y_true, y_scores, thresholds=None):
     """
     Find optimal threshold maximizing F2 score (favoring recall).
     Prioritizes catching fraudsters even at cost of some false positives.
     """
-    thresholds = np.arange(0.1, 0.95, 0.01)
-    best_thresh = 0.5
-    best_f2 = 0
-    
-    for t in thresholds:
-        pred = (y_scores >= t).astype(int)
-        # F2 = (5 * P * R) / (4 * P + R) - weights recall 4x more than precision
-        p = precision_score(y_true, pred, zero_division=0)
-        r = recall_score(y_true, pred, zero_division=0)
-        
-        # Require minimum precision of 0.50 to avoid too many false positives
-        if p < 0.50:
-            continue
-            
-        f2 = (5 * p * r) / (4 * p + r + 1e-10)
-        
-        if f2 > best_f2:
-            best_f2 = f2
-            best_thresh = t
+    m = threshold_metrics(y_true, y_scores, thresholds)
+    p, r = m['precision'], m['recall']
+    # F2 = (5 * P * R) / (4 * P + R) - weights recall 4x more than precision
+    f2 = (5 * p * r) / (4 * p + r + 1e-10)
+    # Require minimum precision of 0.50 to avoid too many false positives
+    f2 = np.where(p < 0.50, -np.inf, f2)
     
+    best_thresh, best_f2 = _best_threshold(m['thresholds'], f2)
     logger.info(f"Recall-optimized threshold: {best_thresh:.4f} (F2={best_f2:.4f})")
-    return float(best_thresh)
+    return best_thresh
 
-def find_balanced_threshold(y_true, y_scores):
+def find_balanced_threshold(y_true, y_scores, thresholds=None):
     """Find threshold maximizing F1 score (balanced precision-recall)."""
-    thresholds = np.arange(0.1, 0.95, 0.01)
-    best_thresh = 0.5
-    best_f1 = 0
-    
-    for t in thresholds:
-        pred = (y_scores >= t).astype(int)
-        f1 = f1_score(y_true, pred, zero_division=0)
-        
-        if f1 > best_f1:
-            best_f1 = f1
-            best_thresh = t
+    m = threshold_metrics(y_true, y_scores, thresholds)
     
+    best_thresh, best_f1 = _best_threshold(m['thresholds'], m['f1'])
     logger.info(f"Balanced threshold: {best_thresh:.4f} (F1={best_f1:.4f})")
-    return float(best_thresh)
+    return best_thresh
 
-def find_precision_optimal_threshold(y_true, y_scores):
+def find_precision_optimal_threshold(y_true, y_scores, thresholds=None):
     """
     Find optimal threshold maximizing F0.5 score (favoring precision).
     Original implementation.
     """
-    thresholds = np.arange(0.1, 0.95, 0.01)
-    best_thresh = 0.5
-    best_f05 = 0
-    
     # Calculate Precision-Recall curve to find safe threshold options
     precision, recall, pr_thresholds = precision_recall_curve(y_true, y_scores)
     
@@ -104,19 +132,14 @@ def find_precision_optimal_threshold(y_true, y_scores):
         return float(best_thresh)
 
     # Fallback to F0.5 optimization if 0.85 precision is unreachable
-    for t in thresholds:
-        pred = (y_scores >= t).astype(int)
-        # F0.5 = (1.25 * P * R) / (0.25 * P + R)
-        p = precision_score(y_true, pred, zero_division=0)
-        r = recall_score(y_true, pred, zero_division=0)
-        f05 = (1.25 * p * r) / (0.25 * p + r + 1e-10)
-        
-        if f05 > best_f05:
-            best_f05 = f05
-            best_thresh = t
-            
+    m = threshold_metrics(y_true, y_scores, thresholds)
+    p, r = m['precision'], m['recall']
+    # F0.5 = (1.25 * P * R) / (0.25 * P + R)
+    f05 = (1.25 * p * r) / (0.25 * p + r + 1e-10)
+    
+    best_thresh, best_f05 = _best_threshold(m['thresholds'], f05)
     logger.info(f"Optimal Threshold (F0.5) found: {best_thresh:.2f} (Score: {best_f05:.4f})")
-    return float(best_thresh)
+    return best_thresh
 
 def evaluate_intent(y_true, y_pred_score, threshold=0.5):
     """
@@ -171,8 +194,11 @@ def evaluate_capacity(model, test_df, duration_col='T', event_col='E'):
     Evaluate Capacity Model (Survival Analysis) with comprehensive metrics.
     """
     try:
-        # 1. Concordance Index (Harrell's C-Index)
-        c_index = model.score(test_df, scoring_method="concordance_index")
+        # 1. Concordance Index (Harrell's C-Index), from the same risk scores as step 6
+        risk_scores = model.predict_partial_hazard(test_df).values.flatten()
+        actual_T = test_df[duration_col].values
+        actual_E = test_df[event_col].values
+        c_index = concordance_index(actual_T, -risk_scores, actual_E)
         
         # 2. Log-Likelihood (partial, from the model fit)
         log_likelihood = float(model.log_likelihood_)
@@ -185,23 +211,8 @@ def evaluate_capacity(model, test_df, duration_col='T', event_col='E'):
         n_significant = int((summary['p'] < 0.05).sum())
         n_covariates = len(summary)
         
-        # 5. Proportional Hazards Test (Schoenfeld residuals)
-        try:
-            ph_test = model.check_assumptions(test_df, p_value_threshold=0.05, show_plots=False)
-            ph_violations = 0  # If no exception, all pass
-        except Exception:
-            ph_violations = -1  # Could not compute or has violations
-            
-        # 6. Median Survival Prediction Quality
-        # Predict risk scores and compare ranking with actual durations
-        risk_scores = model.predict_partial_hazard(test_df).values.flatten()
-        actual_T = test_df[duration_col].values
-        actual_E = test_df[event_col].values
-        
-        # Re-compute C-index from raw predictions for validation
-        c_index_manual = float(concordance_index(actual_T, -risk_scores, actual_E))
-        
-        # 7. Log-Rank style: median predicted vs actual
+        # 5. Log-Rank style: median predicted vs actual
+        # (proportional-hazards checks: see proportional_hazards_diagnostics)
         median_risk = float(np.median(risk_scores))
         high_risk = risk_scores >= median_risk
         low_risk = risk_scores < median_risk
@@ -212,7 +223,6 @@ def evaluate_capacity(model, test_df, duration_col='T', event_col='E'):
         
         metrics = {
             "c_index": float(c_index),
-            "c_index_manual": c_index_manual,
             "log_likelihood_partial": log_likelihood,
             "aic_partial": aic,
             "n_covariates": n_covariates,
@@ -228,16 +238,76 @@ def evaluate_capacity(model, test_df, duration_col='T', event_col='E'):
         logger.error(f"Capacity Eval failed: {e}")
         # Fallback: at least return c_index if possible
         try:
-            c_index = model.score(test_df, scoring_method="concordance_index")
+            c_index = model_concordance(model, test_df, duration_col, event_col)
             return {"c_index": float(c_index)}
-        except:
+        except Exception:
             return {}
 
-def save_report(metrics_intent, metrics_capacity, filepath):
+def proportional_hazards_diagnostics(model, df, duration_col='T', event_col='E', sample_size=2000,
+                                     time_transform='rank', p_value_threshold=0.05, seed=42):
+    """
+    Schoenfeld-residual test of the proportional-hazards assumption, per covariate.
+    
+    Same statistic as lifelines' proportional_hazard_test (chi-squared, 1 dof), but the
+    residuals come from a random subsample of `df` (sample_size=None uses every row),
+    so the cost does not grow with the company count. The information scaling still
+    uses the fitted model's event count, which keeps the statistic calibrated.
+    
+    Returns:
+        dict: per-covariate test_statistic / p_value / violation, plus the violating names
+    """
+    start = time.perf_counter()
+    if sample_size is not None and len(df) > sample_size:
+        df = df.sample(n=sample_size, random_state=seed)
+    df = df[list(model.params_.index) + [duration_col, event_col]]
+    
+    # compute_residuals sizes default weights from the training set and rebinds the
+    # covariate mapping, so run it on a shallow copy (of the fitter CoxPHFitter wraps)
+    # sized to the sample
+    probe = copy.copy(getattr(model, '_model', model))
+    probe._n_examples = len(df)
+    resids = probe.compute_residuals(df, kind='scaled_schoenfeld')
+    
+    # Same row order as the residuals (lifelines sorts by duration, then event)
+    ordered = df.sort_values(by=[duration_col, event_col])
+    durations = ordered[duration_col].astype(float)
+    events = ordered[event_col].astype(bool)
+    times = TimeTransformers().get(time_transform)(durations, events, pd.Series(np.ones(len(ordered)), index=ordered.index))
+    times = np.asarray(times)[events.values]
+    
+    centred = times - times.mean()
+    n_deaths = model.event_observed.sum()
+    statistic = (centred[:, None] * resids.values).sum(0) ** 2 / (
+        n_deaths * model.standard_errors_.values ** 2 * (centred ** 2).sum()
+    )
+    p_values = chi2.sf(statistic, 1)
+    
+    covariates = {
+        name: {"test_statistic": float(t), "p_value": float(p), "violation": bool(p < p_value_threshold)}
+        for name, t, p in zip(model.params_.index, statistic, p_values)
+    }
+    violations = [name for name, res in covariates.items() if res["violation"]]
+    seconds = time.perf_counter() - start
+    logger.info(f"PH diagnostics on {len(df)} rows ({int(events.sum())} events): "
+                f"{len(violations)}/{len(covariates)} covariates violate at p<{p_value_threshold} ({seconds:.2f}s)")
+    return {
+        "n_rows": int(len(df)),
+        "n_events": int(events.sum()),
+        "time_transform": time_transform,
+        "p_value_threshold": p_value_threshold,
+        "n_violations": len(violations),
+        "violations": violations,
+        "covariates": covariates,
+        "seconds": seconds,
+    }
+
+def save_report(metrics_intent, metrics_capacity, filepath, extra=None):
     report = {
         "intent_model": metrics_intent,
         "capacity_model": metrics_capacity
     }
+    # Optional extra sections, e.g. {"distillation": {...}}
+    report.update(extra or {})
     with open(filepath, 'w') as f:
         json.dump(report, f, indent=4)
     logger.info(f"Report saved to {filepath}")
@@ -0,0 +1,73 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CollinearityPruner:
+    """
+    Drops near-constant, target-leaking and collinear numeric columns.
+
+    Decisions are learned once in `fit` and replayed by `transform`, so a saved model
+    reproduces its column set at serving time. Correlations are computed in NumPy on
+    float32 (optionally on a row sample of at most `max_rows`); collinear columns are
+    dropped greedily in one pass over the columns in order, each checked only against
+    the columns already kept.
+    """
+
+    def __init__(self, variance_threshold=0.01, target_corr_threshold=0.95, corr_threshold=0.95, max_rows=None, seed=42):
+        self.variance_threshold = variance_threshold
+        self.target_corr_threshold = target_corr_threshold
+        self.corr_threshold = corr_threshold
+        self.max_rows = max_rows
+        self.seed = seed
+        self.dropped_ = {'low_variance': [], 'target_correlated': [], 'collinear': []}
+
+    @property
+    def cols_to_drop(self):
+        return [c for group in self.dropped_.values() for c in group]
+
+    def fit(self, df, duration_col='T', event_col='E'):
+        numeric = df.select_dtypes(include=[np.number])
+        if self.max_rows is not None and len(numeric) > self.max_rows:
+            numeric = numeric.sample(n=self.max_rows, random_state=self.seed)
+        features = [c for c in numeric.columns if c not in (duration_col, event_col)]
+        X = numeric[features].to_numpy(dtype=np.float32)
+
+        # 1. Near-constant columns (population variance, as sklearn's VarianceThreshold)
+        variance = X.var(axis=0)
+        low_variance = variance <= self.variance_threshold
+
+        # 2./3. Correlations from standardised columns: one matrix product
+        keep = ~low_variance
+        Z = X[:, keep] - X[:, keep].mean(axis=0)
+        Z /= np.sqrt((Z * Z).sum(axis=0))
+        target = numeric[duration_col].to_numpy(dtype=np.float32)
+        target = (target - target.mean()) / np.sqrt(((target - target.mean()) ** 2).sum())
+        target_corr = np.abs(target @ Z)
+        leaking = target_corr > self.target_corr_threshold
+
+        high = np.abs(Z.T @ Z) > self.corr_threshold
+        kept = ~leaking
+        collinear = np.zeros(len(kept), dtype=bool)
+        for j in np.flatnonzero(kept):
+            if high[j, :j][kept[:j]].any():
+                kept[j] = False
+                collinear[j] = True
+
+        names = np.array(features)
+        candidates = names[keep]
+        self.dropped_ = {
+            'low_variance': names[low_variance].tolist(),
+            'target_correlated': candidates[leaking].tolist(),
+            'collinear': candidates[collinear].tolist(),
+        }
+        for reason, columns in self.dropped_.items():
+            if columns:
+                logger.warning(f"Dropping {reason.replace('_', ' ')} columns: {columns}")
+        return self
+
+    def transform(self, df):
+        return df.drop(columns=[c for c in self.cols_to_drop if c in df.columns])
+
+    def fit_transform(self, df, duration_col='T', event_col='E'):
+        return self.fit(df, duration_col, event_col).transform(df)
@@ -0,0 +1,83 @@
+import numpy as np
+from scipy.special import expit
+
+# Focal loss (Lin et al.) as a custom boosting objective:
+#   FL = -w_t * (1 - q)^gamma * log(q),  q = p if y == 1 else 1 - p,  p = sigmoid(raw score)
+# gamma = 0 reduces to (weighted) log loss; larger gamma down-weights easy examples.
+
+EPS = 1e-7
+MIN_HESSIAN = 1e-6
+
+def focal_loss(y, raw_score, gamma, pos_weight=1.0, sample_weight=None):
+    """Per-sample focal loss for raw (margin) scores."""
+    q, weight = _prob_of_true_class(y, raw_score, pos_weight, sample_weight)
+    return -weight * (1 - q) ** gamma * np.log(q)
+
+def focal_loss_grad_hess(y, raw_score, gamma, pos_weight=1.0, sample_weight=None):
+    """
+    Gradient and hessian of the focal loss w.r.t. the raw score, vectorized.
+
+    Positives are weighted by `pos_weight` (the custom objective replaces the boosters'
+    built-in `scale_pos_weight`). The hessian is negative for confidently-correct
+    samples when gamma > 0, so it is floored at MIN_HESSIAN to keep Newton steps stable.
+    """
+    q, weight = _prob_of_true_class(y, raw_score, pos_weight, sample_weight)
+    sign = np.where(y == 1, 1.0, -1.0)
+    one_minus_q = 1 - q
+    log_q = np.log(q)
+    focal = one_minus_q ** gamma
+    # d(FL)/dq * dq/dz / q(1-q), shared by gradient and hessian
+    inner = gamma * q * log_q - one_minus_q
+
+    grad = weight * sign * focal * inner
+    hess = weight * q * one_minus_q * (
+        focal * (gamma * (log_q + 1) + 1) - gamma * one_minus_q ** (gamma - 1) * inner
+    )
+    return grad, np.maximum(hess, MIN_HESSIAN)
+
+def _prob_of_true_class(y, raw_score, pos_weight, sample_weight):
+    y = np.asarray(y)
+    p = expit(np.asarray(raw_score, dtype=np.float64))
+    q = np.clip(np.where(y == 1, p, 1 - p), EPS, 1 - EPS)
+    weight = np.where(y == 1, pos_weight, 1.0)
+    if sample_weight is not None and len(sample_weight):
+        weight = weight * sample_weight
+    return q, weight
+
+
+class FocalLoss:
+    """
+    Focal-loss objective usable by both boosters: LightGBM (`params['objective']`)
+    and XGBoost (`xgb.train(..., obj=...)`). Both pass raw scores and their dataset.
+
+    A class rather than a closure so boosters holding it in their params stay picklable.
+    """
+
+    def __init__(self, gamma=2.0, pos_weight=1.0):
+        self.gamma = gamma
+        self.pos_weight = pos_weight
+
+    def __call__(self, raw_score, data):
+        return focal_loss_grad_hess(data.get_label(), raw_score, self.gamma, self.pos_weight, data.get_weight())
+
+
+class SigmoidBooster:
+    """
+    LightGBM booster trained with a custom objective: `predict` returns raw scores,
+    so this wrapper maps them to probabilities. Other attributes pass through.
+
+    (XGBoost needs no wrapper: with objective 'binary:logistic' and a custom `obj`,
+    `predict` already applies the sigmoid.)
+    """
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, data, **kwargs):
+        return expit(self.booster.predict(data, **kwargs))
+
+    def __getattr__(self, name):
+        # Guard: unpickling looks up attributes before `booster` is set
+        if name == 'booster':
+            raise AttributeError(name)
+        return getattr(self.booster, name)
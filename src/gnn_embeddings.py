@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def compute_company_embeddings(model, data):
+    """
+    Run the trained HeteroGNN once over the full graph.
+
+    Returns:
+        (embeddings, logits): float32 arrays ordered by company node index.
+    """
+    # torch is only needed to produce the embeddings, not to serve them
+    import torch
+
+    model.eval()
+    with torch.inference_mode():
+        embeddings = model.encode(data.x_dict, data.edge_index_dict)
+        logits = model.lin(embeddings).squeeze(-1)
+
+    return embeddings.cpu().numpy().astype(np.float32), logits.cpu().numpy().astype(np.float32)
+
+def export_company_embeddings(model, data, company_map, path):
+    """
+    Write per-company GNN embeddings and logits to a .npz feature file.
+    """
+    embeddings, logits = compute_company_embeddings(model, data)
+    ordered_ids = [c for c, i in sorted(company_map.items(), key=lambda item: item[1])]
+
+    store = CompanyEmbeddingStore(ordered_ids, embeddings, logits)
+    store.save(path)
+    return store
+
+
+class CompanyEmbeddingStore:
+    """Torch-free lookup table of precomputed company embeddings and logits."""
+
+    def __init__(self, company_ids, embeddings, logits):
+        self.company_ids = np.asarray(company_ids, dtype=str)
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.logits = np.asarray(logits, dtype=np.float32)
+        self.index = {cid: i for i, cid in enumerate(self.company_ids)}
+
+    def __len__(self):
+        return len(self.company_ids)
+
+    def __contains__(self, company_id):
+        return company_id in self.index
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+    def lookup(self, company_id):
+        """Return (embedding, logit) for a company, or None if it is not in the graph."""
+        i = self.index.get(company_id)
+        if i is None:
+            return None
+        return self.embeddings[i], float(self.logits[i])
+
+    def to_frame(self, prefix='gnn_emb_'):
+        """Embeddings as a feature frame keyed by company_id."""
+        frame = pd.DataFrame(self.embeddings, columns=[f'{prefix}{i}' for i in range(self.dim)])
+        frame['gnn_logit'] = self.logits
+        frame.insert(0, 'company_id', self.company_ids)
+        return frame
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, company_id=self.company_ids, embeddings=self.embeddings, logits=self.logits)
+        logger.info(f"Saved {len(self)} company embeddings (dim={self.dim}) to {path}")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f['company_id'], f['embeddings'], f['logits'])
+
+
+def add_embedding_features(features_df, store):
+    """
+    Left-join GNN embedding features onto the company feature frame.
+    Companies absent from the graph get zeros.
+
+    The GNN's own logit is left out: it was fitted on the training companies' labels,
+    so it would be in-sample for training rows and out-of-sample for val/test rows
+    (the leak out-of-fold stacking avoids for the ensemble meta-learner).
+    """
+    emb_df = store.to_frame().drop(columns=['gnn_logit'])
+    emb_cols = [c for c in emb_df.columns if c != 'company_id']
+
+    merged = features_df.merge(emb_df, on='company_id', how='left')
+    n_missing = merged[emb_cols[0]].isna().sum() if emb_cols else 0
+    if n_missing:
+        logger.warning(f"{n_missing} companies have no GNN embedding, filling with 0")
+    merged[emb_cols] = merged[emb_cols].fillna(0)
+
+    logger.info(f"Added {len(emb_cols)} GNN embedding features")
+    return merged
@@ -0,0 +1,162 @@
+import time
+import numpy as np
+import torch
+from torch.optim.lr_scheduler import ReduceLROnPlateau
+from sklearn.metrics import roc_auc_score
+import logging
+from src.torch_runtime import autocast, compile_model
+
+logger = logging.getLogger(__name__)
+
+def build_eval_subgraph(data, company_idx, num_layers):
+    """
+    Restrict a HeteroData graph to the receptive field of the given company nodes.
+
+    With `num_layers` message-passing layers, a company's output only depends on
+    nodes within `num_layers` hops, so an eval-mode forward on this subgraph gives
+    exactly the same scores as a full-graph forward for those companies.
+
+    Returns:
+        (subgraph, local_idx): the subgraph and the positions of `company_idx` in it.
+    """
+    keep = {nt: torch.zeros(data[nt].num_nodes, dtype=torch.bool) for nt in data.node_types}
+    keep['company'][company_idx] = True
+    frontier = {nt: mask.clone() for nt, mask in keep.items()}
+
+    for _ in range(num_layers):
+        reached = {nt: torch.zeros_like(mask) for nt, mask in keep.items()}
+        for src, rel, dst in data.edge_types:
+            edge_index = data[src, rel, dst].edge_index
+            hit = frontier[dst][edge_index[1]]
+            reached[src][edge_index[0][hit]] = True
+        for nt in keep:
+            frontier[nt] = reached[nt] & ~keep[nt]
+            keep[nt] |= reached[nt]
+
+    subgraph = data.subgraph({nt: mask.nonzero().view(-1) for nt, mask in keep.items()})
+    local_idx = (torch.cumsum(keep['company'].long(), 0) - 1)[company_idx]
+
+    logger.info(f"Eval subgraph: {int(keep['company'].sum())}/{data['company'].num_nodes} companies "
+                f"for {len(company_idx)} targets")
+    return subgraph, local_idx
+
+
+class GNNTrainer:
+    """
+    Full-batch trainer for HeteroGNN with periodic validation and early stopping.
+
+    Validation runs every `eval_every` epochs on the validation subgraph only, and the
+    best weights are kept as a detached snapshot rather than live state_dict references.
+    `runtime` is the `torch_runtime` config section (optional torch.compile / bf16 autocast).
+    """
+
+    def __init__(self, model, config, runtime=None):
+        runtime = runtime or {}
+        self.model = model
+        self.forward_model = model
+        self.use_compile = runtime.get('compile', False)
+        self.use_bf16 = runtime.get('bf16', False)
+        self.epochs = config.get('epochs', 200)
+        self.eval_every = max(1, config.get('eval_every', 1))
+        self.patience = config.get('early_stopping_patience', 20)
+
+        pos_weight = torch.tensor([config.get('positive_class_weight', 3.5)])
+        self.criterion = torch.nn.BCEWithLogitsLoss(pos_weight=pos_weight)
+        self.optimizer = torch.optim.Adam(
+            model.parameters(),
+            lr=config.get('learning_rate', 0.005),
+            weight_decay=config.get('weight_decay', 0.0001)
+        )
+        self.scheduler = ReduceLROnPlateau(
+            self.optimizer, mode='max',
+            factor=config.get('lr_scheduler_factor', 0.5),
+            # Scheduler steps once per evaluation, so convert epoch patience to eval steps
+            patience=max(1, config.get('lr_scheduler_patience', 10) // self.eval_every),
+            min_lr=1e-5
+        )
+
+        self.best_val_score = 0.0
+        self.best_epoch = -1
+        self.best_state = None
+        self.history = []
+
+    def fit(self, data, train_mask, val_mask):
+        """Train on `train_mask` companies, early-stopping on `val_mask` ROC-AUC."""
+        y = data['company'].y
+        val_data, val_local = build_eval_subgraph(data, val_mask, num_layers=len(self.model.convs))
+        val_targets = y[val_mask].cpu().numpy()
+
+        if self.use_compile:
+            self.forward_model = compile_model(self.model, data.x_dict, data.edge_index_dict)
+
+        epochs_since_best = 0
+        for epoch in range(self.epochs):
+            start = time.perf_counter()
+            loss = self._train_step(data, train_mask, y)
+            train_time = time.perf_counter() - start
+
+            record = {'epoch': epoch, 'loss': loss, 'train_s': train_time}
+            if (epoch + 1) % self.eval_every == 0 or epoch == self.epochs - 1:
+                start = time.perf_counter()
+                val_auc = self._val_auc(val_data, val_local, val_targets)
+                record['eval_s'] = time.perf_counter() - start
+                record['val_auc'] = val_auc
+
+                self.scheduler.step(val_auc)
+                if val_auc > self.best_val_score:
+                    self.best_val_score = val_auc
+                    self.best_epoch = epoch
+                    self.best_state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+                    epochs_since_best = 0
+                else:
+                    epochs_since_best += self.eval_every
+            self.history.append(record)
+
+            if epoch % 10 == 0:
+                val_msg = f", Val AUC: {record['val_auc']:.4f}" if 'val_auc' in record else ""
+                logger.info(f"Epoch {epoch}, Loss: {loss:.4f}{val_msg}, Time: {train_time * 1000:.1f}ms")
+            if epochs_since_best >= self.patience:
+                logger.info(f"Early stopping at epoch {epoch}")
+                break
+
+        if self.best_state is not None:
+            self.model.load_state_dict(self.best_state)
+        self.model.eval()
+
+        timing = self.timing_summary()
+        logger.info(f"GNN training done: best Val AUC {self.best_val_score:.4f} at epoch {self.best_epoch}, "
+                    f"{timing['epochs']} epochs, {timing['mean_train_ms']:.1f}ms/train step, "
+                    f"{timing['mean_eval_ms']:.1f}ms/eval")
+        return self
+
+    def _train_step(self, data, train_mask, y):
+        self.model.train()
+        self.optimizer.zero_grad()
+        with autocast(self.use_bf16):
+            out = self.forward_model(data.x_dict, data.edge_index_dict)
+        loss = self.criterion(out[train_mask].float().view(-1), y[train_mask])
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+
+    def _val_auc(self, val_data, val_local, val_targets):
+        self.model.eval()
+        with torch.inference_mode(), autocast(self.use_bf16):
+            out = self.forward_model(val_data.x_dict, val_data.edge_index_dict).float().view(-1)
+            val_probs = torch.sigmoid(out[val_local]).cpu().numpy()
+        try:
+            return float(roc_auc_score(val_targets, val_probs))
+        except ValueError:
+            return 0.5
+
+    def timing_summary(self):
+        """Per-epoch timing aggregated over the training history."""
+        train_times = [r['train_s'] for r in self.history]
+        eval_times = [r['eval_s'] for r in self.history if 'eval_s' in r]
+        return {
+            'epochs': len(self.history),
+            'evaluations': len(eval_times),
+            'total_s': float(sum(train_times) + sum(eval_times)),
+            'mean_train_ms': float(np.mean(train_times) * 1000) if train_times else 0.0,
+            'mean_eval_ms': float(np.mean(eval_times) * 1000) if eval_times else 0.0,
+        }
@@ -2,13 +2,19 @@ import torch
 import torch.nn.functional as F
 from torch_geometric.nn import SAGEConv, GATConv, HeteroConv, Linear
 import lightgbm as lgb
-import xgboost as xgb
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.metrics import roc_auc_score
 from sklearn.linear_model import LogisticRegression
-from imblearn.over_sampling import SMOTE
-import optuna
+from sklearn.model_selection import StratifiedKFold
 import logging
+from src.tuning import tune, compute_scale_pos_weight
+from src.rebalancing import get_rebalance_mode, rebalance, negative_subsample_bags, BaggedBooster
+from src.base_learners import fit_base_learners, fit_fold, base_predictions, continue_base_learners
+from src.focal_loss import FocalLoss, SigmoidBooster
+from src.binned_data import BinnedDataCache
+from src.drift import build_drift_profile, population_stability_index
+from src.torch_runtime import available_cores
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +70,11 @@ class HeteroGNN(torch.nn.Module):
         self.lin = Linear(hidden_dims[-1], out_channels)
         
     def forward(self, x_dict, edge_index_dict):
+        # Final Prediction (only for companies)
+        return self.lin(self.encode(x_dict, edge_index_dict))
+
+    def encode(self, x_dict, edge_index_dict):
+        """Return the final hidden representation of every company node."""
         # 1. Project Inputs
         x_dict_curr = {}
         for nt, x in x_dict.items():
@@ -103,35 +114,33 @@ class HeteroGNN(torch.nn.Module):
             
             x_dict_curr = x_dict_next
             
-        # 3. Final Prediction (only for companies)
-        return self.lin(x_dict_curr['company'])
+        return x_dict_curr['company']
 
 
 class LightGBMIntentModel:
-    """LightGBM-based Intent Model with SMOTE and Optuna tuning."""
+    """LightGBM-based Intent Model with class rebalancing and Optuna tuning."""
     
     def __init__(self, config):
         self.config = config
         self.model = None
         self.best_params = None
-        self.use_smote = config.get('use_smote', True)
+        self.rebalance = get_rebalance_mode(config)
         self.tune_hyperparams = config.get('tune_hyperparams', True)
         
     def train(self, X_train, y_train, X_val, y_val):
-        """Train LightGBM with optional SMOTE and Optuna tuning."""
-        logger.info(f"Training LightGBM Intent Model (SMOTE={self.use_smote}, Tuning={self.tune_hyperparams})")
+        """Train LightGBM with class rebalancing and optional Optuna tuning."""
+        logger.info(f"Training LightGBM Intent Model (Rebalance={self.rebalance}, Tuning={self.tune_hyperparams})")
         
-        # Apply SMOTE if enabled
-        if self.use_smote and y_train.sum() < len(y_train) * 0.5:
-            logger.info(f"Original class distribution: {np.bincount(y_train.astype(int))}")
-            smote = SMOTE(random_state=self.config.get('random_seed', 42), k_neighbors=5)
-            X_train, y_train = smote.fit_resample(X_train, y_train)
-            logger.info(f"After SMOTE: {np.bincount(y_train.astype(int))}")
+        # Binned once; tuning trials and the final fit reuse the same histograms
+        binned = BinnedDataCache(
+            self.config.get('binned_cache_dir'), max_bin=self.config.get('max_bin', 255),
+            max_files=self.config.get('binned_cache_max_files', 4)
+        )
         
-        # Hyperparameter tuning with Optuna
+        # Hyperparameter tuning with Optuna (before rebalancing, so CV folds never contain synthetic samples)
         if self.tune_hyperparams:
             logger.info("Starting Optuna hyperparameter tuning...")
-            self.best_params = self._tune_hyperparameters(X_train, y_train, X_val, y_val)
+            self.best_params = self._tune_hyperparameters(X_train, y_train, binned)
         else:
             # Default parameters
             self.best_params = {
@@ -148,14 +157,30 @@ class LightGBMIntentModel:
         
         # Train final model
         logger.info(f"Training final model with params: {self.best_params}")
+        seed = self.config.get('random_seed', 42)
+        
+        if self.rebalance == 'undersample':
+            bags, sampling_rate = negative_subsample_bags(
+                y_train, self.config.get('undersample_bags', 5), self.config.get('undersample_ratio', 3.0), seed
+            )
+            self.model = BaggedBooster(
+                [self._fit_booster(X_train[idx], y_train[idx], None, X_val, y_val, binned) for idx in bags], sampling_rate,
+                # Each bag booster also trains with scale_pos_weight (same class counts in every bag)
+                pos_weight=compute_scale_pos_weight(y_train[bags[0]])
+            )
+        else:
+            X_fit, y_fit, sample_weight = rebalance(X_train, y_train, self.rebalance, seed)
+            self.model = self._fit_booster(X_fit, y_fit, sample_weight, X_val, y_val, binned)
         
-        train_data = lgb.Dataset(X_train, label=y_train)
-        val_data = lgb.Dataset(X_val, label=y_val, reference=train_data)
+        logger.info(f"Training complete. Best iteration: {self.model.best_iteration}")
+        return self
+    
+    def _fit_booster(self, X_train, y_train, sample_weight, X_val, y_val, binned):
+        train_data = binned.lgb_dataset(X_train, y_train, sample_weight)
+        val_data = binned.lgb_dataset(X_val, y_val, reference=train_data)
         
         # Calculate scale_pos_weight for class imbalance
-        pos_count = y_train.sum()
-        neg_count = len(y_train) - pos_count
-        scale_pos_weight = neg_count / pos_count if pos_count > 0 else 1.0
+        scale_pos_weight = compute_scale_pos_weight(y_train, sample_weight)
         
         params = {
             **self.best_params,
@@ -166,8 +191,11 @@ class LightGBMIntentModel:
             'scale_pos_weight': scale_pos_weight,
             'random_state': self.config.get('random_seed', 42),
         }
+        if self.rebalance == 'focal':
+            # Custom objectives ignore scale_pos_weight, so the class weight moves into the loss
+            params['objective'] = FocalLoss(self.config.get('focal_gamma', 2.0), pos_weight=params.pop('scale_pos_weight'))
         
-        self.model = lgb.train(
+        booster = lgb.train(
             params,
             train_data,
             num_boost_round=self.best_params.get('n_estimators', 500),
@@ -178,70 +206,18 @@ class LightGBMIntentModel:
                 lgb.log_evaluation(period=50)
             ]
         )
-        
-        logger.info(f"Training complete. Best iteration: {self.model.best_iteration}")
-        return self
+        return SigmoidBooster(booster) if self.rebalance == 'focal' else booster
     
-    def _tune_hyperparameters(self, X_train, y_train, X_val, y_val):
-        """Tune hyperparameters using Optuna."""
-        
-        def objective(trial):
-            params = {
-                'num_leaves': trial.suggest_int('num_leaves', 20, 150),
-                'max_depth': trial.suggest_int('max_depth', 3, 12),
-                'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-                'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-                'min_child_samples': trial.suggest_int('min_child_samples', 5, 50),
-                'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                'reg_alpha': trial.suggest_float('reg_alpha', 1e-3, 10.0, log=True),
-                'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
-            }
-            
-            train_data = lgb.Dataset(X_train, label=y_train)
-            val_data = lgb.Dataset(X_val, label=y_val, reference=train_data)
-            
-            pos_count = y_train.sum()
-            neg_count = len(y_train) - pos_count
-            scale_pos_weight = neg_count / pos_count if pos_count > 0 else 1.0
-            
-            lgb_params = {
-                **params,
-                'objective': 'binary',
-                'metric': 'auc',
-                'boosting_type': 'gbdt',
-                'verbose': -1,
-                'scale_pos_weight': scale_pos_weight,
-                'random_state': self.config.get('random_seed', 42),
-            }
-            
-            model = lgb.train(
-                lgb_params,
-                train_data,
-                num_boost_round=params['n_estimators'],
-                valid_sets=[val_data],
-                callbacks=[
-                    lgb.early_stopping(stopping_rounds=30, verbose=False)
-                ]
-            )
-            
-            y_pred = model.predict(X_val)
-            auc = roc_auc_score(y_val, y_pred)
-            
-            return auc
-        
-        study = optuna.create_study(
-            direction='maximize',
-            sampler=optuna.samplers.TPESampler(seed=self.config.get('random_seed', 42))
-        )
-        
-        n_trials = self.config.get('optuna_trials', 50)
-        study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
-        
-        logger.info(f"Optuna tuning complete. Best AUC: {study.best_value:.4f}")
-        logger.info(f"Best parameters: {study.best_params}")
-        
-        return study.best_params
+    def _tune_hyperparameters(self, X_train, y_train, binned):
+        """Tune hyperparameters with parallel, pruned, stratified k-fold Optuna search."""
+        base_params = {
+            'objective': 'binary',
+            'metric': 'auc',
+            'boosting_type': 'gbdt',
+            'scale_pos_weight': compute_scale_pos_weight(y_train),
+            'random_state': self.config.get('random_seed', 42),
+        }
+        return tune('lgb', X_train, y_train, self.config, base_params, study_suffix='lightgbm', binned=binned)
     
     def predict(self, X):
         """Predict probabilities for the positive class."""
@@ -264,51 +240,218 @@ class LightGBMIntentModel:
 class EnsembleIntentModel:
     """
     Ensemble of LightGBM, XGBoost, and CatBoost with stacking for improved recall.
-    Uses focal loss weighting and optimized for recall metric.
+    Uses focal loss (rebalance='focal') or class weighting, optimized for recall.
     """
     
     def __init__(self, config):
         self.config = config
         self.models = {}
         self.meta_model = None
-        self.use_smote = config.get('use_smote', True)
+        self.rebalance = get_rebalance_mode(config)
         self.focal_gamma = config.get('focal_gamma', 2.0)
         self.recall_weight = config.get('recall_weight', 2.0)  # Higher = prioritize recall
+        self.tune_hyperparams = config.get('tune_hyperparams', False)
+        self.tuned_params = {}
         
     def train(self, X_train, y_train, X_val, y_val):
-        """Train ensemble with multiple base learners and a meta-learner."""
-        logger.info(f"Training Ensemble Intent Model (SMOTE={self.use_smote}, Recall-Optimized)")
-        
-        # Apply SMOTE if enabled
-        if self.use_smote and y_train.sum() < len(y_train) * 0.5:
-            logger.info(f"Original class distribution: {np.bincount(y_train.astype(int))}")
-            smote = SMOTE(random_state=self.config.get('random_seed', 42), k_neighbors=5)
-            X_train_sm, y_train_sm = smote.fit_resample(X_train, y_train)
-            logger.info(f"After SMOTE: {np.bincount(y_train_sm.astype(int))}")
-        else:
-            X_train_sm, y_train_sm = X_train, y_train
+        """
+        Train base learners and a meta-learner with k-fold out-of-fold stacking.
         
-        # Calculate class weights for focal loss effect
-        pos_count = y_train_sm.sum()
-        neg_count = len(y_train_sm) - pos_count
-        scale_pos_weight = neg_count / pos_count if pos_count > 0 else 1.0
+        Each fold (plus the final full-data refit) trains in its own process. The meta-learner
+        is fit on out-of-fold base predictions, so it never sees scores from models that
+        were trained on the same (rebalanced) rows.
+        """
+        logger.info(f"Training Ensemble Intent Model (Rebalance={self.rebalance}, Recall-Optimized)")
         
-        # Increase positive weight to boost recall
-        scale_pos_weight *= self.recall_weight
+        # Binned once: tuning, the full refit and later warm-start updates reuse the bins
+        binned = self._binned_cache()
+        
+        # Tune base learners on the original data (before rebalancing)
+        if self.tune_hyperparams:
+            self._tune_base_learners(X_train, y_train, binned)
+        
+        n_folds = self.config.get('stacking_folds', 5)
+        n_jobs = self.config.get('n_jobs', -1)
+        if n_jobs == -1:
+            n_jobs = available_cores()
+        n_jobs = min(n_jobs, n_folds + 1)
+        settings = self._base_learner_settings(num_threads=max(1, available_cores() // n_jobs))
+        
+        folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=self.config.get('random_seed', 42)).split(X_train, y_train))
+        logger.info(f"Out-of-fold stacking: {n_folds} folds + full refit on {n_jobs} processes "
+                    f"({'concurrent' if settings['parallel_learners'] else 'sequential'} base learners, "
+                    f"{settings['num_threads']} threads per process)")
+        
+        results = Parallel(n_jobs=n_jobs)(
+            [delayed(fit_fold)(X_train, y_train, train_idx, holdout_idx, X_val, y_val, settings, binned) for train_idx, holdout_idx in folds]
+            + [delayed(fit_base_learners)(X_train, y_train, X_val, y_val, settings, binned, persist=True)]
+        )
+        self.models, refit_timings = results[-1]
+        self._log_fit_timings(refit_timings, [timings for _, timings in results[:-1]])
         
-        # === 1. Train LightGBM ===
-        logger.info("Training LightGBM base learner...")
-        train_data = lgb.Dataset(X_train_sm, label=y_train_sm)
-        val_data = lgb.Dataset(X_val, label=y_val, reference=train_data)
+        oof_predictions = np.zeros((len(y_train), len(self.models)))
+        for (_, holdout_idx), (fold_preds, _) in zip(folds, results[:-1]):
+            oof_predictions[holdout_idx] = fold_preds
+        self.oof_predictions_ = oof_predictions
+        self.oof_labels_ = np.asarray(y_train)
+        # Reference feature distribution for the warm-start drift guard
+        self.drift_profile_ = build_drift_profile(X_train)
         
-        lgb_params = {
+        # === Meta-learner (Stacking) on out-of-fold predictions ===
+        logger.info("Training meta-learner (Logistic Regression) on out-of-fold predictions...")
+        self._fit_meta_learner(oof_predictions, y_train)
+        
+        oof_auc = roc_auc_score(y_train, self.meta_model.predict_proba(oof_predictions)[:, 1])
+        val_auc = roc_auc_score(y_val, self.predict(X_val))
+        logger.info(f"Ensemble OOF AUC: {oof_auc:.4f}, Validation AUC: {val_auc:.4f}")
+        
+        return self
+    
+    def update(self, X_train, y_train, X_val, y_val, new_mask=None, ids=None, config=None):
+        """
+        Warm-start update for a data/label refresh.
+        
+        Continues boosting the existing base learners on the new or relabelled rows
+        (`new_mask` over the current training set; all rows if None) and refits the
+        meta-learner on the stored out-of-fold predictions plus the new rows' scores.
+        With `ids` (company ids of the training rows) the stored rows of relabelled or
+        dropped companies are removed first, so the meta-learner never sees an old and
+        a new label for the same company. Falls back to a full `train` on the whole
+        training set when the training features drift from the original fit (PSI) or
+        the update costs validation AUC.
+        
+        `config` is the current intent_model config; its `warm_start` settings apply
+        (the config saved with the model is used when it is not given).
+        
+        The outcome, the drift check and the validation AUC before/after are recorded
+        in `warm_start_report_`.
+        """
+        warm_cfg = (config if config is not None else self.config).get('warm_start', {})
+        new_mask = np.ones(len(y_train), dtype=bool) if new_mask is None else np.asarray(new_mask, dtype=bool)
+        X_new, y_new = X_train[new_mask], np.asarray(y_train)[new_mask]
+        self.warm_start_report_ = report = {'new_rows': int(len(y_new)), 'new_positives': int(y_new.sum())}
+        
+        reason = self._full_retrain_reason(X_train, warm_cfg)
+        if reason:
+            logger.warning(f"Warm start not possible ({reason}), running full retrain")
+            report.update(outcome='full_retrain', reason=reason)
+            return self._retrain(X_train, y_train, X_val, y_val, ids)
+        if len(y_new) == 0:
+            logger.info("Warm start: no new or relabelled rows, keeping the current models")
+            report['outcome'] = 'unchanged'
+            return self
+        
+        logger.info(f"Warm start: continuing base learners on {len(y_new)} new/relabelled rows "
+                    f"({int(y_new.sum())} positive)")
+        previous_auc = roc_auc_score(y_val, self.predict(X_val))
+        # The current models never saw the new rows, so their scores are out-of-sample
+        new_predictions = self._get_base_predictions(X_new)
+        
+        settings = self._base_learner_settings(num_threads=available_cores())
+        self.models, timings = continue_base_learners(
+            self.models, X_new, y_new, X_val, y_val, settings, warm_cfg.get('rounds', 50), binned=self._binned_cache()
+        )
+        logger.info(f"Warm start boosting: LightGBM {timings['lgb']:.2f}s, XGBoost {timings['xgb']:.2f}s")
+        
+        self._replace_oof_rows(new_predictions, y_new, ids, new_mask)
+        self._fit_meta_learner(self.oof_predictions_, self.oof_labels_)
+        
+        val_auc = roc_auc_score(y_val, self.predict(X_val))
+        logger.info(f"Warm start Validation AUC: {val_auc:.4f} (before update: {previous_auc:.4f})")
+        report.update(val_auc_before=float(previous_auc), val_auc_after=float(val_auc))
+        if val_auc < previous_auc - warm_cfg.get('max_auc_drop', 0.02):
+            logger.warning("Warm start lost too much validation AUC, running full retrain")
+            report.update(outcome='full_retrain', reason="validation AUC drop")
+            return self._retrain(X_train, y_train, X_val, y_val, ids)
+        
+        report['outcome'] = 'updated'
+        return self
+    
+    def _retrain(self, X_train, y_train, X_val, y_val, ids):
+        self.train(X_train, y_train, X_val, y_val)
+        self.oof_ids_ = None if ids is None else np.asarray(ids)
+        return self
+    
+    def _replace_oof_rows(self, new_predictions, y_new, ids, new_mask):
+        """Stored out-of-fold rows minus superseded/dropped companies, plus the new rows."""
+        oof_ids = getattr(self, 'oof_ids_', None)
+        keep = np.ones(len(self.oof_labels_), dtype=bool)
+        if ids is not None and oof_ids is not None:
+            ids = np.asarray(ids)
+            keep = np.isin(oof_ids, ids) & ~np.isin(oof_ids, ids[new_mask])
+            logger.info(f"Warm start: replacing {int((~keep).sum())} stored out-of-fold rows "
+                        f"of relabelled or dropped companies")
+            self.warm_start_report_['replaced_oof_rows'] = int((~keep).sum())
+            self.oof_ids_ = np.concatenate([oof_ids[keep], ids[new_mask]])
+        else:
+            logger.warning("Warm start: stored out-of-fold rows have no company ids, relabelled rows are appended")
+        self.oof_predictions_ = np.vstack([self.oof_predictions_[keep], new_predictions])
+        self.oof_labels_ = np.concatenate([self.oof_labels_[keep], y_new])
+    
+    def _full_retrain_reason(self, X_train, warm_cfg):
+        """Why a warm start cannot be used, or None."""
+        if self.meta_model is None or not self.models:
+            return "model not trained yet"
+        if self.rebalance == 'undersample':
+            return "bagged base learners cannot continue boosting"
+        if getattr(self, 'drift_profile_', None) is None:
+            return "model has no drift profile"
+        
+        psi = population_stability_index(self.drift_profile_, X_train)
+        worst = int(np.argmax(psi))
+        logger.info(f"Warm start drift check: max feature PSI {psi[worst]:.3f} (column {worst})")
+        self.warm_start_report_['drift'] = {
+            'max_psi': float(psi[worst]), 'column': worst, 'threshold': warm_cfg.get('max_psi', 0.25),
+            'psi': [round(float(v), 4) for v in psi],
+        }
+        if psi[worst] > warm_cfg.get('max_psi', 0.25):
+            return f"feature drift, PSI {psi[worst]:.3f} on column {worst}"
+        return None
+    
+    def _fit_meta_learner(self, base_preds, y):
+        self.meta_model = LogisticRegression(
+            class_weight={0: 1, 1: self.recall_weight},  # Boost positive class
+            random_state=self.config.get('random_seed', 42),
+            max_iter=1000
+        )
+        self.meta_model.fit(base_preds, y)
+    
+    def _log_fit_timings(self, refit_timings, fold_timings):
+        """Log per-learner fit times; with concurrent learners wall time approaches max(lgb, xgb)."""
+        self.fit_timings_ = {'refit': refit_timings, 'folds': fold_timings}
+        logger.info(f"Base learner refit: LightGBM {refit_timings['lgb']:.2f}s, XGBoost {refit_timings['xgb']:.2f}s, "
+                    f"wall {refit_timings['wall']:.2f}s")
+        if fold_timings:
+            mean = {key: np.mean([t[key] for t in fold_timings]) for key in ('lgb', 'xgb', 'wall')}
+            logger.info(f"Base learner folds (mean): LightGBM {mean['lgb']:.2f}s, XGBoost {mean['xgb']:.2f}s, "
+                        f"wall {mean['wall']:.2f}s")
+    
+    def _base_learner_settings(self, num_threads):
+        """Everything a worker process needs to fit the base learners."""
+        return {
+            'lgb_params': {**self._lgb_params(), 'num_threads': num_threads},
+            'xgb_params': {**self._xgb_params(), 'nthread': num_threads},
+            'num_threads': num_threads,
+            'parallel_learners': self.config.get('parallel_base_learners', False),
+            'lgb_rounds': self.tuned_params.get('lgb', {}).get('n_estimators', 300),
+            'xgb_rounds': self.tuned_params.get('xgb', {}).get('n_estimators', 300),
+            'rebalance': self.rebalance,
+            'undersample_bags': self.config.get('undersample_bags', 5),
+            'undersample_ratio': self.config.get('undersample_ratio', 3.0),
+            'recall_weight': self.recall_weight,
+            'focal_gamma': self.focal_gamma,
+            'random_seed': self.config.get('random_seed', 42),
+        }
+    
+    def _lgb_params(self):
+        """LightGBM base learner params (defaults overridden by tuned values)."""
+        params = {
             'objective': 'binary',
             'metric': 'auc',
             'boosting_type': 'gbdt',
             'num_leaves': 31,
             'max_depth': 6,
             'learning_rate': 0.05,
-            'scale_pos_weight': scale_pos_weight,
             'min_child_samples': 10,
             'subsample': 0.8,
             'colsample_bytree': 0.8,
@@ -317,29 +460,16 @@ class EnsembleIntentModel:
             'verbose': -1,
             'random_state': self.config.get('random_seed', 42),
         }
-        
-        self.models['lgb'] = lgb.train(
-            lgb_params,
-            train_data,
-            num_boost_round=300,
-            valid_sets=[val_data],
-            callbacks=[
-                lgb.early_stopping(stopping_rounds=30, verbose=False),
-                lgb.log_evaluation(period=0)
-            ]
-        )
-        
-        # === 2. Train XGBoost ===
-        logger.info("Training XGBoost base learner...")
-        dtrain = xgb.DMatrix(X_train_sm, label=y_train_sm)
-        dval = xgb.DMatrix(X_val, label=y_val)
-        
-        xgb_params = {
+        params.update({k: v for k, v in self.tuned_params.get('lgb', {}).items() if k != 'n_estimators'})
+        return params
+    
+    def _xgb_params(self):
+        """XGBoost base learner params (defaults overridden by tuned values)."""
+        params = {
             'objective': 'binary:logistic',
             'eval_metric': 'auc',
             'max_depth': 6,
             'learning_rate': 0.05,
-            'scale_pos_weight': scale_pos_weight,
             'min_child_weight': 5,
             'subsample': 0.8,
             'colsample_bytree': 0.8,
@@ -347,52 +477,38 @@ class EnsembleIntentModel:
             'reg_lambda': 0.1,
             'seed': self.config.get('random_seed', 42),
         }
+        params.update({k: v for k, v in self.tuned_params.get('xgb', {}).items() if k != 'n_estimators'})
+        return params
+    
+    def _binned_cache(self):
+        """BinnedDataCache for this model's fits, kept for the process (not pickled with the model)."""
+        if getattr(self, '_binned', None) is None:
+            self._binned = BinnedDataCache(
+                self.config.get('binned_cache_dir'), max_bin=self.config.get('max_bin', 255),
+                max_files=self.config.get('binned_cache_max_files', 4)
+            )
+        return self._binned
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_binned', None)
+        return state
+    
+    def _tune_base_learners(self, X_train, y_train, binned):
+        """Tune LightGBM and XGBoost base learners with parallel, pruned k-fold Optuna search."""
+        logger.info("Tuning ensemble base learners with Optuna...")
+        scale_pos_weight = compute_scale_pos_weight(y_train) * self.recall_weight
         
-        self.models['xgb'] = xgb.train(
-            xgb_params,
-            dtrain,
-            num_boost_round=300,
-            evals=[(dval, 'val')],
-            early_stopping_rounds=30,
-            verbose_eval=False
-        )
-        
-        # === 3. Meta-learner (Stacking) ===
-        logger.info("Training meta-learner (Logistic Regression)...")
-        
-        # Get base predictions on train set (for meta-training)
-        train_meta_features = self._get_base_predictions(X_train_sm)
-        
-        # Get base predictions on validation set
-        val_meta_features = self._get_base_predictions(X_val)
-        
-        # Train logistic regression meta-model
-        self.meta_model = LogisticRegression(
-            class_weight={0: 1, 1: self.recall_weight},  # Boost positive class
-            random_state=self.config.get('random_seed', 42),
-            max_iter=1000
-        )
-        self.meta_model.fit(train_meta_features, y_train_sm)
-        
-        # Evaluate ensemble
-        val_preds = self.predict(X_val)
-        val_auc = roc_auc_score(y_val, val_preds)
-        logger.info(f"Ensemble Validation AUC: {val_auc:.4f}")
+        lgb_base = {k: self._lgb_params()[k] for k in ['objective', 'metric', 'boosting_type', 'random_state']}
+        xgb_base = {k: self._xgb_params()[k] for k in ['objective', 'eval_metric', 'seed']}
+        lgb_base['scale_pos_weight'] = xgb_base['scale_pos_weight'] = scale_pos_weight
         
-        return self
+        self.tuned_params['lgb'] = tune('lgb', X_train, y_train, self.config, lgb_base, study_suffix='ensemble_lgb', binned=binned)
+        self.tuned_params['xgb'] = tune('xgb', X_train, y_train, self.config, xgb_base, study_suffix='ensemble_xgb', binned=binned)
     
     def _get_base_predictions(self, X):
         """Get predictions from all base models."""
-        preds = []
-        
-        # LightGBM
-        preds.append(self.models['lgb'].predict(X))
-        
-        # XGBoost
-        dmatrix = xgb.DMatrix(X)
-        preds.append(self.models['xgb'].predict(dmatrix))
-        
-        return np.column_stack(preds)
+        return base_predictions(self.models, X)
     
     def predict(self, X):
         """Predict probabilities using ensemble."""
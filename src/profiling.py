@@ -0,0 +1,109 @@
+import sys
+import time
+import cProfile
+import logging
+import contextlib
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+class PipelineProfiler:
+    """
+    Wall time, CPU time, peak RSS and row counts per pipeline phase.
+
+    Usage:
+        with profiler.section('scaling') as record:
+            ...
+            record['rows'] = len(df)
+
+    CPU time and memory are for this process only (all its threads, not worker
+    processes). Peak RSS is the high-water mark within the phase where Linux lets
+    us reset it (/proc/self/clear_refs), else the process peak so far. With
+    `profile_dir` every phase also runs under cProfile and is dumped to
+    <profile_dir>/<phase>.prof (pstats format: snakeviz, gprof2dot, pstats).
+    Phases restored from a checkpoint keep the numbers of the run that measured
+    them and are flagged `from_checkpoint`; the totals cover this process only.
+    """
+
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.phases = {}
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def section(self, name, rows=None):
+        record = {'rows': rows}
+        _reset_peak_rss()
+        rss_before = _current_rss_mb()
+        profile = cProfile.Profile() if self.profile_dir else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile:
+                profile.disable()
+            record.update({
+                'wall_s': time.perf_counter() - wall,
+                'cpu_s': time.process_time() - cpu,
+                'peak_rss_mb': _peak_rss_mb(),
+                'rss_delta_mb': _current_rss_mb() - rss_before,
+            })
+            self.phases[name] = record
+            if profile:
+                path = Path(self.profile_dir) / f"{name}.prof"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(path)
+            logger.info(f"Phase '{name}': {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s CPU, "
+                        f"peak RSS {record['peak_rss_mb']:.0f} MB" + (f", {record['rows']} rows" if record['rows'] is not None else ""))
+
+    def restore(self, phases):
+        """Add phase records measured by an earlier run (checkpoint resume)."""
+        for name, record in phases.items():
+            self.phases[name] = {**record, 'from_checkpoint': True}
+
+    def summary(self):
+        """Timing section for evaluation.json."""
+        return {
+            'phases': {name: {key: _round(value) for key, value in record.items()} for name, record in self.phases.items()},
+            'total': {
+                'wall_s': _round(time.perf_counter() - self._start_wall),
+                'cpu_s': _round(time.process_time() - self._start_cpu),
+                'peak_rss_mb': _round(max([r['peak_rss_mb'] for r in self.phases.values() if not r.get('from_checkpoint')], default=_peak_rss_mb())),
+            },
+        }
+
+def _round(value):
+    return round(value, 3) if isinstance(value, float) else value
+
+def _reset_peak_rss():
+    # Linux >= 4.0: writing 5 resets VmHWM to the current RSS
+    with contextlib.suppress(OSError):
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+
+def _proc_status_mb(field):
+    with contextlib.suppress(OSError):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    return None
+
+def _peak_rss_mb():
+    peak = _proc_status_mb('VmHWM')
+    if peak is None and resource is not None:
+        # ru_maxrss is in kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+    return peak if peak is not None else float('nan')
+
+def _current_rss_mb():
+    rss = _proc_status_mb('VmRSS')
+    return rss if rss is not None else float('nan')
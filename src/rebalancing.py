@@ -0,0 +1,113 @@
+import numpy as np
+from imblearn.over_sampling import SMOTE
+import logging
+
+logger = logging.getLogger(__name__)
+
+REBALANCE_MODES = ('smote', 'sample_weight', 'undersample', 'focal')
+
+def get_rebalance_mode(config):
+    """Rebalancing mode from config, falling back to the legacy `use_smote` flag."""
+    mode = config.get('rebalance')
+    if mode is None:
+        mode = 'smote' if config.get('use_smote', True) else 'sample_weight'
+    if mode not in REBALANCE_MODES:
+        raise ValueError(f"Unknown rebalance mode '{mode}', expected one of {REBALANCE_MODES}")
+    return mode
+
+def rebalance(X, y, mode, random_seed=42):
+    """
+    Rebalance a training set.
+
+    Modes:
+        smote: oversample the minority class with SMOTE (kNN over all minority points)
+        sample_weight: keep the data as is, return class-balanced sample weights
+        undersample: returned unchanged; bags are drawn by `negative_subsample_bags`
+        focal: returned unchanged; the boosters train with the focal-loss objective instead
+
+    Returns:
+        (X, y, sample_weight): sample_weight is None unless mode is 'sample_weight'.
+    """
+    pos_count = int(y.sum())
+    minority = 0 < pos_count < len(y) * 0.5
+
+    if mode == 'smote' and minority and pos_count < 2:
+        # SMOTE interpolates between minority neighbours; a single positive has none
+        logger.warning(f"SMOTE needs at least 2 positive samples, got {pos_count}: using sample weights")
+        mode = 'sample_weight'
+
+    if mode == 'smote' and minority:
+        logger.info(f"Original class distribution: {np.bincount(y.astype(int))}")
+        smote = SMOTE(random_state=random_seed, k_neighbors=min(5, pos_count - 1))
+        X, y = smote.fit_resample(X, y)
+        logger.info(f"After SMOTE: {np.bincount(y.astype(int))}")
+        return X, y, None
+
+    if mode == 'sample_weight' and minority:
+        sample_weight = np.where(y == 1, (len(y) - pos_count) / pos_count, 1.0)
+        return X, y, sample_weight
+
+    return X, y, None
+
+def negative_subsample_bags(y, n_bags, neg_pos_ratio, random_seed=42):
+    """
+    Index sets for negative-subsampling bagging: every bag keeps all positives and
+    `neg_pos_ratio` negatives per positive, drawn without replacement.
+
+    Returns:
+        (bags, sampling_rate): list of index arrays and the fraction of negatives kept.
+    """
+    rng = np.random.default_rng(random_seed)
+    pos_idx = np.flatnonzero(y == 1)
+    neg_idx = np.flatnonzero(y != 1)
+    n_neg = min(len(neg_idx), int(np.ceil(neg_pos_ratio * len(pos_idx))))
+
+    bags = [np.sort(np.concatenate([pos_idx, rng.choice(neg_idx, n_neg, replace=False)])) for _ in range(n_bags)]
+    sampling_rate = n_neg / len(neg_idx) if len(neg_idx) else 1.0
+
+    logger.info(f"Negative subsampling: {n_bags} bags of {len(pos_idx)} pos + {n_neg} neg (rate {sampling_rate:.3f})")
+    return bags, sampling_rate
+
+def correct_subsampled_probs(probs, sampling_rate, pos_weight=1.0):
+    """
+    Undo the prior shift from keeping only `sampling_rate` of the negatives and
+    training with positives weighted by `pos_weight` (e.g. scale_pos_weight): both
+    scale the odds the booster learns, by pos_weight / sampling_rate.
+    """
+    factor = sampling_rate / pos_weight
+    return probs * factor / (probs * factor + 1 - probs)
+
+
+class BaggedBooster:
+    """
+    Average of boosters trained on negative-subsampled bags.
+
+    Exposes the subset of the LightGBM/XGBoost Booster API used by the intent models,
+    so it can stand in for a single booster. `pos_weight` is the positive-class weight
+    the bag boosters were trained with; predictions are corrected for it as well.
+    """
+
+    def __init__(self, boosters, sampling_rate, pos_weight=1.0):
+        self.boosters = boosters
+        self.sampling_rate = sampling_rate
+        self.pos_weight = pos_weight
+
+    @property
+    def best_iteration(self):
+        return max(b.best_iteration for b in self.boosters)
+
+    def predict(self, data, **kwargs):
+        probs = np.mean([b.predict(data, **kwargs) for b in self.boosters], axis=0)
+        return correct_subsampled_probs(probs, self.sampling_rate, self.pos_weight)
+
+    def feature_importance(self, importance_type='gain'):
+        # LightGBM
+        return np.mean([b.feature_importance(importance_type=importance_type) for b in self.boosters], axis=0)
+
+    def get_score(self, importance_type='gain'):
+        # XGBoost
+        scores = {}
+        for b in self.boosters:
+            for feat, value in b.get_score(importance_type=importance_type).items():
+                scores[feat] = scores.get(feat, 0.0) + value / len(self.boosters)
+        return scores
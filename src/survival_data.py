@@ -68,3 +68,83 @@ def prepare_survival_data(df1, df2, company_features):
     
     logger.info(f"Survival data prepared: {final_df.shape} rows.")
     return final_df
+
+TIME_VARYING_COLUMNS = ['n_bookings', 'booked_amount_inr', 'n_payments', 'n_late_payments', 'n_overdue', 'max_days_to_payment']
+
+def prepare_time_varying_survival_data(df1, df2, company_features=None):
+    """
+    Long-format (start, stop] episodes per company for a time-varying Cox model.
+    
+    Time runs from each company's first booking (snapshot_date - days_since_first_booking,
+    so the last `stop` equals `T` of prepare_survival_data). A new episode starts on
+    every day a DS2 booking, due date or payment changes the company's payment history:
+        n_bookings, booked_amount_inr: bookings made so far
+        n_payments, n_late_payments: payments received so far, and those after the due date
+        n_overdue: bookings currently past due and unpaid
+        max_days_to_payment: worst payment delay so far
+    Each change is one signed row; episodes come from a grouped cumulative sum over the
+    time-sorted changes, with no per-company loop. E (default_flag) is set on the last
+    episode only.
+    
+    Args:
+        df1: Dataset 1 (Company Profiles) - default_flag, days_since_first_booking, snapshot_date
+        df2: Dataset 2 (Transactions) - booking, due and received dates
+        company_features: Optional static covariates (company_id plus columns) merged onto every episode
+    
+    Returns:
+        pd.DataFrame: company_id, start, stop, E and covariates, sorted by company and start.
+    """
+    logger.info("Preparing time-varying survival data...")
+    companies = df1[['company_id', 'default_flag', 'days_since_first_booking']].rename(columns={'default_flag': 'E', 'days_since_first_booking': 'end'})
+    if 'snapshot_date' in df1.columns:
+        snapshot = pd.to_datetime(df1['snapshot_date'])
+    else:
+        # No snapshot: follow-up ends at the last recorded transaction date
+        snapshot = pd.Series(df2[['booking_date', 'payment_due_date', 'payment_received_date']].max().max(), index=df1.index)
+    companies['origin'] = snapshot - pd.to_timedelta(companies['end'], unit='D')
+    companies = companies[companies['end'] > 0]
+    
+    received = df2['payment_received_date'].notna()
+    late = received & (df2['payment_received_date'] > df2['payment_due_date'])
+    overdue = ~received | late
+    changes = pd.concat([
+        # Every company starts with an empty history at t = 0
+        pd.DataFrame({'company_id': companies['company_id'].values, 'date': companies['origin'].values}),
+        pd.DataFrame({'company_id': df2['company_id'], 'date': df2['booking_date'],
+                      'n_bookings': 1, 'booked_amount_inr': df2['booking_amount_inr']}),
+        pd.DataFrame({'company_id': df2.loc[overdue, 'company_id'], 'date': df2.loc[overdue, 'payment_due_date'], 'n_overdue': 1}),
+        pd.DataFrame({'company_id': df2.loc[received, 'company_id'], 'date': df2.loc[received, 'payment_received_date'],
+                      'n_payments': 1, 'n_late_payments': late[received].astype(int), 'n_overdue': -late[received].astype(int),
+                      'max_days_to_payment': df2.loc[received, 'days_to_payment']}),
+    ], ignore_index=True)
+    
+    changes = changes.merge(companies[['company_id', 'origin', 'end']], on='company_id', how='inner')
+    changes['start'] = (changes['date'] - changes['origin']).dt.days.clip(lower=0)
+    changes = changes[changes['start'] < changes['end']]
+    
+    # Same-day changes form one episode boundary
+    sums = ['n_bookings', 'booked_amount_inr', 'n_payments', 'n_late_payments', 'n_overdue']
+    episodes = changes.groupby(['company_id', 'start'], sort=True).agg(
+        {**{c: 'sum' for c in sums}, 'max_days_to_payment': 'max'}
+    ).reset_index()
+    grouped = episodes.groupby('company_id', sort=False)
+    episodes[sums] = grouped[sums].cumsum()
+    counts = ['n_bookings', 'n_payments', 'n_late_payments', 'n_overdue']
+    episodes[counts] = episodes[counts].astype(int)
+    # cummax leaves days without a payment as NaN: carry the previous maximum forward
+    episodes['max_days_to_payment'] = grouped['max_days_to_payment'].cummax()
+    episodes['max_days_to_payment'] = episodes.groupby('company_id', sort=False)['max_days_to_payment'].ffill().fillna(0)
+    
+    episodes = episodes.merge(companies[['company_id', 'E', 'end']], on='company_id', how='left')
+    next_start = grouped['start'].shift(-1)
+    last = next_start.isna()
+    episodes['stop'] = next_start.fillna(episodes['end']).astype(episodes['start'].dtype)
+    episodes['E'] = np.where(last, episodes['E'], 0)
+    episodes = episodes[['company_id', 'start', 'stop', 'E'] + TIME_VARYING_COLUMNS]
+    
+    if company_features is not None:
+        static = company_features.drop(columns=['default_flag', 'fraud_flag'], errors='ignore')
+        episodes = episodes.merge(static, on='company_id', how='inner')
+    
+    logger.info(f"Time-varying survival data prepared: {len(episodes)} episodes for {episodes['company_id'].nunique()} companies.")
+    return episodes.reset_index(drop=True)
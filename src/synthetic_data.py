@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_TERMS_DAYS = 30
+HISTORY_DAYS = 240
+TEMPLATE_PATH = Path(__file__).parent.parent / 'dataset' / 'dataset1.csv'
+
+def generate_datasets(n_companies=1000, n_transactions=None, seed=42, template_path=TEMPLATE_PATH):
+    """
+    Seeded synthetic DS1/DS2/DS3 with the schema of the real datasets, at any scale.
+
+    DS1 rows are drawn (with replacement) from the template company profiles, so every
+    column, dtype and the joint distribution (including fraud/default labels) carry
+    over; float columns get a small multiplicative jitter, clipped to the template's
+    range. DS2 bookings (default 8 per company) follow each company's profile: booking
+    volume, ticket size, payment delay, chargeback rate and default flag. DS3 has one
+    session per booking, with fraudulent companies sharing devices and IPs from a
+    common pool so the graph has fraud rings. Everything is vectorized.
+
+    Returns:
+        (df1, df2, df3) DataFrames, dates as datetimes (as load_datasets returns them)
+    """
+    rng = np.random.default_rng(seed)
+    n_transactions = 8 * n_companies if n_transactions is None else n_transactions
+    template = pd.read_csv(template_path)
+    df1 = _companies(template, n_companies, rng)
+    df2 = _transactions(df1, n_transactions, rng)
+    df3 = _sessions(df1, df2, rng)
+    logger.info(f"Generated synthetic datasets: DS1 {df1.shape}, DS2 {df2.shape}, DS3 {df3.shape}")
+    return df1, df2, df3
+
+def write_datasets(df1, df2, df3, out_dir):
+    """Write the three datasets as CSV; returns a config 'data' section pointing at them."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {f'dataset{i}_path': str(out_dir / f'dataset{i}.csv') for i in (1, 2, 3)}
+    for i, df in enumerate([df1, df2, df3], start=1):
+        df.to_csv(paths[f'dataset{i}_path'], index=False)
+    return paths
+
+def _padded_ids(prefix, n, min_width):
+    width = max(min_width, len(str(n)))
+    return _labels(prefix, range(1, n + 1), width)
+
+def _labels(prefix, ids, width=0):
+    # One Python string per row, built once: these columns dominate memory at scale
+    return np.array([f'{prefix}{i:0{width}d}' for i in ids], dtype=object)
+
+def _companies(template, n, rng):
+    df1 = template.iloc[rng.integers(0, len(template), n)].reset_index(drop=True)
+    df1['company_id'] = _padded_ids('IN-TRV-', n, 6)
+    for col in template.select_dtypes(include='float').columns:
+        jitter = np.exp(rng.normal(0, 0.05, n))
+        df1[col] = (df1[col].values * jitter).clip(template[col].min(), template[col].max())
+    return df1
+
+def _transactions(df1, n, rng):
+    # Busier companies book more often
+    weights = df1['bookings_30d'].to_numpy(dtype=np.float64) if 'bookings_30d' in df1 else np.ones(len(df1))
+    company = rng.choice(len(df1), size=n, p=weights / weights.sum())
+
+    def profile(col, default):
+        # Per-booking copy of one company column (not the whole 90-column profile)
+        return df1[col].to_numpy(dtype=np.float64)[company] if col in df1 else np.full(n, default)
+
+    snapshot = pd.to_datetime(df1['snapshot_date'].iloc[0]) if 'snapshot_date' in df1 else pd.Timestamp('2026-02-15')
+    booking_date = snapshot - pd.to_timedelta(rng.integers(0, HISTORY_DAYS, n), unit='D')
+    due_date = booking_date + pd.Timedelta(days=PAYMENT_TERMS_DAYS)
+    delay = rng.normal(PAYMENT_TERMS_DAYS + 0.5 * profile('avg_late_payment_days', 15.0), 12)
+    days_to_payment = np.rint(delay).clip(0, 180).astype(np.int64)
+
+    p_chargeback = profile('chargeback_rate', 0.02)
+    p_default = 0.02 + 0.10 * profile('default_flag', 0.3)
+    u = rng.random(n)
+    code = np.select([u < p_chargeback, u < p_chargeback + p_default, u < p_chargeback + p_default + 0.08], [0, 1, 2], default=3)
+    status = np.array(['chargeback', 'defaulted', 'pending', 'paid'], dtype=object)[code]
+    received = booking_date + pd.to_timedelta(days_to_payment, unit='D')
+    # Payments that would land after the snapshot have not arrived yet
+    status[(status == 'paid') & (received > snapshot)] = 'pending'
+    paid = status == 'paid'
+
+    amount = profile('avg_booking_value_inr', 15000.0) * rng.lognormal(0, 0.5, n)
+    return pd.DataFrame({
+        'booking_id': _padded_ids('B', n, 7),
+        'company_id': df1['company_id'].values[company],
+        'booking_date': booking_date,
+        'payment_due_date': due_date,
+        'payment_received_date': received.where(paid),
+        'payment_status': status,
+        'chargeback_flag': (status == 'chargeback').astype(np.int64),
+        'days_to_payment': days_to_payment,
+        'booking_amount_inr': amount,
+        'settled_amount_inr': np.where(paid, amount, 0.0),
+    })
+
+def _sessions(df1, df2, rng):
+    n = len(df2)
+    company = pd.Index(df1['company_id']).get_indexer(df2['company_id'])
+    fraud = df1['fraud_flag'].to_numpy()[company] == 1 if 'fraud_flag' in df1 else np.zeros(n, dtype=bool)
+    ring_size = max(5, int(df1.get('fraud_flag', pd.Series([0])).sum()) // 10)
+
+    def entity(prefix, per_company, p_ring):
+        # Own pool of `per_company` ids per company; fraudulent companies often use a shared ring id
+        ids = company * per_company + rng.integers(0, per_company, n)
+        ring = fraud & (rng.random(n) < p_ring)
+        ids[ring] = len(df1) * per_company + rng.integers(0, ring_size, int(ring.sum()))
+        return _labels(prefix, ids.tolist())
+
+    return pd.DataFrame({
+        'booking_id': df2['booking_id'].values,
+        'company_id': df2['company_id'].values,
+        'device_fingerprint': entity('DEV', 3, 0.5),
+        'payment_method_id': entity('PM', 2, 0.3),
+        'ip_address': entity('IP', 4, 0.5),
+        'timestamp': df2['booking_date'] + pd.to_timedelta(rng.integers(0, 86400, n), unit='s'),
+    })
@@ -0,0 +1,77 @@
+import os
+import contextlib
+import torch
+import logging
+
+logger = logging.getLogger(__name__)
+
+def configure_torch_cpu(runtime_cfg):
+    """
+    Apply the CPU performance profile from the `torch_runtime` config section.
+
+    Keys (all optional):
+        num_threads: intra-op threads (default: all available cores)
+        interop_threads: inter-op threads
+        cpu_affinity: list of core ids to pin the process to
+    """
+    runtime_cfg = runtime_cfg or {}
+
+    cpu_affinity = runtime_cfg.get('cpu_affinity')
+    if cpu_affinity:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpu_affinity)
+            logger.info(f"Pinned process to cores {sorted(cpu_affinity)}")
+        else:
+            logger.warning("cpu_affinity is not supported on this platform, ignoring")
+
+    num_threads = runtime_cfg.get('num_threads') or available_cores()
+    torch.set_num_threads(num_threads)
+
+    interop_threads = runtime_cfg.get('interop_threads')
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op parallel work has started
+            logger.warning(f"Could not set inter-op threads: {e}")
+
+    logger.info(f"Torch CPU profile: {torch.get_num_threads()} intra-op / "
+                f"{torch.get_num_interop_threads()} inter-op threads")
+
+def available_cores():
+    """Number of cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def autocast(enabled):
+    """bfloat16 autocast on CPU, or a no-op context."""
+    if enabled:
+        return torch.autocast('cpu', dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+def compile_model(model, x_dict, edge_index_dict):
+    """
+    torch.compile a HeteroGNN, falling back to eager mode if compilation fails.
+
+    Compilation is lazy, so a warm-up forward is run here to surface errors early.
+    """
+    if not hasattr(torch, 'compile'):
+        logger.warning("torch.compile is not available, using eager mode")
+        return model
+
+    was_training = model.training
+    model.eval()
+    try:
+        with torch.no_grad():
+            # Eager pass first so lazy (-1) layers are materialized before tracing
+            model(x_dict, edge_index_dict)
+            compiled = torch.compile(model, dynamic=True)
+            compiled(x_dict, edge_index_dict)
+        logger.info("Compiled GNN with torch.compile")
+        return compiled
+    except Exception as e:
+        logger.warning(f"torch.compile failed, using eager mode: {e}")
+        return model
+    finally:
+        model.train(was_training)
@@ -0,0 +1,240 @@
+import tempfile
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+import optuna
+from optuna.trial import TrialState
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+import logging
+from src.binned_data import BinnedDataCache
+from src.torch_runtime import available_cores
+
+logger = logging.getLogger(__name__)
+
+def lgb_search_space(trial):
+    """LightGBM search space (number of rounds comes from CV early stopping)."""
+    return {
+        'num_leaves': trial.suggest_int('num_leaves', 20, 150),
+        'max_depth': trial.suggest_int('max_depth', 3, 12),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+        'min_child_samples': trial.suggest_int('min_child_samples', 5, 50),
+        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+        'reg_alpha': trial.suggest_float('reg_alpha', 1e-3, 10.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
+    }
+
+def xgb_search_space(trial):
+    """XGBoost search space (number of rounds comes from CV early stopping)."""
+    return {
+        'max_depth': trial.suggest_int('max_depth', 3, 10),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+        'min_child_weight': trial.suggest_float('min_child_weight', 1.0, 20.0, log=True),
+        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+        'reg_alpha': trial.suggest_float('reg_alpha', 1e-3, 10.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-3, 10.0, log=True),
+    }
+
+
+class LightGBMPruningCallback:
+    """Report the CV-mean AUC to Optuna after every boosting round and prune bad trials."""
+
+    def __init__(self, trial, metric='auc'):
+        self.trial = trial
+        self.metric = metric
+
+    def __call__(self, env):
+        for result in env.evaluation_result_list:
+            if result[1] == self.metric:
+                self.trial.report(result[2], step=env.iteration)
+                break
+        if self.trial.should_prune():
+            raise optuna.TrialPruned(f"Pruned at iteration {env.iteration}")
+
+
+def _xgb_cv(params, fold_matrices, max_rounds, early_stopping_rounds, trial):
+    """
+    Lockstep k-fold XGBoost CV on prebuilt fold matrices (xgb.cv would slice and
+    re-bin the data on every trial). Reports the CV mean to Optuna every round.
+
+    Returns:
+        list: CV mean score per round, truncated at the best round.
+    """
+    boosters = [xgb.Booster(params, [dtrain, dtest]) for dtrain, dtest in fold_matrices]
+    scores = []
+    best_round = 0
+    for i in range(max_rounds):
+        fold_scores = []
+        for booster, (dtrain, dtest) in zip(boosters, fold_matrices):
+            booster.update(dtrain, i)
+            # "[i]\ttest-auc:0.93"
+            fold_scores.append(float(booster.eval(dtest, 'test').split(':')[-1]))
+        scores.append(float(np.mean(fold_scores)))
+
+        trial.report(scores[-1], step=i)
+        if trial.should_prune():
+            raise optuna.TrialPruned(f"Pruned at iteration {i}")
+
+        if scores[-1] > scores[best_round]:
+            best_round = i
+        elif i - best_round >= early_stopping_rounds:
+            break
+    return scores[:best_round + 1]
+
+
+def _make_pruner(name, max_rounds):
+    if name == 'hyperband':
+        return optuna.pruners.HyperbandPruner(min_resource=10, max_resource=max_rounds, reduction_factor=3)
+    if name == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=20)
+    return optuna.pruners.NopPruner()
+
+def _tuning_settings(config):
+    tuning_cfg = config.get('tuning', {})
+    return {
+        'n_trials': config.get('optuna_trials', 50),
+        'n_jobs': tuning_cfg.get('n_jobs', 1) or 1,
+        'cv_folds': tuning_cfg.get('cv_folds', 5),
+        'pruner': tuning_cfg.get('pruner', 'hyperband'),
+        'max_rounds': tuning_cfg.get('max_rounds', 1000),
+        'early_stopping_rounds': tuning_cfg.get('early_stopping_rounds', 50),
+        'storage': tuning_cfg.get('storage'),
+        'max_bin': config.get('max_bin', 255),
+        'study_name': tuning_cfg.get('study_name', 'aerox_intent'),
+        'seed': config.get('random_seed', 42),
+    }
+
+def _cv_objective(learner, X, y, base_params, settings, num_threads, binned=None):
+    """Build the Optuna objective: stratified k-fold CV AUC with per-iteration pruning."""
+    folds = list(StratifiedKFold(n_splits=settings['cv_folds'], shuffle=True, random_state=settings['seed']).split(X, y))
+    binned = binned or BinnedDataCache(max_bin=settings['max_bin'])
+    binned.nthread = num_threads
+
+    # Bin once here; every trial reuses the same histograms
+    if learner == 'lgb':
+        dataset = binned.lgb_dataset(X, y, persist=True)
+    else:
+        fold_matrices = []
+        for train_idx, test_idx in folds:
+            dtrain = binned.xgb_matrix(X[train_idx], y[train_idx])
+            fold_matrices.append((dtrain, binned.xgb_matrix(X[test_idx], y[test_idx], ref=dtrain)))
+
+    def objective(trial):
+        if learner == 'lgb':
+            params = {**base_params, **lgb_search_space(trial), 'num_threads': num_threads, 'verbose': -1}
+            result = lgb.cv(
+                params, dataset,
+                num_boost_round=settings['max_rounds'],
+                folds=folds,
+                callbacks=[
+                    lgb.early_stopping(stopping_rounds=settings['early_stopping_rounds'], verbose=False),
+                    LightGBMPruningCallback(trial, 'auc')
+                ]
+            )
+            scores = result['valid auc-mean']
+        else:
+            params = {**base_params, **xgb_search_space(trial), 'nthread': num_threads, 'max_bin': binned.max_bin}
+            scores = _xgb_cv(params, fold_matrices, settings['max_rounds'], settings['early_stopping_rounds'], trial)
+
+        # Early stopping truncates the history at the best iteration
+        trial.set_user_attr('n_estimators', len(scores))
+        return float(scores[-1])
+
+    return objective
+
+def _run_worker(learner, X, y, base_params, settings, study_name, worker_id, num_threads, binned):
+    """One tuning worker process: attach to the shared study and run trials until the budget is spent."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=settings['storage'],
+        sampler=optuna.samplers.TPESampler(seed=settings['seed'] + worker_id),
+        pruner=_make_pruner(settings['pruner'], settings['max_rounds'])
+    )
+    objective = _cv_objective(learner, X, y, base_params, settings, num_threads, binned)
+    budget = optuna.study.MaxTrialsCallback(settings['n_trials'], states=(TrialState.COMPLETE, TrialState.PRUNED))
+    study.optimize(objective, n_trials=settings['n_trials'], callbacks=[budget])
+
+def tune(learner, X, y, config, base_params, study_suffix, binned=None):
+    """
+    Tune a LightGBM ('lgb') or XGBoost ('xgb') learner with stratified k-fold CV.
+
+    Trials run in `tuning.n_jobs` parallel workers and report per-iteration AUC so the
+    Hyperband/median pruner can stop bad trials early. With `tuning.storage` set
+    (e.g. sqlite:///models/optuna_studies.db) workers are separate processes sharing the
+    study, and an interrupted study resumes where it stopped on the next run on the same
+    training data (a study run on other data is replaced).
+    Training data is binned once (`binned`, a BinnedDataCache) and shared by all trials;
+    for worker processes the LightGBM bins are saved before they start (to its cache_dir,
+    or a temporary directory) and each worker loads them.
+
+    Returns:
+        dict: best parameters, including `n_estimators` from CV early stopping.
+    """
+    settings = _tuning_settings(config)
+    study_name = f"{settings['study_name']}_{study_suffix}"
+    n_jobs = settings['n_jobs']
+    num_threads = max(1, available_cores() // n_jobs)
+
+    def create_study():
+        return optuna.create_study(
+            study_name=study_name,
+            storage=settings['storage'],
+            direction='maximize',
+            sampler=optuna.samplers.TPESampler(seed=settings['seed']),
+            pruner=_make_pruner(settings['pruner'], settings['max_rounds']),
+            load_if_exists=True
+        )
+
+    # A stored study only resumes on the training data it was run on
+    digest = (binned or BinnedDataCache(max_bin=settings['max_bin'])).data_digest(X, y)
+    study = create_study()
+    if study.trials and study.user_attrs.get('data_digest') != digest:
+        logger.warning(f"Optuna study '{study_name}' was run on different training data, starting a new study")
+        optuna.delete_study(study_name=study_name, storage=settings['storage'])
+        study = create_study()
+    study.set_user_attr('data_digest', digest)
+    done = len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE, TrialState.PRUNED)))
+    remaining = settings['n_trials'] - done
+    logger.info(f"Optuna study '{study_name}': {done} trials done, {max(remaining, 0)} to run "
+                f"({n_jobs} workers x {num_threads} threads, {settings['cv_folds']}-fold CV, pruner={settings['pruner']})")
+
+    if remaining > 0:
+        if settings['storage'] and n_jobs > 1:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # Workers get an empty in-memory cache: bin and save here, once, so they only load the file
+                if binned is None or not binned.cache_dir:
+                    binned = BinnedDataCache(tmp_dir, max_bin=settings['max_bin'])
+                if learner == 'lgb':
+                    binned.lgb_dataset(X, y, persist=True)
+                Parallel(n_jobs=n_jobs)(
+                    delayed(_run_worker)(learner, X, y, base_params, settings, study_name, worker_id, num_threads, binned)
+                    for worker_id in range(n_jobs)
+                )
+        else:
+            # In-memory studies cannot be shared across processes; boosters release the GIL
+            objective = _cv_objective(learner, X, y, base_params, settings, num_threads, binned)
+            study.optimize(objective, n_trials=remaining, n_jobs=n_jobs)
+
+    complete = study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+    n_pruned = len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+    if not complete:
+        raise RuntimeError(f"Optuna study '{study_name}' has no completed trials")
+
+    best = study.best_trial
+    logger.info(f"Optuna tuning complete ({len(complete)} complete, {n_pruned} pruned). "
+                f"Best CV AUC: {best.value:.4f}")
+    logger.info(f"Best parameters: {best.params}")
+    return {**best.params, 'n_estimators': best.user_attrs['n_estimators']}
+
+def compute_scale_pos_weight(y, sample_weight=None):
+    """Negative/positive (weighted) ratio used to reweight the minority class."""
+    if sample_weight is None:
+        pos_count = y.sum()
+        neg_count = len(y) - pos_count
+    else:
+        pos_count = sample_weight[y == 1].sum()
+        neg_count = sample_weight[y != 1].sum()
+    return neg_count / pos_count if pos_count > 0 else 1.0
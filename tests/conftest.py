@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Modules import each other as src.*, and train_pipeline / run_experiments live at the root
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
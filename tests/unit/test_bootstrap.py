@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.metrics import roc_auc_score, average_precision_score, recall_score
+
+from src.bootstrap import (
+    bootstrap_indices, roc_auc_rows, average_precision_rows, recall_rows, bootstrap_intent_ci,
+)
+
+
+@pytest.fixture
+def resampled():
+    rng = np.random.default_rng(2)
+    y = (rng.random(300) < 0.2).astype(int)
+    # Coarse scores so resamples contain plenty of ties
+    scores = np.round(0.4 * y + rng.random(len(y)), 1)
+    idx = bootstrap_indices(len(y), 50, seed=0, strata=y)
+    return y[idx], scores[idx]
+
+
+def test_roc_auc_rows_match_sklearn(resampled):
+    y, scores = resampled
+    expected = [roc_auc_score(yi, si) for yi, si in zip(y, scores)]
+    np.testing.assert_allclose(roc_auc_rows(y, scores), expected)
+
+
+def test_average_precision_rows_match_sklearn(resampled):
+    y, scores = resampled
+    expected = [average_precision_score(yi, si) for yi, si in zip(y, scores)]
+    np.testing.assert_allclose(average_precision_rows(y, scores), expected)
+
+
+def test_recall_rows_match_sklearn(resampled):
+    y, scores = resampled
+    expected = [recall_score(yi, (si >= 0.5).astype(int)) for yi, si in zip(y, scores)]
+    np.testing.assert_allclose(recall_rows(y, scores, 0.5), expected)
+
+
+def test_stratified_resamples_keep_class_counts():
+    y = np.array([1] * 7 + [0] * 93)
+    idx = bootstrap_indices(len(y), 20, seed=3, strata=y)
+    assert idx.shape == (20, 100)
+    assert np.all(y[idx].sum(axis=1) == 7)
+
+
+def test_intent_ci_brackets_the_point_estimate():
+    rng = np.random.default_rng(4)
+    y = (rng.random(400) < 0.2).astype(int)
+    scores = np.clip(0.3 * y + rng.random(len(y)), 0, 1)
+    ci = bootstrap_intent_ci(y, scores, threshold=0.5, n_resamples=200, seed=0, block_size=64)
+    auc = ci['roc_auc']
+    assert auc['estimate'] == pytest.approx(roc_auc_score(y, scores))
+    assert auc['ci_lower'] <= auc['estimate'] <= auc['ci_upper']
+    # Blocks and workers do not change the resamples
+    assert bootstrap_intent_ci(y, scores, threshold=0.5, n_resamples=200, seed=0, n_jobs=2, block_size=64) == ci
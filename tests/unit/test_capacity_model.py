@@ -0,0 +1,56 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.capacity_model import CapacityModel
+
+TIMES = (0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+@pytest.fixture
+def survival_df():
+    rng = np.random.default_rng(0)
+    n = 400
+    X = rng.normal(size=(n, 4)) * [1, 2, 3, 0.5] + [5, 0, 1, 2]
+    df = pd.DataFrame(X, columns=['a', 'b', 'c', 'd'])
+    df['T'] = np.round(rng.exponential(np.exp(-(X - X.mean(0)) @ [0.5, -0.3, 0.0, 0.4])), 3)
+    df['E'] = (rng.random(n) < 0.7).astype(int)
+    return df
+
+
+def _reference(model, df):
+    return model.cph.predict_survival_function(model.pruner.transform(df), times=TIMES).T.to_numpy()
+
+
+@pytest.mark.parametrize('solver', ['lifelines', 'coxnet'])
+def test_predict_horizons_matches_survival_function(survival_df, solver):
+    model = CapacityModel(penalizer=0.05, solver=solver, pruning={})
+    model.fit(survival_df)
+    X = survival_df.drop(columns=['T', 'E'])
+    np.testing.assert_allclose(model.predict_horizons(X, TIMES), _reference(model, X), atol=1e-8)
+    # Arrays are taken in feature_names order
+    np.testing.assert_allclose(model.predict_horizons(X[model.feature_names].to_numpy(), TIMES),
+                               _reference(model, X), atol=1e-8)
+
+
+@pytest.mark.parametrize('solver', ['lifelines', 'coxnet'])
+def test_predict_horizons_without_training_means(survival_df, solver):
+    # Models saved before train_mean_ existed centre from the fitter's own predictions
+    model = CapacityModel(penalizer=0.05, solver=solver, pruning={})
+    model.fit(survival_df)
+    X = survival_df.drop(columns=['T', 'E'])
+    del model.train_mean_
+    model._scoring = None
+    np.testing.assert_allclose(model.predict_horizons(X, TIMES), _reference(model, X), atol=1e-8)
+
+
+def test_predict_horizons_from_a_legacy_file(survival_df, tmp_path):
+    model = CapacityModel(penalizer=0.05, pruning={})
+    model.fit(survival_df)
+    X = survival_df.drop(columns=['T', 'E'])
+    path = tmp_path / 'capacity_cox.pkl'
+    # Older files held only the fitted CoxPHFitter
+    joblib.dump(model.cph, path)
+    legacy = CapacityModel.load(path)
+    np.testing.assert_allclose(legacy.predict_horizons(X, TIMES), _reference(model, X), atol=1e-8)
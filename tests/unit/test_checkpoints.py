@@ -0,0 +1,117 @@
+import copy
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_pipeline
+from train_pipeline import save_checkpoint, load_checkpoints, config_fingerprint
+
+CONFIG = {
+    'data': {'dataset1_path': 'dataset/dataset1.csv', 'random_seed': 42},
+    'feature_engineering': {'velocity_windows': [7, 30]},
+    'intent_model': {'type': 'ensemble', 'use_gnn_embeddings': False, 'threshold_mode': 'f2'},
+    'capacity_model': {'penalizer': 0.1},
+    'evaluation': {'bootstrap_resamples': 100},
+}
+OUTPUTS = {
+    'data': {'df1': pd.DataFrame({'company_id': ['A', 'B'], 'fraud_flag': [0, 1]})},
+    'features': {'features_df': pd.DataFrame({'x': [0.5, 1.5]})},
+    'split': {'train_idx': np.array([0]), 'test_idx': np.array([1])},
+    'scaling': {'X': np.eye(2, dtype=np.float32)},
+}
+
+
+@pytest.fixture
+def checkpoint_dir(tmp_path):
+    args = Namespace(warm_start=False)
+    for name, outputs in OUTPUTS.items():
+        save_checkpoint(name, outputs, tmp_path, CONFIG, args)
+    return tmp_path
+
+
+def _edited(key, value):
+    config = copy.deepcopy(CONFIG)
+    section, leaf = key.split('.')
+    config[section][leaf] = value
+    return config
+
+
+def test_round_trip_restores_every_output(checkpoint_dir):
+    state = load_checkpoints(list(OUTPUTS), checkpoint_dir, CONFIG, Namespace(warm_start=False))
+    assert set(state) == {key for outputs in OUTPUTS.values() for key in outputs}
+    pd.testing.assert_frame_equal(state['df1'], OUTPUTS['data']['df1'])
+    pd.testing.assert_frame_equal(state['features_df'], OUTPUTS['features']['features_df'])
+    np.testing.assert_array_equal(state['train_idx'], OUTPUTS['split']['train_idx'])
+    np.testing.assert_array_equal(state['X'], OUTPUTS['scaling']['X'])
+
+
+def test_later_stage_config_does_not_invalidate_earlier_checkpoints(checkpoint_dir):
+    for config in (_edited('capacity_model.penalizer', 1.0), _edited('intent_model.threshold_mode', 'f05')):
+        load_checkpoints(list(OUTPUTS), checkpoint_dir, config, Namespace(warm_start=False))
+
+
+def test_changed_dependency_is_refused(checkpoint_dir):
+    config = _edited('feature_engineering.velocity_windows', [7])
+    args = Namespace(warm_start=False)
+    # The data checkpoint does not depend on feature_engineering, features and later ones do
+    load_checkpoints(['data'], checkpoint_dir, config, args)
+    with pytest.raises(ValueError, match="features"):
+        load_checkpoints(list(OUTPUTS), checkpoint_dir, config, args)
+    state = load_checkpoints(list(OUTPUTS), checkpoint_dir, config, args, ignore_config_change=True)
+    assert 'X' in state
+
+
+def test_features_depend_on_the_gnn_embedding_switch():
+    args = Namespace(warm_start=False)
+    edited = _edited('intent_model.use_gnn_embeddings', True)
+    assert config_fingerprint(edited, args, 'data') == config_fingerprint(CONFIG, args, 'data')
+    assert config_fingerprint(edited, args, 'features') != config_fingerprint(CONFIG, args, 'features')
+
+
+def test_features_depend_on_the_embeddings_file_contents(tmp_path):
+    args = Namespace(warm_start=False)
+    path = tmp_path / 'embeddings.npz'
+    config = _edited('intent_model.use_gnn_embeddings', True)
+    config['intent_model']['gnn_embeddings_path'] = str(path)
+    path.write_bytes(b'first')
+    before = config_fingerprint(config, args, 'features')
+    path.write_bytes(b'regenerated')
+    assert config_fingerprint(config, args, 'features') != before
+    # Not read when the embeddings are switched off
+    config['intent_model']['use_gnn_embeddings'] = False
+    before = config_fingerprint(config, args, 'features')
+    path.write_bytes(b'again')
+    assert config_fingerprint(config, args, 'features') == before
+
+
+def test_warm_start_flag_invalidates_scaling(checkpoint_dir):
+    args = Namespace(warm_start=True)
+    load_checkpoints(['data', 'features', 'split'], checkpoint_dir, CONFIG, args)
+    with pytest.raises(ValueError, match="--warm-start"):
+        load_checkpoints(['scaling'], checkpoint_dir, CONFIG, args)
+
+
+def test_missing_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_checkpoints(['data'], tmp_path, CONFIG, Namespace(warm_start=False))
+
+
+def test_every_stage_has_config_keys():
+    assert set(train_pipeline.STAGE_CONFIG_KEYS) == set(train_pipeline.STAGE_NAMES)
+
+
+def test_resume_restores_the_timings_of_checkpointed_stages(tmp_path, monkeypatch):
+    args = Namespace(warm_start=False)
+    phase = {'rows': 2, 'wall_s': 1.5, 'cpu_s': 1.2, 'peak_rss_mb': 90000.0, 'rss_delta_mb': 3.0}
+    save_checkpoint('data', OUTPUTS['data'], tmp_path, CONFIG, args, timing={'loading': phase})
+    save_checkpoint('features', OUTPUTS['features'], tmp_path, CONFIG, args)
+    monkeypatch.setattr(train_pipeline, 'profiler', train_pipeline.PipelineProfiler())
+
+    load_checkpoints(['data', 'features'], tmp_path, CONFIG, args)
+
+    summary = train_pipeline.profiler.summary()
+    assert summary['phases'] == {'loading': {**phase, 'from_checkpoint': True}}
+    # The totals are this process's own: the restored peak is not folded in
+    assert summary['total']['peak_rss_mb'] < phase['peak_rss_mb']
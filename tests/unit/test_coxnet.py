@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from lifelines import CoxPHFitter
+
+from src.coxnet import CoxNetFitter
+
+
+@pytest.fixture
+def survival_df():
+    # Continuous times: no ties, so Breslow (CoxNet) and Efron (lifelines) agree
+    rng = np.random.default_rng(0)
+    n = 400
+    X = rng.normal(size=(n, 5)) * [1, 2, 3, 0.5, 1] + [5, 0, 1, 2, 0]
+    T = rng.exponential(np.exp(-(X - X.mean(0)) @ [0.5, -0.3, 0.0, 0.4, 0.0]))
+    df = pd.DataFrame(X, columns=[f'x{i}' for i in range(5)])
+    df['T'] = T
+    df['E'] = (rng.random(n) < 0.7).astype(int)
+    return df
+
+
+@pytest.mark.parametrize('penalizer', [0.0, 0.01, 0.1])
+def test_ridge_matches_lifelines(survival_df, penalizer):
+    reference = CoxPHFitter(penalizer=penalizer).fit(survival_df, 'T', 'E')
+    model = CoxNetFitter(penalizer=penalizer).fit(survival_df, 'T', 'E')
+    np.testing.assert_allclose(model.params_, reference.params_, atol=1e-4)
+    assert model.log_likelihood_ == pytest.approx(reference.log_likelihood_, rel=1e-6)
+    assert model.AIC_partial_ == pytest.approx(reference.AIC_partial_, rel=1e-6)
+    # Coefficients agree to ~1e-5, which can still swap a near-tied pair
+    assert model.score(survival_df) == pytest.approx(reference.score(survival_df, scoring_method='concordance_index'), abs=1e-3)
+
+
+def test_survival_function_matches_lifelines(survival_df):
+    reference = CoxPHFitter(penalizer=0.01).fit(survival_df, 'T', 'E')
+    model = CoxNetFitter(penalizer=0.01).fit(survival_df, 'T', 'E')
+    times = [0.1, 0.5, 1.0, 2.0]
+    np.testing.assert_allclose(model.predict_survival_function(survival_df.head(20), times=times),
+                               reference.predict_survival_function(survival_df.head(20), times=times), atol=1e-4)
+
+
+def test_elastic_net_close_to_lifelines_with_exact_zeros(survival_df):
+    # lifelines smooths |beta|, so only approximately equal, and never exactly zero
+    reference = CoxPHFitter(penalizer=0.05, l1_ratio=0.5).fit(survival_df, 'T', 'E')
+    model = CoxNetFitter(penalizer=0.05, l1_ratio=0.5).fit(survival_df, 'T', 'E')
+    np.testing.assert_allclose(model.params_, reference.params_, atol=5e-3)
+    assert (model.params_ == 0).sum() >= 1
+
+
+def test_diagonal_hessian_path_agrees_with_gram_path(survival_df):
+    gram = CoxNetFitter(penalizer=0.05, l1_ratio=0.5).fit(survival_df, 'T', 'E')
+    diagonal = CoxNetFitter(penalizer=0.05, l1_ratio=0.5, gram_max_features=0).fit(survival_df, 'T', 'E')
+    # Both reach the same optimum; the diagonal approximation stops on the objective a little sooner
+    assert diagonal.log_likelihood_ == pytest.approx(gram.log_likelihood_, rel=1e-7)
+    np.testing.assert_allclose(diagonal.params_, gram.params_, atol=1e-3)
+
+
+def test_warm_start_reaches_the_same_fit(survival_df):
+    previous = CoxNetFitter(penalizer=0.1).fit(survival_df, 'T', 'E')
+    scale = survival_df.drop(columns=['T', 'E']).std(0).to_numpy()
+    cold = CoxNetFitter(penalizer=0.05).fit(survival_df, 'T', 'E')
+    warm = CoxNetFitter(penalizer=0.05).fit(survival_df, 'T', 'E', initial_point=previous.params_.values * scale)
+    np.testing.assert_allclose(warm.params_, cold.params_, atol=1e-5)
+
+
+def test_unsupported_scoring_method(survival_df):
+    model = CoxNetFitter().fit(survival_df, 'T', 'E')
+    with pytest.raises(ValueError):
+        model.score(survival_df, scoring_method='log_likelihood')
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.metrics import precision_score, recall_score, f1_score, fbeta_score
+
+from src.evaluate import threshold_metrics, find_balanced_threshold, find_recall_optimal_threshold
+
+
+@pytest.fixture
+def labelled_scores():
+    rng = np.random.default_rng(1)
+    y = (rng.random(500) < 0.15).astype(int)
+    # Rounded so that many scores tie, and some land exactly on grid thresholds
+    scores = np.round(np.clip(0.3 * y + rng.normal(0.35, 0.2, len(y)), 0, 1), 2)
+    return y, scores
+
+
+@pytest.mark.parametrize('thresholds', [None, 'unique', np.array([0.0, 0.25, 0.5, 1.0, 1.5])])
+def test_threshold_metrics_match_sklearn(labelled_scores, thresholds):
+    y, scores = labelled_scores
+    m = threshold_metrics(y, scores, thresholds)
+    for t, p, r, f1 in zip(m['thresholds'], m['precision'], m['recall'], m['f1']):
+        pred = (scores >= t).astype(int)
+        assert p == pytest.approx(precision_score(y, pred, zero_division=0))
+        assert r == pytest.approx(recall_score(y, pred, zero_division=0))
+        assert f1 == pytest.approx(f1_score(y, pred, zero_division=0))
+
+
+def test_balanced_threshold_maximises_f1(labelled_scores):
+    y, scores = labelled_scores
+    thresholds = np.unique(scores)
+    best = max(f1_score(y, (scores >= t).astype(int), zero_division=0) for t in thresholds)
+    chosen = find_balanced_threshold(y, scores, 'unique')
+    assert f1_score(y, (scores >= chosen).astype(int)) == pytest.approx(best)
+
+
+def test_recall_threshold_maximises_f2_above_min_precision(labelled_scores):
+    y, scores = labelled_scores
+    candidates = [t for t in np.unique(scores) if precision_score(y, (scores >= t).astype(int), zero_division=0) >= 0.5]
+    best = max(fbeta_score(y, (scores >= t).astype(int), beta=2) for t in candidates)
+    chosen = find_recall_optimal_threshold(y, scores, 'unique')
+    assert fbeta_score(y, (scores >= chosen).astype(int), beta=2) == pytest.approx(best, abs=1e-8)
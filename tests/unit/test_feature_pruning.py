@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_pruning import CollinearityPruner
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2000
+    T = rng.exponential(30, n)
+    base = rng.normal(size=n)
+    return pd.DataFrame({
+        'signal': rng.normal(size=n),
+        'constant': np.full(n, 3.0),
+        'near_constant': 1.0 + 0.01 * rng.normal(size=n),
+        'leak': T + 0.1 * rng.normal(size=n),
+        'a': base,
+        'a_copy': base + 0.05 * rng.normal(size=n),
+        'label': np.where(rng.random(n) < 0.5, 'x', 'y'),
+        'T': T,
+        'E': (rng.random(n) < 0.6).astype(int),
+    })
+
+
+def test_fit_drops_each_kind(frame):
+    pruner = CollinearityPruner().fit(frame)
+    assert pruner.dropped_ == {
+        'low_variance': ['constant', 'near_constant'],
+        'target_correlated': ['leak'],
+        'collinear': ['a_copy'],
+    }
+
+
+def test_collinear_columns_are_checked_against_kept_columns_only():
+    # b ~ a and c ~ b, but c is not collinear with a: once b is dropped, c stays
+    rng = np.random.default_rng(1)
+    n = 5000
+    a = rng.normal(size=n)
+    b = a + 0.3 * rng.normal(size=n)
+    c = b + 0.3 * rng.normal(size=n)
+    df = pd.DataFrame({'a': a, 'b': b, 'c': c, 'T': rng.exponential(30, n), 'E': 1})
+    corr = df[['a', 'b', 'c']].corr().abs()
+    threshold = 0.94
+    assert corr.loc['a', 'b'] > threshold and corr.loc['b', 'c'] > threshold and corr.loc['a', 'c'] < threshold
+    pruner = CollinearityPruner(corr_threshold=threshold).fit(df)
+    assert pruner.dropped_['collinear'] == ['b']
+
+
+def test_transform_applies_the_fitted_drop_list(frame):
+    pruner = CollinearityPruner().fit(frame)
+    # Serving data without the target columns and with changed values: same columns go
+    serving = frame.drop(columns=['T', 'E']).assign(constant=np.arange(len(frame), dtype=float))
+    out = pruner.transform(serving)
+    assert list(out.columns) == ['signal', 'a', 'label']
+    assert list(pruner.fit_transform(frame).columns) == ['signal', 'a', 'label', 'T', 'E']
+
+
+def test_row_sample_is_seeded(frame):
+    first = CollinearityPruner(max_rows=500, seed=3).fit(frame).dropped_
+    assert CollinearityPruner(max_rows=500, seed=3).fit(frame).dropped_ == first
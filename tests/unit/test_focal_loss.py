@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy.special import expit
+
+from src.focal_loss import focal_loss, focal_loss_grad_hess, MIN_HESSIAN
+
+STEP = 1e-5
+
+
+def _numerical_grad_hess(y, z, gamma, pos_weight, sample_weight=None):
+    # Central differences of the loss, and of the analytic gradient (checked against the loss)
+    loss = lambda s: focal_loss(y, s, gamma, pos_weight, sample_weight)
+    gradient = lambda s: focal_loss_grad_hess(y, s, gamma, pos_weight, sample_weight)[0]
+    grad = (loss(z + STEP) - loss(z - STEP)) / (2 * STEP)
+    hess = (gradient(z + STEP) - gradient(z - STEP)) / (2 * STEP)
+    return grad, hess
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1], 200)
+    z = rng.uniform(-4, 4, len(y))
+    return y, z
+
+
+@pytest.mark.parametrize('gamma', [0.0, 0.5, 1.0, 2.0, 3.0])
+@pytest.mark.parametrize('pos_weight', [1.0, 5.0])
+def test_grad_hess_match_finite_differences(scores, gamma, pos_weight):
+    y, z = scores
+    grad, hess = focal_loss_grad_hess(y, z, gamma, pos_weight)
+    num_grad, num_hess = _numerical_grad_hess(y, z, gamma, pos_weight)
+    np.testing.assert_allclose(grad, num_grad, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(hess, np.maximum(num_hess, MIN_HESSIAN), rtol=1e-5, atol=1e-7)
+
+
+def test_gamma_zero_is_weighted_log_loss(scores):
+    y, z = scores
+    weight = np.where(y == 1, 3.0, 1.0)
+    p = expit(z)
+    grad, hess = focal_loss_grad_hess(y, z, 0.0, pos_weight=3.0)
+    np.testing.assert_allclose(grad, weight * (p - y), rtol=1e-6)
+    np.testing.assert_allclose(hess, weight * p * (1 - p), rtol=1e-6)
+
+
+def test_sample_weight_scales_linearly(scores):
+    y, z = scores
+    sample_weight = np.linspace(0.5, 2.0, len(y))
+    grad, hess = focal_loss_grad_hess(y, z, 2.0, sample_weight=sample_weight)
+    base_grad, base_hess = focal_loss_grad_hess(y, z, 2.0)
+    np.testing.assert_allclose(grad, base_grad * sample_weight)
+    unfloored = base_hess > MIN_HESSIAN
+    np.testing.assert_allclose(hess[unfloored], np.maximum(base_hess * sample_weight, MIN_HESSIAN)[unfloored])
+
+
+def test_hessian_is_floored():
+    # Confidently-correct samples have a negative exact hessian for gamma > 0
+    _, hess = focal_loss_grad_hess(np.array([1, 0]), np.array([8.0, -8.0]), 2.0)
+    assert np.all(hess >= MIN_HESSIAN)
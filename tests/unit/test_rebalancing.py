@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.rebalancing import negative_subsample_bags, correct_subsampled_probs, BaggedBooster
+
+
+class _ConstantBooster:
+    def __init__(self, probs):
+        self.probs = np.asarray(probs, dtype=np.float64)
+
+    def predict(self, data, **kwargs):
+        return self.probs
+
+
+def test_subsample_bags_keep_all_positives():
+    y = np.array([1] * 10 + [0] * 990)
+    bags, rate = negative_subsample_bags(y, n_bags=3, neg_pos_ratio=5, random_seed=0)
+    assert len(bags) == 3
+    for bag in bags:
+        assert set(np.flatnonzero(y == 1)) <= set(bag)
+        assert (y[bag] == 0).sum() == 50
+    assert rate == pytest.approx(50 / 990)
+
+
+@pytest.mark.parametrize('pos_weight', [1.0, 4.0])
+def test_correction_recovers_the_population_prior(pos_weight):
+    # Base rate 2%; a calibrated model on the subsampled, weighted data sees odds scaled by pos_weight / rate
+    base_rate, rate = 0.02, 0.1
+    odds = base_rate / (1 - base_rate) * pos_weight / rate
+    shifted = odds / (1 + odds)
+    assert correct_subsampled_probs(np.array([shifted]), rate, pos_weight)[0] == pytest.approx(base_rate)
+
+
+def test_correction_is_identity_without_subsampling_or_weight():
+    probs = np.linspace(0.01, 0.99, 9)
+    np.testing.assert_allclose(correct_subsampled_probs(probs, 1.0), probs)
+
+
+def test_correction_is_monotone_and_bounded():
+    probs = np.linspace(0, 1, 101)
+    corrected = correct_subsampled_probs(probs, 0.05, 3.0)
+    assert np.all(np.diff(corrected) > 0)
+    assert corrected[0] == 0 and corrected[-1] == pytest.approx(1)
+
+
+def test_bagged_booster_averages_then_corrects():
+    model = BaggedBooster([_ConstantBooster([0.2, 0.6]), _ConstantBooster([0.4, 0.8])], sampling_rate=0.25, pos_weight=2.0)
+    expected = correct_subsampled_probs(np.array([0.3, 0.7]), 0.25, 2.0)
+    np.testing.assert_allclose(model.predict(None), expected)
@@ -0,0 +1,72 @@
+import pytest
+
+from run_experiments import SHARED_KEYS, parse_grid, job_name, set_dotted
+
+
+def test_parse_grid_values_are_yaml():
+    grid = parse_grid(['intent_model.type=lightgbm,ensemble', 'intent_model.rebalance=smote,sample_weight',
+                       'capacity_model.penalizer=0.01,0.1'])
+    assert grid == {
+        'intent_model.type': ['lightgbm', 'ensemble'],
+        'intent_model.rebalance': ['smote', 'sample_weight'],
+        'capacity_model.penalizer': [0.01, 0.1],
+    }
+
+
+def test_parse_grid_reads_a_grid_file(tmp_path):
+    grid_file = tmp_path / 'grid.yaml'
+    grid_file.write_text("intent_model.threshold_mode: [f2, f05]\n")
+    grid = parse_grid(['intent_model.type=ensemble'], grid_file)
+    assert grid == {'intent_model.threshold_mode': ['f2', 'f05'], 'intent_model.type': ['ensemble']}
+
+
+@pytest.mark.parametrize('assignment', [
+    'data.random_seed=1,2',
+    'feature_engineering.velocity_windows=7',
+    'feature_engineering=null',
+    'intent_model.use_gnn_embeddings=true,false',
+])
+def test_parse_grid_rejects_shared_keys(assignment):
+    with pytest.raises(ValueError, match="shared"):
+        parse_grid([assignment])
+
+
+def test_parse_grid_rejects_shared_keys_in_grid_file(tmp_path):
+    grid_file = tmp_path / 'grid.yaml'
+    grid_file.write_text("data.test_size: [0.2, 0.3]\n")
+    with pytest.raises(ValueError, match="shared"):
+        parse_grid([], grid_file)
+
+
+def test_parse_grid_allows_keys_that_only_share_a_prefix():
+    # 'intent_model.use_gnn_embeddings' is shared, a longer sibling name is not
+    assert 'intent_model.use_gnn_embeddings' in SHARED_KEYS
+    assert parse_grid(['intent_model.use_gnn_embeddings_weight=0.5']) == {'intent_model.use_gnn_embeddings_weight': [0.5]}
+
+
+def test_parse_grid_rejects_use_smote_shadowed_by_rebalance():
+    config = {'intent_model': {'rebalance': 'smote', 'use_smote': True}}
+    with pytest.raises(ValueError, match="rebalance"):
+        parse_grid(['intent_model.use_smote=true,false'], config=config)
+    with pytest.raises(ValueError, match="rebalance"):
+        parse_grid(['intent_model.use_smote=true,false', 'intent_model.rebalance=smote,focal'])
+    # Without `rebalance` the legacy flag still selects the mode
+    assert parse_grid(['intent_model.use_smote=true,false'], config={'intent_model': {}})
+
+
+def test_parse_grid_requires_values():
+    with pytest.raises(ValueError):
+        parse_grid(['intent_model.type'])
+
+
+def test_job_names_are_unique_and_filesystem_safe():
+    names = [job_name(i, {'intent_model.lgb_params': {'num_leaves': n}, 'x': '../a b'}) for i, n in enumerate([31, 63])]
+    assert len(set(names)) == 2
+    assert all('/' not in name and ' ' not in name for name in names)
+    assert job_name(0, {}) == '000_base'
+
+
+def test_set_dotted_creates_parents():
+    config = {'intent_model': {'type': 'lightgbm'}}
+    set_dotted(config, 'intent_model.lgb_params.num_leaves', 63)
+    assert config == {'intent_model': {'type': 'lightgbm', 'lgb_params': {'num_leaves': 63}}}
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.survival_data import prepare_survival_data, prepare_time_varying_survival_data
+
+SNAPSHOT = pd.Timestamp('2026-02-15')
+
+
+def _day(origin_days, day):
+    # Day `day` of a company whose history started `origin_days` before the snapshot
+    return SNAPSHOT - pd.Timedelta(days=origin_days) + pd.Timedelta(days=day)
+
+
+@pytest.fixture
+def datasets():
+    df1 = pd.DataFrame({
+        'company_id': ['A', 'B'],
+        'default_flag': [1, 0],
+        'days_since_first_booking': [100, 50],
+        'snapshot_date': [SNAPSHOT, SNAPSHOT],
+    })
+    bookings = [
+        # company, booked, due, received (day offsets; None = unpaid)
+        ('A', 0, 30, 20),     # paid on time
+        ('A', 10, 40, 50),    # paid late: overdue from day 40 to 50
+        ('A', 60, 90, None),  # unpaid: overdue from day 90
+        ('B', 5, 35, 10),
+    ]
+    origin = {'A': 100, 'B': 50}
+    df2 = pd.DataFrame({
+        'company_id': [c for c, *_ in bookings],
+        'booking_date': [_day(origin[c], b) for c, b, _, _ in bookings],
+        'payment_due_date': [_day(origin[c], d) for c, _, d, _ in bookings],
+        'payment_received_date': [_day(origin[c], r) if r is not None else pd.NaT for c, _, _, r in bookings],
+        'days_to_payment': [r - b if r is not None else np.nan for _, b, _, r in bookings],
+        'booking_amount_inr': [1000.0, 2000.0, 3000.0, 500.0],
+    })
+    return df1, df2
+
+
+def test_episodes_are_contiguous_and_end_at_T(datasets):
+    df1, df2 = datasets
+    episodes = prepare_time_varying_survival_data(df1, df2)
+    T = prepare_survival_data(df1, df2, df1[['company_id']]).set_index('company_id')['T']
+    for company, group in episodes.groupby('company_id'):
+        assert group['start'].iloc[0] == 0
+        assert (group['start'].values[1:] == group['stop'].values[:-1]).all()
+        assert (group['start'] < group['stop']).all()
+        assert group['stop'].iloc[-1] == T[company]
+
+
+def test_event_only_on_the_final_episode(datasets):
+    df1, df2 = datasets
+    episodes = prepare_time_varying_survival_data(df1, df2)
+    a = episodes[episodes['company_id'] == 'A']
+    assert a['E'].tolist() == [0] * (len(a) - 1) + [1]
+    assert episodes.loc[episodes['company_id'] == 'B', 'E'].sum() == 0
+
+
+def test_cumulative_history(datasets):
+    df1, df2 = datasets
+    a = prepare_time_varying_survival_data(df1, df2).query("company_id == 'A'")
+    assert a['start'].tolist() == [0, 10, 20, 40, 50, 60, 90]
+    assert a['stop'].tolist() == [10, 20, 40, 50, 60, 90, 100]
+    assert a['n_bookings'].tolist() == [1, 2, 2, 2, 2, 3, 3]
+    assert a['booked_amount_inr'].tolist() == [1000, 3000, 3000, 3000, 3000, 6000, 6000]
+    assert a['n_payments'].tolist() == [0, 0, 1, 1, 2, 2, 2]
+    assert a['n_late_payments'].tolist() == [0, 0, 0, 0, 1, 1, 1]
+    assert a['n_overdue'].tolist() == [0, 0, 0, 1, 0, 0, 1]
+    assert a['max_days_to_payment'].tolist() == [0, 0, 20, 20, 40, 40, 40]
+
+
+def test_history_starts_empty_before_the_first_booking(datasets):
+    df1, df2 = datasets
+    b = prepare_time_varying_survival_data(df1, df2).query("company_id == 'B'")
+    assert b['start'].tolist() == [0, 5, 10]
+    assert b['stop'].tolist() == [5, 10, 50]
+    assert b['n_bookings'].tolist() == [0, 1, 1]
+    assert b['n_overdue'].tolist() == [0, 0, 0]
+
+
+def test_static_covariates_on_every_episode(datasets):
+    df1, df2 = datasets
+    features = pd.DataFrame({'company_id': ['A', 'B'], 'intent_score': [0.9, 0.1], 'default_flag': [1, 0]})
+    episodes = prepare_time_varying_survival_data(df1, df2, features)
+    assert 'default_flag' not in episodes
+    assert episodes.groupby('company_id')['intent_score'].nunique().eq(1).all()
+    assert episodes.loc[episodes['company_id'] == 'A', 'intent_score'].iloc[0] == 0.9
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from lifelines import CoxPHFitter
+from lifelines.utils import concordance_index as lifelines_concordance_index
+
+from src.survival_metrics import concordance_index, model_concordance
+
+
+def _survival_data(n, seed, ties):
+    rng = np.random.default_rng(seed)
+    times = rng.exponential(30, n)
+    scores = rng.normal(size=n)
+    if ties:
+        # Tied times (including events tied with censorings) and tied predictions
+        times, scores = np.ceil(times / 5), np.round(scores, 1)
+    events = (rng.random(n) < 0.6).astype(int)
+    return times, scores, events
+
+
+@pytest.mark.parametrize('ties', [False, True])
+@pytest.mark.parametrize('n', [2, 17, 500])
+def test_matches_lifelines(n, ties):
+    times, scores, events = _survival_data(n, seed=n, ties=ties)
+    events[0] = 1
+    assert concordance_index(times, scores, events) == pytest.approx(lifelines_concordance_index(times, scores, events))
+
+
+def test_uncensored_by_default():
+    times, scores, _ = _survival_data(200, seed=5, ties=True)
+    assert concordance_index(times, scores) == pytest.approx(lifelines_concordance_index(times, scores))
+
+
+def test_perfect_and_reversed_rankings():
+    times = np.arange(1.0, 11.0)
+    assert concordance_index(times, times) == 1.0
+    assert concordance_index(times, -times) == 0.0
+
+
+def test_no_admissible_pairs():
+    with pytest.raises(ZeroDivisionError):
+        concordance_index([1.0, 2.0], [0.1, 0.2], [0, 0])
+
+
+def test_model_concordance_matches_score():
+    times, _, events = _survival_data(300, seed=6, ties=True)
+    rng = np.random.default_rng(6)
+    df = pd.DataFrame({'x1': rng.normal(size=300), 'x2': rng.normal(size=300), 'T': times, 'E': events})
+    model = CoxPHFitter(penalizer=0.1).fit(df, 'T', 'E')
+    assert model_concordance(model, df) == pytest.approx(model.score(df, scoring_method='concordance_index'))
@@ -0,0 +1,90 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+
+from src.intent_model import EnsembleIntentModel
+
+CONFIG = {
+    'rebalance': 'sample_weight',
+    'tune_hyperparams': False,
+    'binned_cache_dir': None,
+    'stacking_folds': 2,
+    'n_jobs': 1,
+    'warm_start': {'rounds': 10, 'max_psi': 0.25, 'max_auc_drop': 1.0},
+}
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(1600, 8, n_informative=5, weights=[0.85], random_state=0)
+    X = X.astype(np.float32)
+    ids = np.array([f'C{i:04d}' for i in range(1200)])
+    return X[:1200], y[:1200], ids, X[1200:], y[1200:]
+
+
+@pytest.fixture(scope='module')
+def trained(data):
+    X, y, ids, X_val, y_val = data
+    model = EnsembleIntentModel(CONFIG).train(X, y, X_val, y_val)
+    model.oof_ids_ = ids
+    return pickle.dumps(model)
+
+
+def test_relabelled_companies_replace_their_oof_rows(data, trained):
+    X, y, ids, X_val, y_val = data
+    model = pickle.loads(trained)
+    relabelled = np.zeros(len(y), dtype=bool)
+    relabelled[:15] = True
+    y_new = np.where(relabelled, 1 - y, y)
+
+    model.update(X, y_new, X_val, y_val, new_mask=relabelled, ids=ids, config=CONFIG)
+
+    assert len(model.oof_labels_) == len(y) == len(model.oof_predictions_)
+    assert sorted(model.oof_ids_) == sorted(ids)
+    labels = dict(zip(model.oof_ids_, model.oof_labels_))
+    assert all(labels[i] == label for i, label in zip(ids, y_new))
+    assert model.warm_start_report_['outcome'] == 'updated'
+    assert model.warm_start_report_['replaced_oof_rows'] == 15
+
+
+def test_new_and_dropped_companies(data, trained):
+    X, y, ids, X_val, y_val = data
+    model = pickle.loads(trained)
+    # Drop the first 100 companies and add 50 new ones (reusing rows under new ids)
+    keep = np.arange(100, len(y))
+    X_next = np.vstack([X[keep], X[:50]])
+    y_next = np.concatenate([y[keep], y[:50]])
+    ids_next = np.concatenate([ids[keep], [f'N{i:03d}' for i in range(50)]])
+    new_mask = np.r_[np.zeros(len(keep), dtype=bool), np.ones(50, dtype=bool)]
+
+    model.update(X_next, y_next, X_val, y_val, new_mask=new_mask, ids=ids_next, config=CONFIG)
+
+    assert sorted(model.oof_ids_) == sorted(ids_next)
+    assert len(model.oof_labels_) == len(ids_next)
+    assert model.warm_start_report_['replaced_oof_rows'] == 100
+
+
+def test_drift_report_is_populated(data, trained):
+    X, y, ids, X_val, y_val = data
+    model = pickle.loads(trained)
+    model.update(X, y, X_val, y_val, new_mask=np.zeros(len(y), dtype=bool), ids=ids, config=CONFIG)
+    report = model.warm_start_report_
+    assert report['outcome'] == 'unchanged'
+    assert report['drift']['max_psi'] < report['drift']['threshold']
+    assert len(report['drift']['psi']) == X.shape[1]
+
+
+def test_drift_forces_full_retrain(data, trained):
+    X, y, ids, X_val, y_val = data
+    model = pickle.loads(trained)
+    shifted = X.copy()
+    shifted[:, 3] += 3.0
+    model.update(shifted, y, X_val, y_val, ids=ids, config=CONFIG)
+    report = model.warm_start_report_
+    assert report['outcome'] == 'full_retrain'
+    assert report['drift']['column'] == 3 and report['drift']['max_psi'] > report['drift']['threshold']
+    # The retrain starts the out-of-fold rows afresh from the current training set
+    assert list(model.oof_ids_) == list(ids)
+    assert len(model.oof_labels_) == len(y)
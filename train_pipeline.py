@@ -1,5 +1,7 @@
 import argparse
 import sys
+import json
+import hashlib
 import logging
 import pandas as pd
 import numpy as np
@@ -8,255 +10,547 @@ import torch
 import yaml
 from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.preprocessing import RobustScaler
-from torch.optim.lr_scheduler import ReduceLROnPlateau
-import torch.nn.functional as F
 
 # Add src to python path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from src.utils import setup_logger, load_config, set_seed
+from src.utils import setup_logger, load_config, set_seed, load_object, save_object
 from src.data_loader import load_datasets, validate_referential_integrity, validate_data_quality
 from src.feature_engineering import engineer_features
 from src.graph_builder import GraphBuilder
-from src.survival_data import prepare_survival_data
+from src.survival_data import prepare_survival_data, prepare_time_varying_survival_data
 from src.intent_model import HeteroGNN, LightGBMIntentModel, EnsembleIntentModel
-from src.capacity_model import CapacityModel, tune_penalizer
-from src.evaluate import evaluate_intent, evaluate_capacity, save_report, find_optimal_threshold
+from src.gnn_trainer import GNNTrainer
+from src.torch_runtime import configure_torch_cpu
+from src.gnn_embeddings import export_company_embeddings, add_embedding_features, CompanyEmbeddingStore
+from src.capacity_model import CapacityModel, tune_penalizer, fit_time_varying_cox
+from src.evaluate import evaluate_intent, evaluate_capacity, save_report, find_optimal_threshold, proportional_hazards_diagnostics
+from src.distillation import DistilledIntentModel, soft_targets, distillation_report
+from src.bootstrap import bootstrap_intent_ci, bootstrap_c_index_ci
+from src.profiling import PipelineProfiler
 
-def main():
-    # 1. Setup
-    logger = setup_logger()
-    logger.info("Starting AEROX Model Training Pipeline")
-    
-    try:
-        config = load_config()
-        logger.info("Configuration loaded successfully")
-        
-        set_seed(config['data']['random_seed'])
-        
-        # 2. Data Loading
-        logger.info("Phase 2: Data Loading & Validation")
+logger = logging.getLogger('aerox_logger')
+# Phase timings for the report; main() replaces it with one configured for the run
+profiler = PipelineProfiler()
+
+# Each stage takes the pipeline state (a dict of everything the earlier stages produced)
+# and returns the entries it adds or replaces. Those entries are checkpointed to
+# <checkpoint_dir>/<stage>.pkl, so a run can resume from any later stage.
+
+def stage_data(state, config, args):
+    logger.info("Phase 2: Data Loading & Validation")
+    with profiler.section('loading') as record:
         df1, df2, df3 = load_datasets(config)
-        
+        record['rows'] = len(df1) + len(df2) + len(df3)
+
+    with profiler.section('validation', rows=len(df1)):
         validate_referential_integrity(df1, df2, df3)
         df1 = validate_data_quality(df1, df2, df3)
-        
-        # 3. Feature Engineering
-        logger.info("Phase 3: Feature Engineering")
-        features_df = engineer_features(df1, df2, df3, config)
-        
-        # 4. Stratified Split (BEFORE Scaling)
-        logger.info("Phase 4: Stratified Splitting")
+    return {'df1': df1, 'df2': df2, 'df3': df3}
+
+def stage_features(state, config, args):
+    logger.info("Phase 3: Feature Engineering")
+    with profiler.section('feature_engineering') as record:
+        features_df = engineer_features(state['df1'], state['df2'], state['df3'], config)
+
+        # Optionally add precomputed GNN embeddings (from a previous GNN run) as tabular features
+        intent_cfg = config['intent_model']
+        embeddings_path = intent_cfg.get('gnn_embeddings_path', 'models/gnn_company_embeddings.npz')
+        if intent_cfg.get('use_gnn_embeddings', False) and intent_cfg.get('type', 'lightgbm') in ['lightgbm', 'ensemble']:
+            if Path(embeddings_path).exists():
+                features_df = add_embedding_features(features_df, CompanyEmbeddingStore.load(embeddings_path))
+            else:
+                logger.warning(f"GNN embeddings not found at {embeddings_path}, skipping")
+        record['rows'] = len(features_df)
+    return {'features_df': features_df}
+
+def stage_split(state, config, args):
+    # Stratified Split (BEFORE Scaling)
+    logger.info("Phase 4: Stratified Splitting")
+    with profiler.section('split', rows=len(state['features_df'])):
+        features_df = state['features_df']
         target_col = 'fraud_flag'
-        labels = df1.set_index('company_id').loc[features_df['company_id'], target_col]
-        
+        labels = state['df1'].set_index('company_id').loc[features_df['company_id'], target_col]
+
         sss_test = StratifiedShuffleSplit(n_splits=1, test_size=config['data']['test_ratio'], random_state=config['data']['random_seed'])
         train_val_idx, test_idx = next(sss_test.split(features_df, labels))
-        
-        train_val_df = features_df.iloc[train_val_idx]
+
         train_val_labels = labels.iloc[train_val_idx]
-        
+
         val_ratio_adjusted = config['data']['val_ratio'] / (1 - config['data']['test_ratio'])
         sss_val = StratifiedShuffleSplit(n_splits=1, test_size=val_ratio_adjusted, random_state=config['data']['random_seed'])
-        train_idx_internal, val_idx_internal = next(sss_val.split(train_val_df, train_val_labels))
-        
+        # The splitter only needs the row count, not a copy of the train/val rows
+        train_idx_internal, val_idx_internal = next(sss_val.split(np.zeros(len(train_val_idx)), train_val_labels))
+
         train_idx = train_val_idx[train_idx_internal]
         val_idx = train_val_idx[val_idx_internal]
-        
-        train_ids = features_df.iloc[train_idx]['company_id'].values
-        val_ids = features_df.iloc[val_idx]['company_id'].values
-        test_ids = features_df.iloc[test_idx]['company_id'].values
-        
+
+        company_ids = features_df['company_id'].values
+        train_ids = company_ids[train_idx]
+        val_ids = company_ids[val_idx]
+        test_ids = company_ids[test_idx]
+
         logger.info(f"Split: Train={len(train_ids)}, Val={len(val_ids)}, Test={len(test_ids)}")
+    return {
+        'labels': labels,
+        'train_idx': train_idx, 'val_idx': val_idx, 'test_idx': test_idx,
+        'train_ids': train_ids, 'val_ids': val_ids, 'test_ids': test_ids,
+    }
+
+def intent_model_path(config):
+    model_type = config['intent_model'].get('type', 'lightgbm')
+    return model_type, f"models/intent_{model_type}.pkl"
 
-        # 5. Scaling (Fit on Train, Transform All)
-        logger.info("Phase 5: Scaling Features")
+def load_warm_model(config):
+    """The saved ensemble a --warm-start run updates, or None."""
+    model_type, model_filename = intent_model_path(config)
+    if model_type == 'ensemble' and Path(model_filename).exists():
+        return load_object(model_filename)
+    return None
+
+def stage_scaling(state, config, args):
+    # Scaling (Fit on Train, Transform All)
+    logger.info("Phase 5: Scaling Features")
+    with profiler.section('scaling', rows=len(state['features_df'])):
+        features_df = state['features_df']
         numeric_cols = features_df.select_dtypes(include=np.number).columns.tolist()
-        scale_cols = [c for c in numeric_cols if c != 'company_id']
-        
-        # Ensure float dtype to avoid pandas warnings/errors on scaling
-        features_df[scale_cols] = features_df[scale_cols].astype(float)
-        
-        scaler = RobustScaler()
-        scaler.fit(features_df.loc[train_idx, scale_cols])
-        features_df.loc[:, scale_cols] = scaler.transform(features_df.loc[:, scale_cols])
-
-        # 6. Graph Construction (Skip if using LightGBM/Ensemble)
-        model_type = config['intent_model'].get('type', 'lightgbm')
-        
-        if model_type in ['heterogeneous_gat', 'gnn']:
-            logger.info("Phase 6: Graph Construction")
-            graph_builder = GraphBuilder(df3, features_df)
+        feature_cols = [c for c in numeric_cols if c != 'company_id']
+
+        # One contiguous float32 matrix with the rows grouped by split (train | val | test):
+        # each split is then a slice (a view, see split_views), and the matrix is scaled in
+        # place. Filled column by column, so no float64 copy of the whole frame is made.
+        order = np.concatenate([state['train_idx'], state['val_idx'], state['test_idx']])
+        X = np.empty((len(order), len(feature_cols)), dtype=np.float32)
+        for j, col in enumerate(feature_cols):
+            X[:, j] = features_df[col].to_numpy()[order]
+        split_sizes = (len(state['train_idx']), len(state['val_idx']), len(state['test_idx']))
+
+        # A warm-started model keeps the scaler it was originally fit with
+        warm_model = load_warm_model(config) if args.warm_start else None
+        if args.warm_start and warm_model is None:
+            logger.warning(f"--warm-start needs a saved ensemble at {intent_model_path(config)[1]}, training from scratch")
+
+        scaler = getattr(warm_model, 'scaler_', None)
+        if scaler is None:
+            scaler = RobustScaler(copy=False)
+            scaler.fit(X[:split_sizes[0]])
+        # In place for our scaler; a warm-started model's scaler may return a new array
+        X = scaler.transform(X)
+    return {
+        'X': X, 'feature_cols': feature_cols, 'row_ids': features_df['company_id'].values[order],
+        'split_sizes': split_sizes, 'scaler': scaler,
+        # Later stages read the scaled matrix; release the unscaled frame
+        'features_df': None,
+    }
+
+def split_views(state):
+    """Train, val and test rows of the scaled matrix (views, no copies)."""
+    X = state['X']
+    n_train, n_val, _ = state['split_sizes']
+    return X[:n_train], X[n_train:n_train + n_val], X[n_train + n_val:]
+
+def scaled_frame(state):
+    """company_id plus the scaled features, as a DataFrame over the scaled matrix (split order)."""
+    frame = pd.DataFrame(state['X'], columns=state['feature_cols'], copy=False)
+    frame.insert(0, 'company_id', state['row_ids'])
+    return frame
+
+def stage_intent(state, config, args):
+    labels, df1 = state['labels'], state['df1']
+    train_idx, val_idx, test_idx = state['train_idx'], state['val_idx'], state['test_idx']
+    train_ids, val_ids, test_ids = state['train_ids'], state['val_ids'], state['test_ids']
+    model_type, _ = intent_model_path(config)
+    intent_cfg = config['intent_model']
+    embeddings_path = intent_cfg.get('gnn_embeddings_path', 'models/gnn_company_embeddings.npz')
+
+    # 6. Graph Construction (Skip if using LightGBM/Ensemble)
+    if model_type in ['heterogeneous_gat', 'gnn']:
+        logger.info("Phase 6: Graph Construction")
+        with profiler.section('graph', rows=len(state['X'])):
+            configure_torch_cpu(config.get('torch_runtime'))
+            graph_builder = GraphBuilder(state['df3'], scaled_frame(state))
             hetero_data = graph_builder.build()
-            
+
             def get_graph_indices(ids, mapping):
                 return torch.tensor([mapping[x] for x in ids if x in mapping], dtype=torch.long)
-            
+
             train_mask = get_graph_indices(train_ids, graph_builder.company_map)
             val_mask = get_graph_indices(val_ids, graph_builder.company_map)
             test_mask = get_graph_indices(test_ids, graph_builder.company_map)
-        else:
-            logger.info(f"Phase 6: Skipping graph construction ({model_type.upper()} mode)")
-            hetero_data = None
-            graph_builder = None
-        
-        # 7. Model 1 (Intent) - Train
-        logger.info(f"Phase 7: Training Intent Score Model ({model_type.upper()})")
-        
+    else:
+        logger.info(f"Phase 6: Skipping graph construction ({model_type.upper()} mode)")
+        hetero_data = None
+        graph_builder = None
+
+    # 7. Model 1 (Intent) - Train
+    logger.info(f"Phase 7: Training Intent Score Model ({model_type.upper()})")
+    with profiler.section('intent', rows=len(train_idx)):
+        report_sections = {}
+        intent_model = model_gnn = None
+
         if model_type in ['lightgbm', 'ensemble']:
             # Prepare tabular data
-            feature_cols = [c for c in features_df.columns if c != 'company_id']
-            X_train = features_df.iloc[train_idx][feature_cols].values
-            X_val = features_df.iloc[val_idx][feature_cols].values
-            X_test = features_df.iloc[test_idx][feature_cols].values
-            
+            feature_cols = state['feature_cols']
+            X_train, X_val, X_test = split_views(state)
+
             y_train = labels.iloc[train_idx].values.astype(int)
             y_val = labels.iloc[val_idx].values.astype(int)
             y_test = labels.iloc[test_idx].values.astype(int)
-            
-            # Train model (LightGBM or Ensemble)
-            if model_type == 'ensemble':
-                intent_model = EnsembleIntentModel(config['intent_model'])
+
+            # Train model (LightGBM or Ensemble), or update the saved ensemble in place
+            warm_model = load_warm_model(config) if args.warm_start else None
+            if warm_model is not None:
+                intent_model = warm_model
+                previous_labels = getattr(intent_model, 'train_labels_', None)
+                new_mask = None
+                if previous_labels is not None:
+                    previous_labels = previous_labels.reindex(train_ids)
+                    new_mask = (previous_labels.isna() | (previous_labels.values != y_train)).values
+                intent_model.update(X_train, y_train, X_val, y_val, new_mask=new_mask,
+                                    ids=train_ids, config=config['intent_model'])
+                report_sections['warm_start'] = intent_model.warm_start_report_
             else:
-                intent_model = LightGBMIntentModel(config['intent_model'])
-            
-            intent_model.train(X_train, y_train, X_val, y_val)
-            
+                if model_type == 'ensemble':
+                    intent_model = EnsembleIntentModel(config['intent_model'])
+                else:
+                    intent_model = LightGBMIntentModel(config['intent_model'])
+
+                intent_model.train(X_train, y_train, X_val, y_val)
+                if model_type == 'ensemble':
+                    # Row ids of the stored out-of-fold predictions, for later warm starts
+                    intent_model.oof_ids_ = np.asarray(train_ids)
+            # Labels and scaler the model was fit with, so the next --warm-start can find
+            # new/relabelled companies and score them on the same feature scale
+            intent_model.train_labels_ = pd.Series(y_train, index=train_ids)
+            intent_model.scaler_ = state['scaler']
+
             # Get predictions
             val_probs = intent_model.predict(X_val)
             test_probs = intent_model.predict(X_test)
-            
+
             # Optimize threshold on validation set (use recall-focused mode for ensemble)
             threshold_mode = config['intent_model'].get('threshold_mode', 'f05')
             best_threshold = find_optimal_threshold(y_val, val_probs, mode=threshold_mode)
-            
+
             # Create intent scores for all companies
-            all_X = features_df[feature_cols].values
+            all_X = state['X']
             intent_scores = intent_model.predict(all_X)
-            score_series = pd.Series(intent_scores, index=features_df['company_id'].values)
-            
+            score_series = pd.Series(intent_scores, index=state['row_ids'])
+
             # Log feature importance
             feature_importance = intent_model.get_feature_importance(feature_cols)
             top_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)[:10]
             logger.info("Top 10 Important Features:")
             for feat, importance in top_features:
                 logger.info(f"  {feat}: {importance:.2f}")
-            
+
+            # Optional: distil the ensemble into one compact scorer for serving
+            distill_cfg = config['intent_model'].get('distillation', {})
+            if model_type == 'ensemble' and distill_cfg.get('enabled', False):
+                logger.info(f"Phase 7b: Distilling ensemble into a {distill_cfg.get('kind', 'lightgbm')} scorer")
+                # Student fit on the training rows only: val/test stay held out for the fidelity report.
+                # Training rows come first in the scaled matrix, so their teacher scores are the head.
+                n_train = len(train_idx)
+                targets = soft_targets(intent_model, X_train, np.arange(n_train), teacher_scores=intent_scores[:n_train])
+                distilled_model = DistilledIntentModel(distill_cfg, feature_names=feature_cols).fit(X_train, targets)
+                report_sections['distillation'] = distillation_report(
+                    intent_model, distilled_model, X_val, y_val, X_test, y_test, threshold_mode=threshold_mode
+                )
+                save_object(distilled_model, "models/intent_distilled.pkl")
+                logger.info("Saved distilled model to models/intent_distilled.pkl")
+
         else:  # GNN mode
             targets = pd.DataFrame({'company_id': [c for c, i in sorted(graph_builder.company_map.items(), key=lambda x: x[1])]})
             targets = targets.merge(df1[['company_id', 'fraud_flag']], on='company_id', how='left')
             target_tensor = torch.tensor(targets['fraud_flag'].values, dtype=torch.float)
             hetero_data['company'].y = target_tensor
-            
+
             num_nodes_dict = {
-                nt: hetero_data[nt].x.size(0) if hasattr(hetero_data[nt], 'x') else hetero_data[nt].num_nodes 
+                nt: hetero_data[nt].x.size(0) if hasattr(hetero_data[nt], 'x') else hetero_data[nt].num_nodes
                 for nt in hetero_data.node_types
             }
-            
+
             gnn_cfg = config['intent_model']
             model_gnn = HeteroGNN(
-                metadata=hetero_data.metadata(), 
-                hidden_dims=gnn_cfg['hidden_dims'], 
-                out_channels=1, 
+                metadata=hetero_data.metadata(),
+                hidden_dims=gnn_cfg['hidden_dims'],
+                out_channels=1,
                 num_nodes_dict=num_nodes_dict,
                 embedding_dim=32,
                 dropout=gnn_cfg.get('dropout', 0.3)
             )
-            
-            pos_weight = torch.tensor([gnn_cfg.get('positive_class_weight', 3.5)])
-            criterion = torch.nn.BCEWithLogitsLoss(pos_weight=pos_weight)
-            optimizer = torch.optim.Adam(model_gnn.parameters(), lr=gnn_cfg['learning_rate'], weight_decay=gnn_cfg.get('weight_decay', 0.0001))
-            scheduler = ReduceLROnPlateau(optimizer, mode='max', factor=gnn_cfg.get('lr_scheduler_factor', 0.5), patience=gnn_cfg.get('lr_scheduler_patience', 10), min_lr=1e-5)
-            
-            best_val_score = 0
-            patience_counter = 0
-            best_model_state = None
-            
-            for epoch in range(gnn_cfg['epochs']):
-                model_gnn.train()
-                optimizer.zero_grad()
-                out = model_gnn(hetero_data.x_dict, hetero_data.edge_index_dict)
-                loss = criterion(out[train_mask].squeeze(), hetero_data['company'].y[train_mask])
-                loss.backward()
-                optimizer.step()
-                
-                model_gnn.eval()
-                with torch.no_grad():
-                    full_out = model_gnn(hetero_data.x_dict, hetero_data.edge_index_dict).squeeze()
-                    val_probs = torch.sigmoid(full_out[val_mask])
-                    val_targets = hetero_data['company'].y[val_mask]
-                    try:
-                        val_auc = evaluate_intent(val_targets.cpu().numpy(), val_probs.cpu().numpy())['roc_auc']
-                    except: val_auc = 0.5
-                
-                scheduler.step(val_auc)
-                if val_auc > best_val_score:
-                    best_val_score = val_auc
-                    best_model_state = model_gnn.state_dict()
-                    patience_counter = 0
-                else:
-                    patience_counter += 1
-                    
-                if epoch % 10 == 0:
-                    logger.info(f"Epoch {epoch}, Loss: {loss.item():.4f}, Val AUC: {val_auc:.4f}")
-                if patience_counter >= gnn_cfg.get('early_stopping_patience', 20):
-                    logger.info(f"Early stopping at epoch {epoch}")
-                    break
-            
-            if best_model_state: model_gnn.load_state_dict(best_model_state)
-            
+
+            trainer = GNNTrainer(model_gnn, gnn_cfg, runtime=config.get('torch_runtime')).fit(hetero_data, train_mask, val_mask)
+            timing = trainer.timing_summary()
+            logger.info(f"GNN best Val AUC: {trainer.best_val_score:.4f} (epoch {trainer.best_epoch}), "
+                        f"{timing['epochs']} epochs in {timing['total_s']:.1f}s "
+                        f"({timing['mean_train_ms']:.1f}ms/train step, {timing['mean_eval_ms']:.1f}ms/eval)")
+
             # Optimize Threshold
             model_gnn.eval()
-            with torch.no_grad():
+            with torch.inference_mode():
                 full_out = model_gnn(hetero_data.x_dict, hetero_data.edge_index_dict).squeeze()
                 val_probs = torch.sigmoid(full_out[val_mask]).cpu().numpy()
                 val_y = hetero_data['company'].y[val_mask].cpu().numpy()
                 best_threshold = find_optimal_threshold(val_y, val_probs)
-                
+
                 intent_scores = torch.sigmoid(full_out).cpu().numpy()
 
             ordered_ids = [c for c, i in sorted(graph_builder.company_map.items(), key=lambda item: item[1])]
             score_series = pd.Series(intent_scores, index=ordered_ids)
             test_probs = score_series[test_ids].values
             y_test = labels[test_ids].values
-        
-        # 8. Capacity Model
-        logger.info("Phase 8: Training Capacity Score Model (Cox PH)")
-        features_with_scores = features_df.copy()
-        features_with_scores['intent_score'] = features_with_scores['company_id'].map(score_series)
+
+            # Export company embeddings + logits for tabular models and torch-free serving
+            export_company_embeddings(model_gnn, hetero_data, graph_builder.company_map, embeddings_path)
+
+    return {
+        'intent_model': intent_model, 'model_gnn': model_gnn,
+        'best_threshold': best_threshold, 'score_series': score_series,
+        'test_probs': test_probs, 'y_test': y_test,
+        'report_sections': {**state.get('report_sections', {}), **report_sections},
+    }
+
+def stage_capacity(state, config, args):
+    # 8. Capacity Model
+    logger.info("Phase 8: Training Capacity Score Model (Cox PH)")
+    with profiler.section('capacity') as record:
+        df1, df2, train_ids, test_ids = state['df1'], state['df2'], state['train_ids'], state['test_ids']
+        report_sections = dict(state.get('report_sections', {}))
+        features_with_scores = scaled_frame(state)
+        features_with_scores['intent_score'] = features_with_scores['company_id'].map(state['score_series'])
         survival_df = prepare_survival_data(df1, df2, features_with_scores)
-        
+
         cox_train = survival_df[survival_df['company_id'].isin(train_ids)].drop(columns=['company_id'])
         cox_test = survival_df[survival_df['company_id'].isin(test_ids)].drop(columns=['company_id'])
-        
-        cox_model = CapacityModel(penalizer=config['capacity_model']['penalizer'])
+        record['rows'] = len(cox_train)
+
+        cap_cfg = config['capacity_model']
+        penalizer = cap_cfg['penalizer']
+        l1_ratio = cap_cfg.get('l1_ratio', 0.0)
+        solver = cap_cfg.get('solver', 'lifelines')
+        pruning = cap_cfg.get('pruning')
+        search_cfg = cap_cfg.get('penalizer_search', {})
+        if search_cfg.get('enabled', False) and not args.warm_start:
+            search_df = CapacityModel(pruning=pruning).select_columns(cox_train)
+            penalizer, report_sections['penalizer_search'] = tune_penalizer(
+                search_df,
+                values=cap_cfg.get('penalizer_cv_range', [0.01, 0.1, 1.0]),
+                folds=search_cfg.get('folds', 3),
+                l1_ratio=l1_ratio,
+                n_jobs=search_cfg.get('n_jobs', 1),
+                seed=config['data']['random_seed'],
+                solver=search_cfg.get('solver') or solver,
+            )
+
+        cox_model = CapacityModel(penalizer=penalizer, l1_ratio=l1_ratio, solver=solver, pruning=pruning)
         try:
             cox_model.fit(cox_train)
         except Exception as e:
             logger.warning(f"Cox fit failed initial, trying heavier penalty: {e}")
-            cox_model = CapacityModel(penalizer=1.0)
+            cox_model = CapacityModel(penalizer=1.0, solver=solver, pruning=pruning)
             cox_model.fit(cox_train)
-            
-        # 9. Report
+
+        tv_cfg = cap_cfg.get('time_varying', {})
+        if tv_cfg.get('enabled', False):
+            tv_features = features_with_scores[['company_id'] + tv_cfg.get('static_columns', [])]
+            episodes = prepare_time_varying_survival_data(df1, df2, tv_features)
+            _, report_sections['time_varying_cox'] = fit_time_varying_cox(
+                episodes[episodes['company_id'].isin(train_ids)],
+                penalizer=tv_cfg.get('penalizer', penalizer),
+            )
+
+    return {'cox_model': cox_model, 'cox_train': cox_train, 'cox_test': cox_test, 'report_sections': report_sections}
+
+def stage_report(state, config, args):
+    # 9. Report
+    with profiler.section('report', rows=len(state['y_test'])):
+        cox_model, cox_train, cox_test = state['cox_model'], state['cox_train'], state['cox_test']
+        y_test, test_probs, best_threshold = state['y_test'], state['test_probs'], state['best_threshold']
+        report_sections = dict(state.get('report_sections', {}))
+        solver = cox_model.solver
+
         intent_metrics = evaluate_intent(y_test, test_probs, threshold=best_threshold)
         capacity_metrics = evaluate_capacity(cox_model.cph, cox_test)
-        
-        save_report(intent_metrics, capacity_metrics, "reports/evaluation.json")
-        
-        # Save models
-        if model_type in ['lightgbm', 'ensemble']:
-            import pickle
-            model_filename = f"models/intent_{model_type}.pkl"
-            with open(model_filename, 'wb') as f:
-                pickle.dump(intent_model, f)
-            logger.info(f"Saved {model_type.upper()} model to {model_filename}")
+
+        ph_cfg = config['capacity_model'].get('ph_diagnostics', {})
+        if not ph_cfg.get('enabled', True):
+            logger.info("Skipping proportional-hazards diagnostics (disabled)")
+        elif solver != 'lifelines':
+            logger.info(f"Skipping proportional-hazards diagnostics (needs the lifelines solver, not {solver})")
+        elif args.warm_start:
+            logger.info("Skipping proportional-hazards diagnostics (--warm-start)")
         else:
-            torch.save(model_gnn.state_dict(), "models/intent_gnn.pt")
-            logger.info("Saved GNN model to models/intent_gnn.pt")
-            
-        cox_model.save("models/capacity_cox.pkl")
+            report_sections['ph_diagnostics'] = proportional_hazards_diagnostics(
+                cox_model.cph, cox_train,
+                sample_size=ph_cfg.get('sample_size', 2000),
+                time_transform=ph_cfg.get('time_transform', 'rank'),
+                p_value_threshold=ph_cfg.get('p_value_threshold', 0.05),
+                seed=config['data']['random_seed'],
+            )
+
+        boot_cfg = config.get('evaluation', {}).get('bootstrap', {})
+        if boot_cfg.get('enabled', False):
+            logger.info(f"Bootstrapping confidence intervals ({boot_cfg.get('n_resamples', 1000)} resamples)")
+            boot_kwargs = {
+                'n_resamples': boot_cfg.get('n_resamples', 1000),
+                'confidence': boot_cfg.get('confidence', 0.95),
+                'n_jobs': boot_cfg.get('n_jobs', 1),
+                'seed': boot_cfg.get('seed', 42),
+            }
+            risk_scores = cox_model.cph.predict_partial_hazard(cox_test).values
+            report_sections['confidence_intervals'] = {
+                'intent_model': bootstrap_intent_ci(y_test, test_probs, threshold=best_threshold, **boot_kwargs),
+                'capacity_model': bootstrap_c_index_ci(cox_test['T'].values, risk_scores, cox_test['E'].values, **boot_kwargs),
+            }
+
+    save_report(intent_metrics, capacity_metrics, "reports/evaluation.json", extra={**report_sections, 'timing': profiler.summary()})
+
+    # Save models
+    model_type, model_filename = intent_model_path(config)
+    if model_type in ['lightgbm', 'ensemble']:
+        import pickle
+        with open(model_filename, 'wb') as f:
+            pickle.dump(state['intent_model'], f)
+        logger.info(f"Saved {model_type.upper()} model to {model_filename}")
+    else:
+        torch.save(state['model_gnn'].state_dict(), "models/intent_gnn.pt")
+        logger.info("Saved GNN model to models/intent_gnn.pt")
+
+    cox_model.save("models/capacity_cox.pkl")
+    return {}
+
+STAGES = [
+    ('data', stage_data),
+    ('features', stage_features),
+    ('split', stage_split),
+    ('scaling', stage_scaling),
+    ('intent', stage_intent),
+    ('capacity', stage_capacity),
+    ('report', stage_report),
+]
+STAGE_NAMES = [name for name, _ in STAGES]
+
+# Config keys (dotted) each stage's outputs depend on. A checkpoint is fingerprinted over
+# the keys of its stage and all earlier ones, so editing e.g. capacity_model.* still lets
+# a run resume from 'capacity'. '--' keys are not config keys: '--warm-start' stands for the
+# flag (and the saved model it warm-starts from), '--gnn-embeddings' for the contents of the
+# embeddings file the features join.
+STAGE_CONFIG_KEYS = {
+    'data': ['data'],
+    'features': ['feature_engineering', 'intent_model.use_gnn_embeddings', 'intent_model.gnn_embeddings_path',
+                 '--gnn-embeddings'],
+    'split': [],
+    'scaling': ['--warm-start'],
+    'intent': ['intent_model', 'torch_runtime'],
+    'capacity': ['capacity_model'],
+    'report': ['evaluation'],
+}
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _config_value(config, args, key):
+    if key == '--warm-start':
+        return intent_model_path(config)[1] if args.warm_start else None
+    if key == '--gnn-embeddings':
+        intent_cfg = config.get('intent_model', {})
+        path = Path(intent_cfg.get('gnn_embeddings_path', 'models/gnn_company_embeddings.npz'))
+        # A regenerated file must invalidate the features joined from the old one
+        return _file_digest(path) if intent_cfg.get('use_gnn_embeddings', False) and path.exists() else None
+    node = config
+    for part in key.split('.'):
+        node = node.get(part) if isinstance(node, dict) else None
+    return node
+
+def config_fingerprint(config, args, stage):
+    """Short hash of the config keys and CLI flags the checkpoint of `stage` depends on."""
+    keys = [key for name in STAGE_NAMES[:STAGE_NAMES.index(stage) + 1] for key in STAGE_CONFIG_KEYS[name]]
+    payload = json.dumps({key: _config_value(config, args, key) for key in keys}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+def save_checkpoint(name, outputs, checkpoint_dir, config, args, timing=None):
+    """Write the outputs (and profiler phases) of stage `name` with the fingerprint load_checkpoints checks."""
+    save_object({'fingerprint': config_fingerprint(config, args, name), 'outputs': outputs, 'timing': timing or {}},
+                Path(checkpoint_dir) / f"{name}.pkl")
+
+def load_checkpoints(stages, checkpoint_dir, config, args, ignore_config_change=False):
+    """
+    Pipeline state restored from the checkpoints of `stages`, in order.
+
+    Refuses a checkpoint written with a different value of a config key (or flag) its
+    stage depends on, unless `ignore_config_change`. The stage timings stored with the
+    checkpoints go back into the profiler, flagged as loaded from a checkpoint.
+    """
+    state = {}
+    for name in stages:
+        path = Path(checkpoint_dir) / f"{name}.pkl"
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint for stage '{name}' at {path}: run the pipeline up to that stage first")
+        checkpoint = load_object(path)
+        if checkpoint['fingerprint'] != config_fingerprint(config, args, name):
+            keys = [key for n in STAGE_NAMES[:STAGE_NAMES.index(name) + 1] for key in STAGE_CONFIG_KEYS[n]]
+            message = f"Checkpoint '{name}' was written with a different value of one of {keys}"
+            if not ignore_config_change:
+                raise ValueError(f"{message}: rerun from stage '{name}' or pass --ignore-config-change")
+            logger.warning(f"{message}, using it anyway (--ignore-config-change)")
+        state.update(checkpoint['outputs'])
+        profiler.restore(checkpoint.get('timing', {}))
+        logger.info(f"Loaded checkpoint '{name}' from {path}")
+    return state
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AEROX model training pipeline")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="Update the saved ensemble on new/relabelled companies instead of retraining from scratch")
+    stage_group = parser.add_mutually_exclusive_group()
+    stage_group.add_argument('--resume-from', choices=STAGE_NAMES,
+                             help="Load the checkpoints of the earlier stages and run from this stage on")
+    stage_group.add_argument('--only', choices=STAGE_NAMES,
+                             help="Load the checkpoints of the earlier stages and run this stage only")
+    parser.add_argument('--ignore-config-change', action='store_true',
+                        help="Load checkpoints even if the config their stages depend on has changed since")
+    return parser.parse_args()
+
+def main():
+    global profiler
+    args = parse_args()
+
+    # 1. Setup
+    setup_logger()
+    logger.info("Starting AEROX Model Training Pipeline")
+
+    try:
+        config = load_config()
+        logger.info("Configuration loaded successfully")
+
+        set_seed(config['data']['random_seed'])
+
+        pipeline_cfg = config.get('pipeline', {})
+        checkpoint_dir = pipeline_cfg.get('checkpoint_dir', 'models/checkpoints')
+        checkpoints = pipeline_cfg.get('checkpoints', True)
+        profiler = PipelineProfiler(profile_dir=pipeline_cfg.get('profile_dir'))
+
+        first = STAGE_NAMES.index(args.resume_from or args.only or STAGE_NAMES[0])
+        last = first if args.only else len(STAGES) - 1
+        state = load_checkpoints(STAGE_NAMES[:first], checkpoint_dir, config, args, args.ignore_config_change) if first else {}
+        if first:
+            logger.info(f"Resuming at stage '{STAGE_NAMES[first]}'")
+
+        for name, stage in STAGES[first:last + 1]:
+            phases_before = set(profiler.phases)
+            outputs = stage(state, config, args)
+            state.update(outputs)
+            if checkpoints and outputs:
+                timing = {phase: record for phase, record in profiler.phases.items() if phase not in phases_before}
+                save_checkpoint(name, outputs, checkpoint_dir, config, args, timing)
+
         logger.info("Pipeline completed successfully!")
-        
+
     except Exception as e:
         logger.error(f"Pipeline failed: {str(e)}", exc_info=True)
         sys.exit(1)